@@ -0,0 +1,166 @@
+"""
+Answer Cache
+Per-collection cache of chat answers, matched first by normalized question
+text and then by question-embedding similarity.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return " ".join(_PUNCTUATION.sub(" ", text.lower()).split())
+
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class AnswerCache:
+    """TTL + LRU bounded answer cache with exact and semantic lookup
+
+    ``max_entries`` bounds the total across all collections; the least
+    recently used answer is evicted first. Entries older than ``ttl``
+    seconds are never returned.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600, similarity: float = 0.95):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        self._entries = OrderedDict()      # (collection, normalized) -> entry, in LRU order
+        self._by_collection = {}           # collection -> {normalized: entry}
+        self._matrices = {}                # collection -> (keys, stacked unit embeddings)
+        self._stats = {}                   # collection -> counters
+        self._generations = {}             # collection -> invalidation count
+        self._lock = threading.Lock()
+
+    def _counters(self, collection_name: str):
+        return self._stats.setdefault(collection_name, {"exact_hits": 0, "semantic_hits": 0, "misses": 0})
+
+    def _remove(self, collection_name: str, normalized: str):
+        self._entries.pop((collection_name, normalized), None)
+        entries = self._by_collection.get(collection_name)
+        if entries is not None:
+            entries.pop(normalized, None)
+        self._matrices.pop(collection_name, None)
+
+    def _fresh(self, entry, now: float) -> bool:
+        return now - entry["created_at"] <= self.ttl
+
+    def _semantic_match(self, collection_name: str, embedding, now: float):
+        entries = self._by_collection.get(collection_name)
+        if not entries:
+            return None, 0.0
+        cached = self._matrices.get(collection_name)
+        if cached is None:
+            keys = [key for key, entry in entries.items() if entry["embedding"] is not None]
+            if not keys:
+                return None, 0.0
+            cached = (keys, np.vstack([entries[key]["embedding"] for key in keys]))
+            self._matrices[collection_name] = cached
+        keys, matrix = cached
+        scores = matrix @ _unit(embedding)
+        for index in np.argsort(-scores):
+            score = float(scores[index])
+            if score < self.similarity:
+                break
+            entry = entries.get(keys[index])
+            if entry is not None and self._fresh(entry, now):
+                return entry, score
+        return None, 0.0
+
+    def lookup(self, collection_name: str, question: str, embed=None):
+        """Find a cached answer for ``question``
+
+        Returns ``(entry, match, embedding)``: ``match`` is ``"exact"``,
+        ``"semantic"`` or ``None``. ``embed`` is only called when there is
+        no exact match; its result is returned so ``put`` can reuse it.
+        """
+        normalized = normalize_question(question)
+        now = time.time()
+        with self._lock:
+            counters = self._counters(collection_name)
+            entry = self._entries.get((collection_name, normalized))
+            if entry is not None:
+                if self._fresh(entry, now):
+                    self._entries.move_to_end((collection_name, normalized))
+                    counters["exact_hits"] += 1
+                    return entry, "exact", None
+                self._remove(collection_name, normalized)
+            if embed is None:
+                counters["misses"] += 1
+                return None, None, None
+
+        embedding = embed(question)
+        with self._lock:
+            entry, score = self._semantic_match(collection_name, embedding, now)
+            if entry is not None:
+                self._entries.move_to_end((collection_name, entry["normalized"]))
+                counters["semantic_hits"] += 1
+                return dict(entry, similarity=score), "semantic", embedding
+            counters["misses"] += 1
+        return None, None, embedding
+
+    def generation(self, collection_name: str) -> int:
+        """Invalidation counter; pass it to ``put`` to drop answers computed before a refresh"""
+        with self._lock:
+            return self._generations.get(collection_name, 0)
+
+    def put(self, collection_name: str, question: str, answer, embedding=None, generation: int = None):
+        """Cache an answer (``embedding`` enables semantic matches against it)
+
+        If ``generation`` is given and the collection was invalidated since
+        it was read, the answer is stale and is not stored.
+        """
+        normalized = normalize_question(question)
+        entry = {
+            "question": question,
+            "normalized": normalized,
+            "answer": answer,
+            "embedding": _unit(embedding) if embedding is not None else None,
+            "created_at": time.time()
+        }
+        with self._lock:
+            if generation is not None and generation != self._generations.get(collection_name, 0):
+                return
+            self._remove(collection_name, normalized)
+            self._entries[(collection_name, normalized)] = entry
+            self._by_collection.setdefault(collection_name, {})[normalized] = entry
+            while len(self._entries) > self.max_entries:
+                (old_collection, old_normalized), _ = self._entries.popitem(last=False)
+                self._remove(old_collection, old_normalized)
+
+    def invalidate(self, collection_name: str):
+        """Drop every cached answer for a collection (e.g. after a refresh)"""
+        with self._lock:
+            self._generations[collection_name] = self._generations.get(collection_name, 0) + 1
+            for normalized in list(self._by_collection.pop(collection_name, {})):
+                self._entries.pop((collection_name, normalized), None)
+            self._matrices.pop(collection_name, None)
+
+    def stats(self, collection_name: str = None):
+        """Hit/miss counters and hit rate, overall or for one collection"""
+        with self._lock:
+            if collection_name is not None:
+                counters = dict(self._counters(collection_name))
+                counters["entries"] = len(self._by_collection.get(collection_name, {}))
+            else:
+                counters = {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
+                for collection_counters in self._stats.values():
+                    for key in counters:
+                        counters[key] += collection_counters[key]
+                counters["entries"] = len(self._entries)
+                counters["max_entries"] = self.max_entries
+        lookups = counters["exact_hits"] + counters["semantic_hits"] + counters["misses"]
+        counters["hit_rate"] = round((lookups - counters["misses"]) / lookups, 4) if lookups else 0.0
+        return counters
@@ -1,27 +1,52 @@
+import time
+_app_import_started = time.perf_counter()
+
 import os
 from fastapi import FastAPI, UploadFile, File, Query
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from starlette.requests import Request
+from starlette.concurrency import run_in_threadpool
+from collections import OrderedDict
+import hashlib
 import tempfile
+import threading
+import uuid
+import importlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pydantic import BaseModel
+from typing import List, Optional
 
 # Set environment variable to avoid tokenizers warning
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.chains import RetrievalQA
-from langchain.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI
-from langchain_groq import ChatGroq
-from langchain.tools import Tool
+# LangChain, the LLM provider SDKs and the embedding model are imported lazily
+# (or by the background warm-up) -- see "Startup & Lazy Loading" below
 from dotenv import load_dotenv
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams
-from langchain_qdrant import QdrantVectorStore
+from qdrant_client.models import (
+    Distance, VectorParams, PointStruct, ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+    SearchParams, QuantizationSearchParams, CreateAlias, CreateAliasOperation, DeleteAlias, DeleteAliasOperation
+)
 from pathlib import Path
+from ingest_jobs import JobManager, JobCancelled, QueueFullError
+from pdf_parsing import load_pdf_pages, shutdown_pool
+from embedding_cache import EmbeddingCache, CachedEmbeddings
+from answer_cache import AnswerCache
+from summaries import split_sections, build_summaries
+from sparse_index import BM25Index
+from fact_store import FactStore, extract_facts
+from metrics import MetricsRegistry, track_request, annotate, timed, timed_iter
+from persistence import (
+    COLLECTION_NAME_PATTERN, CollectionMetadataStore, export_snapshot, export_collection_points, list_snapshots,
+    read_snapshot, iter_snapshot_points
+)
+from shared_state import SharedState
+from llm_scheduler import LLMScheduler, LLMRateLimitError
+from context_packing import pack_context, join_overlapping, count_tokens
+import asyncio
 
 app = FastAPI(title="Finance Chat Application", description="AI-powered finance document analysis")
 load_dotenv()
@@ -30,115 +55,814 @@ load_dotenv()
 # 🔧 Configuration
 # ----------------------------------------
 
-EMBED_MODEL = "BAAI/bge-small-en-v1.5"
-embedder = HuggingFaceEmbeddings(model_name=EMBED_MODEL)
+# Embeddings: "huggingface" (BGE-small on PyTorch), "onnx" (the same model quantized, on ONNX Runtime via
+# FastEmbed) or "fake" (deterministic hash vectors, no model download; for offline benchmarks and CI,
+# never for real documents)
+EMBED_PROVIDER = os.getenv("EMBED_PROVIDER", "huggingface")
+EMBED_MODEL = "fake-deterministic" if EMBED_PROVIDER == "fake" else "BAAI/bge-small-en-v1.5"
+EMBED_DIM = 384  # BGE model dimension
+# Cached chunk vectors are keyed per backend, so quantized and float32 vectors are never mixed
+EMBED_CACHE_MODEL = f"{EMBED_MODEL}:onnx" if EMBED_PROVIDER == "onnx" else EMBED_MODEL
+EMBED_THREADS = int(os.getenv("EMBED_THREADS", "0"))  # intra-op CPU threads for the model, 0 = library default
+# Concurrent query embeddings are queued and embedded together in one model call
+EMBED_QUERY_BATCHING = os.getenv("EMBED_QUERY_BATCHING", "true").lower() in ("1", "true", "yes")
+EMBED_QUERY_MAX_BATCH = int(os.getenv("EMBED_QUERY_MAX_BATCH", "32"))
+EMBED_QUERY_BATCH_WAIT_MS = float(os.getenv("EMBED_QUERY_BATCH_WAIT_MS", "0"))  # extra wait for stragglers
+
+# LLM: picked from the API keys below, or LLM_PROVIDER=fake for a deterministic offline stand-in
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "")
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "0"))  # simulated time per call
+FAKE_LLM_TOKEN_LATENCY_MS = float(os.getenv("FAKE_LLM_TOKEN_LATENCY_MS", "0"))  # per streamed word
+
+# LLM scheduler: identical in-flight prompts share one call, calls are admitted against the provider's
+# <PROVIDER>_RPM / <PROVIDER>_TPM budgets (e.g. GROQ_RPM=30, GROQ_TPM=6000; 0 = unlimited, per worker
+# process) and rate limit errors (429) are retried with exponential backoff
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_BACKOFF_SECONDS = float(os.getenv("LLM_BACKOFF_SECONDS", "1.0"))  # first retry delay, doubled per attempt
+LLM_MAX_BACKOFF_SECONDS = float(os.getenv("LLM_MAX_BACKOFF_SECONDS", "30"))
+LLM_COMPLETION_TOKENS = int(os.getenv("LLM_COMPLETION_TOKENS", "256"))  # expected answer size, charged up front
+
+# Load LangChain and the embedding model in a background thread at startup
+# instead of on the first request (set to false for purely on-demand loading)
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+
+# Multi-worker serving (main.py --workers N sets this): collections and job status are shared
+# between worker processes through this directory
+SHARED_STATE_DIR = os.getenv("SHARED_STATE_DIR")
+SHARED_JOB_SYNC_SECONDS = float(os.getenv("SHARED_JOB_SYNC_SECONDS", "0.5"))  # job progress mirror interval
+SHARED_SYNC_SECONDS = float(os.getenv("SHARED_SYNC_SECONDS", "1.0"))  # poll for other workers' collections
+SHARED_JOB_STALE_SECONDS = float(os.getenv("SHARED_JOB_STALE_SECONDS", "30"))  # unreported jobs count as dead
+shared_state = SharedState(SHARED_STATE_DIR) if SHARED_STATE_DIR else None
+
+# Content-addressed chunk embedding cache (set EMBED_CACHE_MAX_ENTRIES=0 to disable)
+EMBED_CACHE_DIR = os.getenv("EMBED_CACHE_DIR", "data/embedding_cache")
+EMBED_CACHE_MAX_ENTRIES = int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "100000"))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))  # cache misses per model call
+
+# Qdrant: a Qdrant server when QDRANT_URL is set, otherwise in-memory by default or local on-disk
+# storage when QDRANT_PATH is set (the client is opened by get_qdrant_client())
+QDRANT_URL = os.getenv("QDRANT_URL")  # e.g. http://localhost:6333
+QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
+QDRANT_PATH = os.getenv("QDRANT_PATH")
+if QDRANT_PATH and shared_state is not None and not QDRANT_URL:
+    # Local on-disk storage is locked by one process; in-memory workers are replicated instead
+    raise RuntimeError("QDRANT_PATH cannot be shared by several workers: set QDRANT_URL, or unset QDRANT_PATH "
+                       "(collections are then replicated to every worker and persisted in SHARED_STATE_DIR)")
+STORAGE_TYPE = "Qdrant Server" if QDRANT_URL else "Qdrant On-Disk" if QDRANT_PATH else "Qdrant In-Memory"
+# Local mode searches float32 vectors brute-force: no HNSW graph, and quantization settings are ignored
+QDRANT_LOCAL_MODE = not QDRANT_URL
 
-# Initialize Qdrant in-memory client
-qdrant_client = QdrantClient(":memory:")
+# Collection metadata (filename, doc_count, content hashes) is persisted alongside on-disk or server
+# vectors; with SHARED_STATE_DIR the shared collection records take this role
+COLLECTION_METADATA_DIR = os.getenv("COLLECTION_METADATA_DIR", "data/collections")
+metadata_store = CollectionMetadataStore(COLLECTION_METADATA_DIR) if (QDRANT_PATH or QDRANT_URL) and shared_state is None else None
+
+# Snapshots of vectors + metadata for fast restarts without re-embedding
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "data/snapshots")
+RESTORE_SNAPSHOT = os.getenv("RESTORE_SNAPSHOT")  # snapshot name or "latest", restored at startup
 
 # Global storage for in-memory collections
 in_memory_collections = {}
 
+# Pipeline registry limits (built QA/summary pipelines kept per collection)
+PIPELINE_CACHE_SIZE = int(os.getenv("PIPELINE_CACHE_SIZE", "32"))
+PIPELINE_IDLE_TTL = float(os.getenv("PIPELINE_IDLE_TTL", "1800"))  # seconds
+
+# Answer cache: repeated and near-duplicate questions skip retrieval and the LLM (ANSWER_CACHE_SIZE=0 disables)
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1024"))  # answers kept across all collections
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))  # seconds
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))  # cosine threshold for near-duplicates
+answer_cache = AnswerCache(ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL, ANSWER_CACHE_SIMILARITY) if ANSWER_CACHE_SIZE > 0 else None
+
+# Context packing between retrieval and the LLM: overlapping chunks of a page are merged, near-duplicates
+# dropped (MMR) and the rest packed into a token budget (CONTEXT_PACKING=false passes chunks through as before)
+CONTEXT_PACKING = os.getenv("CONTEXT_PACKING", "true").lower() in ("1", "true", "yes")
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))  # estimated context tokens, 0 = no budget
+CONTEXT_MMR_LAMBDA = float(os.getenv("CONTEXT_MMR_LAMBDA", "0.7"))  # 1 = relevance only, lower favours diversity
+CONTEXT_DUPLICATE_SIMILARITY = float(os.getenv("CONTEXT_DUPLICATE_SIMILARITY", "0.9"))  # word overlap of a duplicate
+
+# Batch questions: LLM calls fan out on a shared pool, so this caps concurrent calls across all batches
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "4"))
+BATCH_MAX_QUESTIONS = int(os.getenv("BATCH_MAX_QUESTIONS", "200"))
+batch_llm_executor = ThreadPoolExecutor(max_workers=BATCH_LLM_CONCURRENCY, thread_name_prefix="batch-llm")
+
+# Cross-collection questions: one search per collection on a shared pool, merged globally by score
+MULTI_SEARCH_WORKERS = int(os.getenv("MULTI_SEARCH_WORKERS", "8"))
+MULTI_SEARCH_K = int(os.getenv("MULTI_SEARCH_K", "8"))  # chunks kept after the global merge
+MULTI_MAX_COLLECTIONS = int(os.getenv("MULTI_MAX_COLLECTIONS", "50"))
+multi_search_executor = ThreadPoolExecutor(max_workers=MULTI_SEARCH_WORKERS, thread_name_prefix="multi-search")
+
+# Hybrid retrieval: BM25 keyword hits fused with dense results by reciprocal rank fusion
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() in ("1", "true", "yes")
+HYBRID_FETCH_K = int(os.getenv("HYBRID_FETCH_K", "20"))  # candidates taken from each index before fusion
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+# Numeric facts (metric, period, value, unit, page) extracted from tables at ingest time
+FACT_EXTRACTION = os.getenv("FACT_EXTRACTION", "true").lower() in ("1", "true", "yes")
+
+# Precomputed summaries: section and document summaries are built in the background after each ingest
+SUMMARY_PRECOMPUTE = os.getenv("SUMMARY_PRECOMPUTE", "true").lower() in ("1", "true", "yes")
+SUMMARY_SECTION_CHUNKS = int(os.getenv("SUMMARY_SECTION_CHUNKS", "8"))  # average chunks per section
+SUMMARY_REDUCE_FANOUT = int(os.getenv("SUMMARY_REDUCE_FANOUT", "8"))  # summaries combined per reduce call
+summary_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summaries")
+_summary_builds = set()  # collections with a build queued but not yet started
+_summary_builds_lock = threading.Lock()
+
+# Background ingestion (PDF parse/split/embed runs off the event loop)
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+INGEST_MAX_PENDING = int(os.getenv("INGEST_MAX_PENDING", "16"))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))  # chunks per embedding batch
+job_manager = JobManager(max_workers=INGEST_WORKERS, max_pending=INGEST_MAX_PENDING)
+
+# Collection refresh: "incremental" reuses vectors of unchanged chunks, "full" re-embeds everything
+REFRESH_MODE = os.getenv("REFRESH_MODE", "incremental")
+REFRESH_MODES = ("incremental", "full")
+# Vector quantization per collection: "int8" keeps scalar-quantized vectors in RAM and the float32
+# originals on disk for rescoring (applied by a Qdrant server; local mode keeps float32 only)
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "none")
+QUANTIZATION_MODES = ("none", "int8")
+QUANTIZATION_QUANTILE = float(os.getenv("QUANTIZATION_QUANTILE", "0.99"))  # values outside are clipped
+QUANTIZATION_RESCORE = os.getenv("QUANTIZATION_RESCORE", "true").lower() in ("1", "true", "yes")
+QUANTIZATION_OVERSAMPLING = float(os.getenv("QUANTIZATION_OVERSAMPLING", "2.0"))  # candidates rescored per result
+HNSW_M = 16  # Qdrant's default graph degree, used for index memory estimates
+CHUNK_ID_NAMESPACE = uuid.UUID("6f1c1e6e-8a4b-4d4b-9a59-2f0c7c1d5e11")
+
+# Upload spooling (request bodies are copied to disk in chunks, never held whole)
+MAX_UPLOAD_MB = float(os.getenv("MAX_UPLOAD_MB", "100"))
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or tempfile.gettempdir()
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Page-parallel PDF parsing (process pool shared by all ingestion jobs)
+PDF_PARSE_WORKERS = int(os.getenv("PDF_PARSE_WORKERS", str(os.cpu_count() or 1)))
+
 # ----------------------------------------
-# 🧠 In-Memory Qdrant Functions
+# ⏱️ Startup & Lazy Loading
 # ----------------------------------------
 
-def create_or_refresh_store(collection_name: str, file_bytes: bytes, filename: str):
-    """Create or refresh Qdrant in-memory store with new document"""
+# Seconds spent per startup step ("import:<module>", "model:embedding", ...)
+startup_timings = OrderedDict()
+warmup_state = {"status": "pending", "error": None}
+
+# Heavy modules imported by the warm-up, in dependency order
+WARMUP_IMPORTS = OrderedDict([
+    ("langchain_text_splitters", "langchain.text_splitter"),
+    ("langchain_chains", "langchain.chains"),
+    ("langchain_prompts", "langchain.prompts"),
+    ("scheduled_llm", "scheduled_llm"),
+    ("langchain_qdrant", "langchain_qdrant"),
+    ("langchain_huggingface", "langchain_huggingface"),
+])
+
+_embedder = None
+_embedder_lock = threading.Lock()
+_embedding_cache = None
+_embedding_cache_lock = threading.Lock()
+_qdrant_client = None
+_qdrant_client_lock = threading.Lock()
+_worker_slot_lock = threading.Lock()
+
+# Nothing below that touches shared files runs at import: the PDF parsing pool's spawned
+# children re-import the parent's __main__ (app itself under `python app.py`), and a second
+# QdrantClient on QDRANT_PATH or a second worker slot claim would fail or leak there
+
+def record_startup(step: str, started: float):
+    """Record how long a startup step took"""
+    startup_timings[step] = round(time.perf_counter() - started, 4)
+
+def worker_slot() -> int:
+    """This worker's stable slot, claimed on first use (0 without shared state)
+
+    Slot 0 runs once-per-deployment startup work (snapshot restore, summaries).
+    """
+    if shared_state is None:
+        return 0
+    with _worker_slot_lock:
+        if shared_state.slot is None:
+            shared_state.claim_slot()
+    return shared_state.slot
+
+def get_qdrant_client() -> QdrantClient:
+    """Get the Qdrant client, opening it on first use"""
+    global _qdrant_client
+    if _qdrant_client is None:
+        with _qdrant_client_lock:
+            if _qdrant_client is None:
+                if QDRANT_URL:
+                    _qdrant_client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+                else:
+                    _qdrant_client = QdrantClient(path=QDRANT_PATH) if QDRANT_PATH else QdrantClient(":memory:")
+    return _qdrant_client
+
+def get_embedder():
+    """Get the embedding model for EMBED_PROVIDER, loading it on first use"""
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                from embedding_backends import load_embeddings, MicroBatchingEmbeddings
+
+                started = time.perf_counter()
+                embedder = load_embeddings(EMBED_PROVIDER, EMBED_MODEL, EMBED_DIM, threads=EMBED_THREADS,
+                                           batch_size=EMBED_BATCH_SIZE)
+                if EMBED_QUERY_BATCHING:
+                    embedder = MicroBatchingEmbeddings(embedder, max_batch=EMBED_QUERY_MAX_BATCH,
+                                                       max_wait=EMBED_QUERY_BATCH_WAIT_MS / 1000)
+                _embedder = embedder
+                record_startup("model:embedding", started)
+    return _embedder
+
+def get_embedding_cache():
+    """Get the chunk embedding cache, opening it on first use (None when disabled)
+
+    Opening maps ``vectors.npy`` (about 150 MB at the default size) and scans
+    every key slot, so it happens in the warm-up or first ingest, not at import.
+    """
+    global _embedding_cache
+    if _embedding_cache is None and EMBED_CACHE_MAX_ENTRIES > 0:
+        with _embedding_cache_lock:
+            if _embedding_cache is None:
+                started = time.perf_counter()
+                cache_dir = EMBED_CACHE_DIR
+                if worker_slot():
+                    # The memmap cache has a single writer: other workers keep their own next to it
+                    cache_dir = os.path.join(EMBED_CACHE_DIR, f"worker-{worker_slot()}")
+                _embedding_cache = EmbeddingCache(cache_dir, EMBED_DIM, EMBED_CACHE_MAX_ENTRIES)
+                record_startup("cache:embeddings", started)
+    return _embedding_cache
+
+def make_vector_store(collection_name: str, embedding=None):
+    """Create a QdrantVectorStore for a collection (or alias)"""
+    from langchain_qdrant import QdrantVectorStore
+
+    return QdrantVectorStore(
+        client=get_qdrant_client(),
+        collection_name=collection_name,
+        embedding=embedding or get_embedder()
+    )
+
+def llm_provider_module():
+    """Module of the configured LLM provider, so warm-up only imports the one in use"""
+    if LLM_PROVIDER == "fake":
+        return "fake_llm"
+    if os.getenv("GROQ_API_KEY"):
+        return "langchain_groq"
+    if os.getenv("OPENAI_API_KEY"):
+        return "langchain_openai"
+    return None
+
+def warm_up():
+    """Import heavy dependencies and load the embedding model, recording each step"""
+    warmup_state["status"] = "warming"
+    started = time.perf_counter()
     try:
-        # Save bytes to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            tmp_file.write(file_bytes)
-            tmp_file_path = tmp_file.name
-
-        # Load document using PyPDFLoader (more reliable)
-        loader = PyPDFLoader(tmp_file_path)
-        docs = loader.load()
-        
-        # Clean up temp file
-        os.unlink(tmp_file_path)
-        
-        # Split documents
-        chunks = RecursiveCharacterTextSplitter(
-            chunk_size=800, 
-            chunk_overlap=200
-        ).split_documents(docs)
+        imports = [(label, module) for label, module in WARMUP_IMPORTS.items()
+                   if not (EMBED_PROVIDER != "huggingface" and label == "langchain_huggingface")]
+        provider = llm_provider_module()
+        if provider:
+            imports.append((provider, provider))
+        for label, module in imports:
+            step_started = time.perf_counter()
+            importlib.import_module(module)
+            record_startup(f"import:{label}", step_started)
+        get_embedder()
+        get_embedding_cache()
+        step_started = time.perf_counter()
+        get_embedder().embed_query("warm up")  # first inference pays one-off kernel setup
+        record_startup("model:first_inference", step_started)
+        warmup_state["status"] = "ready"
+    except Exception as e:
+        warmup_state["status"] = "failed"
+        warmup_state["error"] = str(e)
+    record_startup("warmup_total", started)
 
-        # Delete collection if it exists
-        try:
-            qdrant_client.delete_collection(collection_name=collection_name)
-        except:
-            pass  # Collection doesn't exist, which is fine
-
-        # Create collection with proper vector configuration
-        qdrant_client.create_collection(
-            collection_name=collection_name,
-            vectors_config=VectorParams(size=384, distance=Distance.COSINE)  # BGE model dimension
+def startup_report():
+    """Startup timings broken down by import and model load"""
+    return {
+        "warmup": dict(warmup_state),
+        "model_loaded": _embedder is not None,
+        "timings": dict(startup_timings)
+    }
+
+# ----------------------------------------
+# 📈 Metrics
+# ----------------------------------------
+
+# Served on /metrics in the Prometheus text format; stage timings also feed ?timings=true on /fin_chat
+metrics = MetricsRegistry()
+STAGE_SECONDS = metrics.histogram(
+    "finchat_stage_seconds", "Time spent per pipeline stage (ingest stages are per page/batch)", ["stage", "route"]
+)
+REQUEST_SECONDS = metrics.histogram("finchat_request_seconds", "End-to-end request latency", ["endpoint", "route"])
+REQUESTS_TOTAL = metrics.counter("finchat_requests_total", "Requests by endpoint, route and status",
+                                 ["endpoint", "route", "status"])
+ERRORS_TOTAL = metrics.counter("finchat_errors_total", "Errors caught in a pipeline stage", ["stage"])
+INGESTED_TOTAL = metrics.counter("finchat_ingested_total", "Pages parsed and chunks embedded or reused", ["kind"])
+PROMPT_TOKENS_TOTAL = metrics.counter("finchat_prompt_tokens_total",
+                                     "Estimated LLM prompt tokens with and without context packing", ["route", "packing"])
+LLM_WAIT_SECONDS = metrics.histogram("finchat_llm_wait_seconds", "Time LLM calls waited for the rate budget")
+LLM_EVENTS_TOTAL = metrics.counter("finchat_llm_events_total",
+                                   "LLM scheduler calls, coalesced prompts, retries, rate limits and failures", ["event"])
+LLM_QUEUE = metrics.gauge("finchat_llm_queue", "LLM calls waiting for the rate budget, running, and in-flight prompts",
+                          ["state"])
+
+def record_request(endpoint: str, route: str, status: str, started: float):
+    """Count a finished request and observe its total latency"""
+    REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, route=route)
+    REQUESTS_TOTAL.inc(endpoint=endpoint, route=route, status=status)
+
+# ----------------------------------------
+# 🧠 In-Memory Qdrant Functions
+# ----------------------------------------
+
+def iter_chunks(pages, job=None, on_page=None):
+    """Split pages into chunks as they arrive, so only a few pages are held at once
+
+    ``on_page(page)`` is called for every page before it is split.
+    """
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=800, 
+        chunk_overlap=200
+    )
+    for page in pages:
+        if on_page:
+            on_page(page)
+        with timed(STAGE_SECONDS, "split", route="ingest"):
+            chunks = splitter.split_documents([page])
+        INGESTED_TOTAL.inc(kind="pages")
+        if job:
+            job.advance("pages_parsed")
+            job.advance("chunks_total", len(chunks))
+        yield from chunks
+
+def iter_batches(items, batch_size: int):
+    """Group an iterable into lists of at most ``batch_size`` items"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def chunk_content_hash(text: str) -> str:
+    """Content hash used to match chunks across refreshes"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def chunk_point_id(content_hash: str, occurrence: int) -> str:
+    """Deterministic point id for the n-th chunk with a given content hash"""
+    return str(uuid.uuid5(CHUNK_ID_NAMESPACE, f"{content_hash}:{occurrence}"))
+
+def resolve_physical_collection(collection_name: str):
+    """Return the physical collection behind ``collection_name`` (an alias), if any"""
+    for alias in get_qdrant_client().get_aliases().aliases:
+        if alias.alias_name == collection_name:
+            return alias.collection_name
+    if get_qdrant_client().collection_exists(collection_name):
+        return collection_name  # collection created before aliases were used
+    return None
+
+def point_ids_from_hashes(content_hashes) -> set:
+    """Point ids for an ordered list of chunk content hashes"""
+    occurrences = {}
+    point_ids = set()
+    for content_hash in content_hashes:
+        occurrence = occurrences.get(content_hash, 0)
+        occurrences[content_hash] = occurrence + 1
+        point_ids.add(chunk_point_id(content_hash, occurrence))
+    return point_ids
+
+def stored_point_ids(physical_name: str) -> set:
+    """All point ids in a physical collection (no payloads or vectors)"""
+    point_ids = set()
+    offset = None
+    while True:
+        points, offset = get_qdrant_client().scroll(
+            collection_name=physical_name, limit=1024, offset=offset,
+            with_payload=False, with_vectors=False
         )
+        point_ids.update(str(point.id) for point in points)
+        if offset is None:
+            return point_ids
 
-        # Create Qdrant vectorstore using the new langchain_qdrant package
-        store = QdrantVectorStore(
-            client=qdrant_client,
-            collection_name=collection_name,
-            embedding=embedder
+def copy_kept_chunks(store, old_physical: str, point_ids, chunks):
+    """Copy vectors of unchanged chunks into the new collection, refreshing their payload"""
+    records = get_qdrant_client().retrieve(
+        collection_name=old_physical, ids=point_ids, with_payload=False, with_vectors=True
+    )
+    vectors = {str(record.id): record.vector for record in records}
+    get_qdrant_client().upsert(
+        collection_name=store.collection_name,
+        points=[
+            PointStruct(id=point_id, vector=vectors[point_id], payload={
+                store.content_payload_key: chunk.page_content,
+                store.metadata_payload_key: chunk.metadata
+            })
+            for point_id, chunk in zip(point_ids, chunks)
+        ]
+    )
+
+def collection_vectors_config(quantization: str):
+    """Vector params and quantization config for a new physical collection"""
+    if quantization == "int8":
+        return (
+            VectorParams(size=EMBED_DIM, distance=Distance.COSINE, on_disk=True),
+            ScalarQuantization(scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8, quantile=QUANTIZATION_QUANTILE, always_ram=True
+            ))
         )
-        
-        # Add documents to the store
-        store.add_documents(chunks)
+    return VectorParams(size=EMBED_DIM, distance=Distance.COSINE), None
+
+def search_params(collection_name: str):
+    """Rescoring params for collections Qdrant actually quantized (None otherwise)"""
+    quantization = (in_memory_collections.get(collection_name) or {}).get("quantization") or {}
+    if not quantization.get("applied"):
+        return None
+    return SearchParams(quantization=QuantizationSearchParams(
+        rescore=QUANTIZATION_RESCORE, oversampling=QUANTIZATION_OVERSAMPLING
+    ))
+
+def retriever_kwargs(collection_name: str, k: int):
+    """``search_kwargs`` for a retriever over a collection"""
+    return {"k": k, "search_params": search_params(collection_name)}
+
+def swap_collection_alias(collection_name: str, new_physical: str, old_physical: str = None):
+    """Atomically point ``collection_name`` at ``new_physical``"""
+    operations = []
+    if old_physical == collection_name:
+        # Legacy collection occupies the alias name and must go first
+        get_qdrant_client().delete_collection(collection_name=collection_name)
+    elif old_physical is not None:
+        operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=collection_name)))
+    operations.append(CreateAliasOperation(create_alias=CreateAlias(
+        collection_name=new_physical, alias_name=collection_name
+    )))
+    get_qdrant_client().update_collection_aliases(change_aliases_operations=operations)
+
+def create_or_refresh_store_from_file(collection_name: str, file_path: str, filename: str, job=None,
+                                      mode: str = None, quantization: str = None):
+    """Create or refresh Qdrant in-memory store from a PDF on disk
+
+    Pages stream through parse -> split -> embed in batches, so peak memory
+    is bounded by a few pages rather than the file size. When run as an
+    ingestion job, progress is reported on ``job`` and cancellation is
+    honoured between embedding batches.
+
+    Each version of a collection is built in its own physical collection
+    and published by swapping the ``collection_name`` alias, so readers keep
+    querying the previous version until the new one is complete. In
+    ``incremental`` mode, chunks whose content hash already exists are
+    copied over with their stored vectors and only new chunks are embedded;
+    ``full`` mode re-embeds everything.
+
+    ``quantization`` ("none" or "int8") defaults to the collection's
+    current setting, then ``VECTOR_QUANTIZATION``.
+    """
+    mode = mode or REFRESH_MODE
+    previous_entry = in_memory_collections.get(collection_name) or {}
+    quantization = quantization or (previous_entry.get("quantization") or {}).get("type") or VECTOR_QUANTIZATION
+    try:
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization '{quantization}'. Use one of {list(QUANTIZATION_MODES)}")
+        embedding_cache = get_embedding_cache()
+
+        # Load document pages (PyPDFLoader-compatible), page ranges parsed in parallel
+        if job:
+            job.update(stage="parsing")
+        ingest_started = time.perf_counter()
+        pages = timed_iter(STAGE_SECONDS, "parse", load_pdf_pages(file_path, workers=PDF_PARSE_WORKERS), route="ingest")
+
+        # Table facts are pulled from whole pages, before splitting cuts tables apart
+        facts = []
+        def collect_facts(page):
+            facts.extend(extract_facts(page.page_content, page.metadata.get("page")))
+
+        batches = iter_batches(iter_chunks(pages, job=job, on_page=collect_facts if FACT_EXTRACTION else None),
+                               INGEST_BATCH_SIZE)
+
+        old_physical = resolve_physical_collection(collection_name)
+        old_ids = set()
+        if old_physical and mode == "incremental":
+            previous = in_memory_collections.get(collection_name) or {}
+            if previous.get("physical_collection") == old_physical and "content_hashes" in previous:
+                old_ids = point_ids_from_hashes(previous["content_hashes"])
+            else:
+                old_ids = stored_point_ids(old_physical)
+
+        # Build the new version next to the live one
+        new_physical = f"{collection_name}__{uuid.uuid4().hex[:8]}"
+        vectors_config, quantization_config = collection_vectors_config(quantization)
+        get_qdrant_client().create_collection(
+            collection_name=new_physical,
+            vectors_config=vectors_config,
+            quantization_config=quantization_config
+        )
+        # From here on, any failure (including loading the embedding model) drops the new collection
+        try:
+            applied = get_qdrant_client().get_collection(new_physical).config.quantization_config is not None
+
+            # Chunks already embedded by an earlier upload are served from the cache
+            if embedding_cache is not None:
+                ingest_embedder = CachedEmbeddings(get_embedder(), embedding_cache, EMBED_CACHE_MODEL,
+                                                   batch_size=EMBED_BATCH_SIZE)
+            else:
+                ingest_embedder = get_embedder()
+
+            # Create Qdrant vectorstore using the new langchain_qdrant package
+            build_store = make_vector_store(new_physical, embedding=ingest_embedder)
+            if embedding_cache is not None:
+                ingest_embedder.reset_stats()  # don't count the store's dimension probe
+
+            # Add documents batch by batch as pages are parsed and split
+            refresh = {"mode": mode, "added": 0, "removed": 0, "kept": 0}
+            seen_ids = set()
+            content_hashes = []
+            occurrences = {}
+            for batch in batches:
+                if job:
+                    job.update(stage="embedding")
+                added_ids, added_chunks, kept_ids, kept_chunks = [], [], [], []
+                for chunk in batch:
+                    content_hash = chunk_content_hash(chunk.page_content)
+                    occurrence = occurrences.get(content_hash, 0)
+                    occurrences[content_hash] = occurrence + 1
+                    point_id = chunk_point_id(content_hash, occurrence)
+                    chunk.metadata["content_hash"] = content_hash
+                    content_hashes.append(content_hash)
+                    seen_ids.add(point_id)
+                    if point_id in old_ids:
+                        kept_ids.append(point_id)
+                        kept_chunks.append(chunk)
+                    else:
+                        added_ids.append(point_id)
+                        added_chunks.append(chunk)
+
+                if kept_ids:
+                    with timed(STAGE_SECONDS, "copy", route="ingest"):
+                        copy_kept_chunks(build_store, old_physical, kept_ids, kept_chunks)
+                if added_ids:
+                    # Embedding and upsert are timed separately, so no add_documents here
+                    with timed(STAGE_SECONDS, "embed", route="ingest"):
+                        vectors = ingest_embedder.embed_documents([chunk.page_content for chunk in added_chunks])
+                    with timed(STAGE_SECONDS, "upsert", route="ingest"):
+                        get_qdrant_client().upsert(collection_name=new_physical, points=[
+                            PointStruct(id=point_id, vector=vector, payload={
+                                build_store.content_payload_key: chunk.page_content,
+                                build_store.metadata_payload_key: chunk.metadata
+                            })
+                            for point_id, vector, chunk in zip(added_ids, vectors, added_chunks)
+                        ])
+                INGESTED_TOTAL.inc(len(added_ids), kind="chunks_embedded")
+                INGESTED_TOTAL.inc(len(kept_ids), kind="chunks_reused")
+                refresh["kept"] += len(kept_ids)
+                refresh["added"] += len(added_ids)
+                if job:
+                    job.advance("chunks_embedded", len(added_ids))
+                    job.advance("chunks_reused", len(kept_ids))
+                    job.raise_if_cancelled()
+            if mode == "incremental":
+                refresh["removed"] = len(old_ids - seen_ids)
+            elif old_physical:
+                refresh["removed"] = get_qdrant_client().count(collection_name=old_physical).count
+
+            # The keyword index is built from exactly the points being published
+            sparse_index = None
+            if HYBRID_SEARCH:
+                if job:
+                    job.update(stage="indexing")
+                with timed(STAGE_SECONDS, "index", route="ingest"):
+                    sparse_index = build_sparse_index(new_physical)
+
+            # Publish the new version in one step
+            swap_collection_alias(collection_name, new_physical, old_physical)
+        except BaseException:
+            # Don't leave a half-built collection behind; the live version is untouched
+            batches.close()
+            get_qdrant_client().delete_collection(collection_name=new_physical)
+            raise
+        finally:
+            if embedding_cache is not None:
+                embedding_cache.flush()
+
+        if old_physical and old_physical != collection_name:
+            get_qdrant_client().delete_collection(collection_name=old_physical)
+
+        # Queries go through the alias with the plain embedder
+        store = make_vector_store(collection_name)
         
         # Store reference for later access
+        previous_summaries = (in_memory_collections.get(collection_name) or {}).get("summaries")
         in_memory_collections[collection_name] = {
             "store": store,
-            "doc_count": len(chunks),
-            "filename": filename
+            "doc_count": len(seen_ids),
+            "filename": filename,
+            "refresh": refresh,
+            "physical_collection": new_physical,
+            "content_hashes": content_hashes,
+            "sparse_index": sparse_index,
+            "quantization": {"type": quantization, "applied": applied}
         }
+        if FACT_EXTRACTION:
+            in_memory_collections[collection_name]["fact_store"] = FactStore(facts)
+        if previous_summaries:
+            # Kept so unchanged sections are not re-summarized
+            in_memory_collections[collection_name]["summaries"] = {**previous_summaries, "status": "stale"}
+        if embedding_cache is not None:
+            in_memory_collections[collection_name]["embedding_cache"] = ingest_embedder.stats()
+        save_collection_metadata(collection_name)
+
+        # Pipelines and answers built against the old collection are now stale
+        invalidate_collection_caches(collection_name)
+        schedule_summaries(collection_name)
+        STAGE_SECONDS.observe(time.perf_counter() - ingest_started, stage="total", route="ingest")
         
         return store
         
+    except JobCancelled:
+        raise
     except Exception as e:
         raise Exception(f"Failed to create/refresh store: {str(e)}")
 
+def create_or_refresh_store(collection_name: str, file_bytes: bytes, filename: str, job=None, mode: str = None,
+                            quantization: str = None):
+    """Create or refresh Qdrant in-memory store with new document bytes"""
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
+        tmp_file.write(file_bytes)
+        tmp_file_path = tmp_file.name
+    try:
+        return create_or_refresh_store_from_file(collection_name, tmp_file_path, filename, job=job, mode=mode,
+                                                 quantization=quantization)
+    finally:
+        os.unlink(tmp_file_path)
+
+def ingest_pdf(collection_name: str, file_path: str, filename: str, job=None, mode: str = None,
+               quantization: str = None):
+    """Ingestion job body: build the collection and return a result summary"""
+    create_or_refresh_store_from_file(collection_name, file_path, filename, job=job, mode=mode,
+                                      quantization=quantization)
+    return {
+        "collection_name": collection_name,
+        "filename": filename,
+        "doc_count": in_memory_collections[collection_name]["doc_count"],
+        "refresh": in_memory_collections[collection_name]["refresh"],
+        "quantization": in_memory_collections[collection_name]["quantization"]
+    }
+
+def build_sparse_index(physical_name: str) -> BM25Index:
+    """BM25 index over every chunk stored in a (physical) collection"""
+    def documents():
+        offset = None
+        while True:
+            points, offset = get_qdrant_client().scroll(collection_name=physical_name, limit=256, offset=offset,
+                                                  with_payload=True, with_vectors=False)
+            for point in points:
+                yield str(point.id), point.payload.get("page_content", "")
+            if offset is None:
+                return
+
+    return BM25Index(documents())
+
+_sparse_index_lock = threading.Lock()
+
+def get_sparse_index(collection_name: str):
+    """The collection's BM25 index, rebuilt from Qdrant if missing (e.g. after a restart or restore)"""
+    entry = in_memory_collections.get(collection_name)
+    if entry is None or not HYBRID_SEARCH:
+        return None
+    if entry.get("sparse_index") is None:
+        with _sparse_index_lock:
+            if entry.get("sparse_index") is None:
+                physical = entry.get("physical_collection") or resolve_physical_collection(collection_name)
+                if physical is None:
+                    return None
+                entry["sparse_index"] = build_sparse_index(physical)
+    return entry["sparse_index"]
+
+def remove_file(file_path: str):
+    """Delete a spooled upload, ignoring files that are already gone"""
+    try:
+        os.unlink(file_path)
+    except FileNotFoundError:
+        pass
+
 def load_qdrant_store(collection_name: str):
     """Load existing Qdrant in-memory collection"""
     try:
-        if collection_name not in in_memory_collections:
-            # Check if collection exists in client
-            collections = [c.name for c in qdrant_client.get_collections().collections]
-            if collection_name not in collections:
+        entry = in_memory_collections.get(collection_name)
+        if entry is not None and entry.get("store") is None:
+            # Restored from disk or a snapshot: build the store on first use
+            entry["store"] = make_vector_store(collection_name)
+        elif entry is None:
+            # Check if collection (or alias) exists in client
+            if not get_qdrant_client().collection_exists(collection_name):
                 raise ValueError(f"Collection '{collection_name}' not found. Available collections: {list(in_memory_collections.keys())}")
             
             # Recreate store reference if it exists in client but not in our dict
-            store = QdrantVectorStore(
-                client=qdrant_client,
-                collection_name=collection_name,
-                embedding=embedder
-            )
+            store = make_vector_store(collection_name)
             in_memory_collections[collection_name] = {"store": store}
         
         return in_memory_collections[collection_name]["store"]
     except Exception as e:
         raise Exception(f"Failed to load in-memory collection: {str(e)}")
 
+def payload_bytes(physical_name: str) -> int:
+    """Total JSON size of the payloads (chunk text + metadata) stored in a collection"""
+    total, offset = 0, None
+    while True:
+        points, offset = get_qdrant_client().scroll(collection_name=physical_name, limit=256, offset=offset,
+                                              with_payload=True, with_vectors=False)
+        total += sum(len(json.dumps(point.payload)) for point in points)
+        if offset is None:
+            return total
+
+def collection_memory(collection_name: str, points: int):
+    """Estimated RAM per component of a collection, in bytes
+
+    Vectors are ``points x EMBED_DIM`` float32, or int8 codes plus a float32
+    correction per vector when Qdrant applied int8 quantization (the float32
+    originals then live on disk). The HNSW graph is estimated at
+    ``2 * HNSW_M`` int32 links per point; local mode has no graph. Payload
+    size is measured once per collection version.
+    """
+    entry = in_memory_collections[collection_name]
+    quantization = entry.get("quantization") or {"type": "none", "applied": False}
+    if entry.get("payload_bytes") is None:
+        physical = entry.get("physical_collection") or resolve_physical_collection(collection_name) or collection_name
+        entry["payload_bytes"] = payload_bytes(physical)
+
+    float32_bytes = points * EMBED_DIM * 4
+    memory = {
+        "quantization": quantization["type"],
+        "quantization_applied": quantization["applied"],
+        "vectors_bytes": points * (EMBED_DIM + 4) if quantization["applied"] else float32_bytes,
+        "vectors_on_disk_bytes": float32_bytes if quantization["applied"] else 0,
+        "payload_bytes": entry["payload_bytes"],
+        "index_bytes": 0 if QDRANT_LOCAL_MODE else points * 2 * HNSW_M * 4,
+        "sparse_index_bytes": entry["sparse_index"].nbytes if entry.get("sparse_index") is not None else 0,
+        "facts_bytes": entry["fact_store"].nbytes if entry.get("fact_store") is not None else 0
+    }
+    memory["total_bytes"] = sum(value for key, value in memory.items()
+                                if key.endswith("_bytes") and key != "vectors_on_disk_bytes")
+    return memory
+
 def list_collections():
     """List all available in-memory collections"""
     return list(in_memory_collections.keys())
 
 def get_collection_info(collection_name: str):
     """Get information about a specific collection"""
+    active = active_job_record(collection_name)
+    if active is not None and collection_name not in in_memory_collections:
+        return {
+            "collection_name": collection_name,
+            "vectors_count": 0,
+            "doc_count": active["progress"]["chunks_total"],
+            "filename": active["filename"],
+            "status": "ingesting",
+            "job_id": active["job_id"],
+            "progress": active["progress"]
+        }
+
     if collection_name not in in_memory_collections:
         return None
     
     collection_data = in_memory_collections[collection_name]
     try:
         # Get collection info from Qdrant client
-        collection_info = qdrant_client.get_collection(collection_name)
-        return {
+        collection_info = get_qdrant_client().get_collection(collection_name)
+        info = {
             "collection_name": collection_name,
-            "vectors_count": collection_info.vectors_count,
+            # vectors_count was removed in newer qdrant-client releases
+            "vectors_count": getattr(collection_info, "vectors_count", None) or collection_info.points_count,
             "doc_count": collection_data.get("doc_count", 0),
             "filename": collection_data.get("filename", "unknown"),
             "status": "ready"
         }
+        info["memory"] = collection_memory(collection_name, collection_info.points_count or 0)
+        if "embedding_cache" in collection_data:
+            info["embedding_cache"] = collection_data["embedding_cache"]
+        if "refresh" in collection_data:
+            info["last_refresh"] = collection_data["refresh"]
+        if collection_data.get("fact_store") is not None:
+            fact_store = collection_data["fact_store"]
+            info["facts"] = {"count": len(fact_store), "metrics": len(set(fact_store.metrics())),
+                             "periods": fact_store.periods(), "bytes": fact_store.nbytes}
+        if collection_data.get("sparse_index") is not None:
+            info["sparse_index"] = {
+                "documents": len(collection_data["sparse_index"]),
+                "terms": collection_data["sparse_index"].vocabulary_size
+            }
+        if "summaries" in collection_data:
+            summaries = collection_data["summaries"]
+            info["summaries"] = {key: summaries.get(key) for key in ("status", "regenerated", "reused", "updated_at", "error")}
+            info["summaries"]["sections"] = len(summaries.get("sections") or [])
+        if answer_cache is not None:
+            info["answer_cache"] = answer_cache.stats(collection_name)
+        if active is not None:
+            info["refresh_job_id"] = active["job_id"]
+        return info
     except:
         return {
             "collection_name": collection_name,
@@ -148,96 +872,1120 @@ def get_collection_info(collection_name: str):
             "status": "error"
         }
 
+# ----------------------------------------
+# 💾 Persistence & Snapshots
+# ----------------------------------------
+
+PERSISTED_METADATA_KEYS = ("filename", "doc_count", "refresh", "embedding_cache", "physical_collection", "content_hashes",
+                           "summaries", "quantization")
+
+def collection_metadata(collection_name: str):
+    """Persistable metadata for a collection (everything except the store object)"""
+    entry = in_memory_collections.get(collection_name) or {}
+    metadata = {key: entry[key] for key in PERSISTED_METADATA_KEYS if key in entry}
+    summaries = metadata.get("summaries") or {}
+    if summaries.get("status") in ("pending", "running"):
+        # A build in flight is not persisted; whoever loads this schedules its own and reuses the sections
+        metadata["summaries"] = {**summaries, "status": "stale"}
+    if entry.get("fact_store") is not None:
+        metadata["facts"] = entry["fact_store"].to_dict()
+    return metadata
+
+def collection_entry(metadata: dict):
+    """Rebuild a collection entry from persisted metadata (the store is loaded lazily)"""
+    entry = {"store": None, **metadata}
+    facts = entry.pop("facts", None)
+    if facts is not None:
+        entry["fact_store"] = FactStore.from_dict(facts)
+    return entry
+
+def save_collection_metadata(collection_name: str):
+    """Write collection metadata to disk (on-disk or server storage) and publish it to other workers"""
+    if metadata_store is not None:
+        metadata_store.save(collection_name, collection_metadata(collection_name))
+    if shared_state is not None:
+        publish_collection(collection_name)
+
+def restore_collections_from_storage():
+    """Re-register collections persisted by Qdrant's on-disk mode (no re-embedding)"""
+    if metadata_store is None:
+        return 0
+    restored = 0
+    for collection_name, metadata in metadata_store.load_all().items():
+        if get_qdrant_client().collection_exists(collection_name):
+            in_memory_collections[collection_name] = collection_entry(metadata)
+            restored += 1
+    return restored
+
+def create_snapshot(name: str = None):
+    """Snapshot every ready collection's vectors, payloads and metadata"""
+    collections = {}
+    for collection_name in list(in_memory_collections):
+        physical = resolve_physical_collection(collection_name)
+        if physical is not None:
+            collections[collection_name] = {
+                "physical": physical,
+                "metadata": collection_metadata(collection_name)
+            }
+    return export_snapshot(get_qdrant_client(), collections, SNAPSHOT_DIR, EMBED_MODEL, name=name)
+
+def import_collection(collection_name: str, source_path: Path, metadata: dict):
+    """Load exported points into a new physical collection and swap it in atomically
+
+    Returns the rebuilt collection entry and the number of points loaded.
+    """
+    quantization = (metadata.get("quantization") or {}).get("type") or VECTOR_QUANTIZATION
+    new_physical = f"{collection_name}__{uuid.uuid4().hex[:8]}"
+    vectors_config, quantization_config = collection_vectors_config(quantization)
+    get_qdrant_client().create_collection(
+        collection_name=new_physical,
+        vectors_config=vectors_config,
+        quantization_config=quantization_config
+    )
+    points = 0
+    try:
+        for batch in iter_snapshot_points(source_path, collection_name):
+            get_qdrant_client().upsert(collection_name=new_physical, points=batch)
+            points += len(batch)
+        old_physical = resolve_physical_collection(collection_name)
+        swap_collection_alias(collection_name, new_physical, old_physical)
+    except BaseException:
+        get_qdrant_client().delete_collection(collection_name=new_physical)
+        raise
+    if old_physical and old_physical != collection_name:
+        get_qdrant_client().delete_collection(collection_name=old_physical)
+
+    entry = {
+        **collection_entry(metadata),
+        "physical_collection": new_physical,
+        "quantization": {
+            "type": quantization,
+            "applied": get_qdrant_client().get_collection(new_physical).config.quantization_config is not None
+        }
+    }
+    return entry, points
+
+def restore_snapshot(name: str = "latest"):
+    """Load collections from a snapshot, swapping each in atomically without re-embedding"""
+    snapshot_path, manifest = read_snapshot(SNAPSHOT_DIR, name)
+    if manifest.get("embed_model") != EMBED_MODEL:
+        raise ValueError(f"Snapshot was built with {manifest.get('embed_model')}, but the app uses {EMBED_MODEL}")
+
+    restored, skipped, points = [], [], 0
+    for collection_name, entry in manifest["collections"].items():
+        if job_manager.active_job(collection_name) is not None:
+            skipped.append(collection_name)  # don't race a running ingestion
+            continue
+        in_memory_collections[collection_name], count = import_collection(
+            collection_name, snapshot_path, entry.get("metadata", {})
+        )
+        points += count
+        invalidate_collection_caches(collection_name)
+        save_collection_metadata(collection_name)
+        if (in_memory_collections[collection_name].get("summaries") or {}).get("status") != "ready":
+            schedule_summaries(collection_name)
+        restored.append(collection_name)
+
+    return {
+        "snapshot": snapshot_path.name,
+        "restored": restored,
+        "skipped": skipped,
+        "points": points
+    }
+
+# ----------------------------------------
+# 🧩 Multi-Worker Shared State
+# ----------------------------------------
+
+# Shared generation this worker last synced, and the record generation/export loaded per collection
+_shared_synced = {"generation": None, "collections": {}}
+_shared_sync_lock = threading.Lock()
+_shared_sync_wakeup = threading.Event()
+
+def publish_collection(collection_name: str):
+    """Publish this worker's current version of a collection to the other workers
+
+    With a Qdrant server the vectors are already shared and only metadata is
+    published. Local-mode workers can't see each other's Qdrant, so the
+    points are exported next to the record (once per physical version).
+    """
+    export = None
+    if QDRANT_LOCAL_MODE:
+        export = (in_memory_collections.get(collection_name) or {}).get("physical_collection") \
+            or resolve_physical_collection(collection_name)
+        shared_state.write_export(collection_name, export, lambda directory: export_collection_points(
+            get_qdrant_client(), export, directory, collection_name
+        ))
+    generation = shared_state.publish(collection_name, collection_metadata(collection_name), export=export)
+    with _shared_sync_lock:
+        _shared_synced["collections"][collection_name] = {"generation": generation, "export": export}
+
+def load_shared_collection(collection_name: str, record: dict):
+    """Replace the local entry for a collection with a version another worker published"""
+    metadata = record["metadata"]
+    previous = in_memory_collections.get(collection_name) or {}
+    loaded = _shared_synced["collections"].get(collection_name) or {}
+    if not QDRANT_LOCAL_MODE:
+        entry = collection_entry(metadata)
+        same_points = bool(previous) and previous.get("physical_collection") == metadata.get("physical_collection")
+    else:
+        same_points = bool(previous) and loaded.get("export") == record["export"]
+        if same_points:
+            # e.g. summaries finished: keep the local copy of the points
+            entry = {**collection_entry(metadata), "physical_collection": previous.get("physical_collection"),
+                     "quantization": previous.get("quantization")}
+        else:
+            entry, _ = import_collection(collection_name, shared_state.export_path(collection_name, record["export"]),
+                                         metadata)
+    if same_points:
+        entry["store"] = previous.get("store")
+        entry["sparse_index"] = previous.get("sparse_index")
+    in_memory_collections[collection_name] = entry
+    if not same_points:
+        invalidate_collection_caches(collection_name)
+
+def sync_shared_collections():
+    """Load every collection published by another worker since the last sync"""
+    generation = shared_state.generation()
+    with _shared_sync_lock:
+        if generation == _shared_synced["generation"]:
+            return
+        for collection_name, record in shared_state.collections().items():
+            loaded = _shared_synced["collections"].get(collection_name) or {}
+            if loaded.get("generation", 0) >= record["generation"]:
+                continue
+            try:
+                load_shared_collection(collection_name, record)
+            except Exception as e:
+                # Retried when the collection is published again
+                ERRORS_TOTAL.inc(stage="shared_sync")
+                print(f"⚠️  Could not load shared collection '{collection_name}': {str(e)}")
+            _shared_synced["collections"][collection_name] = {"generation": record["generation"],
+                                                              "export": record["export"]}
+        _shared_synced["generation"] = generation
+
+def shared_sync_loop():
+    """Load collections published by other workers, off the request path"""
+    while True:
+        # Polls every SHARED_SYNC_SECONDS; the middleware wakes it as soon as a request sees a new generation
+        _shared_sync_wakeup.wait(SHARED_SYNC_SECONDS)
+        _shared_sync_wakeup.clear()
+        try:
+            sync_shared_collections()
+        except Exception as e:
+            ERRORS_TOTAL.inc(stage="shared_sync")
+            print(f"⚠️  Shared state sync error: {str(e)}")
+
+def shared_collection_pending(collection_name: str) -> bool:
+    """True if another worker published a version of the collection this worker hasn't loaded yet"""
+    record = shared_state.collection(collection_name)
+    if record is None:
+        return False
+    loaded = _shared_synced["collections"].get(collection_name) or {}
+    return loaded.get("generation", 0) < record["generation"]
+
+@app.middleware("http")
+async def sync_shared_state(request: Request, call_next):
+    """Wake the background sync when another worker published something (one small file read)
+
+    Requests never wait for the import: a collection this worker hasn't
+    loaded yet answers 409 ``not_ready`` (see ``not_ready_response``), and
+    live collections keep serving their current version until it's swapped.
+    """
+    if shared_state is not None and shared_state.generation() != _shared_synced["generation"]:
+        _shared_sync_wakeup.set()
+    return await call_next(request)
+
+def mirror_job(job):
+    """Write a job's state where every worker can read it (``job_manager`` listener)"""
+    shared_state.save_job(job.to_dict())
+
+def shared_job_loop():
+    """Heartbeat progress of this worker's jobs, apply cancellations sent to other workers, drop forgotten records"""
+    mirrored = set()
+    while True:
+        time.sleep(SHARED_JOB_SYNC_SECONDS)
+        try:
+            jobs = job_manager.list()
+            for job in jobs:
+                if job.is_active:
+                    if shared_state.take_cancel_request(job.job_id):
+                        job_manager.cancel(job.job_id)
+                    mirror_job(job)
+            known = {job.job_id for job in jobs}
+            for job_id in mirrored - known:
+                shared_state.remove_job(job_id)
+            mirrored = known
+        except Exception as e:
+            print(f"⚠️  Job mirror error: {str(e)}")
+
+def active_job_record(collection_name: str):
+    """The collection's queued/running ingestion job as a dict, from this worker or (shared state) any worker"""
+    active = job_manager.active_job(collection_name)
+    if active is not None:
+        return active.to_dict()
+    if shared_state is not None:
+        return shared_state.active_job(collection_name, SHARED_JOB_STALE_SECONDS)
+    return None
+
+if shared_state is not None:
+    job_manager.listener = mirror_job
+
 # ----------------------------------------
 # 🛠️ Tools & LLM
 # ----------------------------------------
 
 def get_llm():
-    """Get configured LLM (Groq or OpenAI)"""
+    """Get configured LLM (Groq or OpenAI, or the offline fake)"""
     try:
+        if LLM_PROVIDER == "fake":
+            from fake_llm import FakeFinanceLLM
+            return FakeFinanceLLM(latency=FAKE_LLM_LATENCY_MS / 1000, token_latency=FAKE_LLM_TOKEN_LATENCY_MS / 1000)
         if os.getenv("GROQ_API_KEY"):
+            from langchain_groq import ChatGroq
             return ChatGroq(model="llama3-8b-8192", groq_api_key=os.getenv("GROQ_API_KEY"))
         elif os.getenv("OPENAI_API_KEY"):
+            from langchain_openai import ChatOpenAI
             return ChatOpenAI(model_name="gpt-3.5-turbo", openai_api_key=os.getenv("OPENAI_API_KEY"))
         else:
             raise ValueError("No API key found. Please set GROQ_API_KEY or OPENAI_API_KEY")
     except Exception as e:
         raise Exception(f"Failed to initialize LLM: {str(e)}")
 
-def create_pdf_qa_tool(store, name="PDF_QA"):
-    """Create PDF Q&A tool"""
+def llm_provider_name() -> str:
+    """Short name of the configured provider ("groq", "openai", "fake"), used for its rate budget"""
+    module = llm_provider_module()
+    return {"fake_llm": "fake", "langchain_groq": "groq", "langchain_openai": "openai"}.get(module, "none")
+
+def llm_rate_budget(provider: str):
+    """``(requests, tokens)`` per minute for a provider from <PROVIDER>_RPM / <PROVIDER>_TPM"""
+    return (float(os.getenv(f"{provider.upper()}_RPM", "0")), float(os.getenv(f"{provider.upper()}_TPM", "0")))
+
+_llm_provider = llm_provider_name()
+llm_scheduler = LLMScheduler(
+    _llm_provider, *llm_rate_budget(_llm_provider), completion_tokens=LLM_COMPLETION_TOKENS,
+    max_retries=LLM_MAX_RETRIES, base_backoff=LLM_BACKOFF_SECONDS, max_backoff=LLM_MAX_BACKOFF_SECONDS,
+    on_wait=LLM_WAIT_SECONDS.observe, on_event=lambda event: LLM_EVENTS_TOTAL.inc(event=event)
+)
+
+_shared_llm = None
+_shared_llm_lock = threading.Lock()
+
+def get_shared_llm():
+    """Get the process-wide LLM client, building it on first use
+
+    Every call goes through ``llm_scheduler`` (coalescing, rate budgets, 429 retries).
+    """
+    global _shared_llm
+    with _shared_llm_lock:
+        if _shared_llm is None:
+            from scheduled_llm import ScheduledChatModel
+            _shared_llm = ScheduledChatModel(llm=get_llm(), scheduler=llm_scheduler)
+        return _shared_llm
+
+def rate_limited_response(error: LLMRateLimitError):
+    """429 with a Retry-After header for a call the provider kept rate limiting"""
+    retry_after = max(1, int(round(error.retry_after or 1)))
+    return JSONResponse(status_code=429, headers={"Retry-After": str(retry_after)}, content={
+        "status": "error",
+        "error": str(error),
+        "message": "The LLM provider is rate limiting requests, please retry later",
+        "retry_after": retry_after
+    })
+
+def create_pdf_qa_tool(store, name="PDF_QA", llm=None, retriever=None):
+    """Create PDF Q&A tool
+
+    Retrieval and the LLM call are run (and timed) separately, with the same
+    "stuff" prompt RetrievalQA would build.
+    """
+    from langchain.tools import Tool
+
     try:
-        chain = RetrievalQA.from_chain_type(
-            llm=get_llm(),
-            retriever=store.as_retriever(search_kwargs={"k": 3}),
-            return_source_documents=True
-        )
+        llm = llm or get_llm()
+        retriever = retriever or store.as_retriever(search_kwargs=retriever_kwargs(store.collection_name, QA_K))
+        prompt = qa_prompt(llm)
         
         def qa_func(query: str) -> str:
             try:
-                result = chain.invoke({"query": query})
-                return result.get("result", "No answer found")
+                with timed(STAGE_SECONDS, "retrieval", route="qa"):
+                    docs = retriever.invoke(query)
+                prompt_value, _ = packed_qa_prompt(prompt, docs, query, "qa")
+                with timed(STAGE_SECONDS, "llm", route="qa"):
+                    return token_text(llm.invoke(prompt_value)) or "No answer found"
+            except LLMRateLimitError:
+                raise
             except Exception as e:
+                ERRORS_TOTAL.inc(stage="qa")
                 return f"Error processing query: {str(e)}"
         
         return Tool(name=name, func=qa_func, description="Answer questions from the PDF document.")
     except Exception as e:
         raise Exception(f"Failed to create PDF QA tool: {str(e)}")
 
-def create_summary_tool(store, name="PDF_Summary"):
+SUMMARY_PROMPT = "Summarize the following financial document content in a clear and concise manner:\n\n{content}\n\nSummary:"
+SUMMARY_QUERY = "summary overview content"
+SUMMARY_K = 5  # chunks retrieved for a summary
+SUMMARY_DOCS = 3  # retrieved chunks passed to the summary prompt
+QA_K = 3  # chunks retrieved for a question
+
+def create_summary_tool(store, name="PDF_Summary", llm=None):
     """Create PDF summary tool using modern RunnableSequence pattern"""
+    from langchain.prompts import PromptTemplate
+    from langchain.tools import Tool
+
     try:
-        prompt = PromptTemplate.from_template(
-            "Summarize the following financial document content in a clear and concise manner:\n\n{content}\n\nSummary:"
-        )
+        prompt = PromptTemplate.from_template(SUMMARY_PROMPT)
         # Modern approach: prompt | llm instead of deprecated LLMChain
-        chain = prompt | get_llm()
+        chain = prompt | (llm or get_llm())
+        retriever = store.as_retriever(search_kwargs=retriever_kwargs(store.collection_name, SUMMARY_K))
 
         def summarize(query: str) -> str:
             try:
                 # Get relevant documents for summary using modern invoke method
-                retriever = store.as_retriever(search_kwargs={"k": 5})
-                docs = retriever.invoke("summary overview content")
+                with timed(STAGE_SECONDS, "retrieval", route="summary"):
+                    docs = retriever.invoke(SUMMARY_QUERY)
                 if not docs:
                     return "No content available for summary"
                 
-                full_text = "\n\n".join(d.page_content for d in docs[:3])  # Limit content
+                full_text, _ = packed_summary_content(docs[:SUMMARY_DOCS], "summary")  # Limit content
                 # Modern invoke method instead of deprecated run
-                result = chain.invoke({"content": full_text})
+                with timed(STAGE_SECONDS, "llm", route="summary"):
+                    result = chain.invoke({"content": full_text})
                 # Handle both string and AIMessage responses
                 if hasattr(result, 'content'):
                     return result.content
                 return str(result)
+            except LLMRateLimitError:
+                raise
             except Exception as e:
+                ERRORS_TOTAL.inc(stage="summary")
                 return f"Error generating summary: {str(e)}"
 
         return Tool(name=name, func=summarize, description="Generate a summary of the PDF document.")
     except Exception as e:
         raise Exception(f"Failed to create summary tool: {str(e)}")
 
+# ----------------------------------------
+# 📝 Precomputed Summaries
+# ----------------------------------------
+
+SECTION_SUMMARY_PROMPT = (
+    "Summarize this section (pages {pages}) of a financial document. Keep the key figures, "
+    "periods and risks it mentions:\n\n{content}\n\nSection summary:"
+)
+COMBINE_SUMMARY_PROMPT = (
+    "Combine the following section summaries of a financial document into one clear and "
+    "concise summary of the whole document:\n\n{content}\n\nSummary:"
+)
+
+def collection_chunks(collection_name: str):
+    """Map content hash -> (text, page) for every chunk stored in a collection"""
+    chunks = {}
+    offset = None
+    while True:
+        points, offset = get_qdrant_client().scroll(collection_name=collection_name, limit=256, offset=offset,
+                                              with_payload=True, with_vectors=False)
+        for point in points:
+            metadata = point.payload.get("metadata") or {}
+            if "content_hash" in metadata:
+                chunks[metadata["content_hash"]] = (point.payload.get("page_content", ""), metadata.get("page"))
+        if offset is None:
+            return chunks
+
+def build_collection_summaries(collection_name: str):
+    """Map-reduce summaries for a collection, reusing sections whose chunks are unchanged"""
+    from langchain.prompts import PromptTemplate
+
+    entry = in_memory_collections.get(collection_name)
+    if entry is None or "content_hashes" not in entry:
+        return None
+    physical = entry.get("physical_collection")
+    previous = entry.get("summaries") or {}
+    entry["summaries"] = {**previous, "status": "running"}
+    try:
+        content_hashes = entry["content_hashes"]
+        chunks = collection_chunks(collection_name)
+        sections = split_sections(content_hashes, SUMMARY_SECTION_CHUNKS)
+        for section in sections:
+            pages = [chunks[content_hashes[i]][1] for i in section["chunks"] if content_hashes[i] in chunks]
+            pages = [page + 1 for page in pages if page is not None]
+            section["pages"] = [min(pages), max(pages)] if pages else None
+
+        llm = get_shared_llm()
+        section_chain = PromptTemplate.from_template(SECTION_SUMMARY_PROMPT) | llm
+        combine_chain = PromptTemplate.from_template(COMBINE_SUMMARY_PROMPT) | llm
+
+        def summarize(section):
+            texts = [chunks[content_hashes[i]][0] for i in section["chunks"] if content_hashes[i] in chunks]
+            # Consecutive chunks repeat their overlap; the section is summarized as continuous text
+            text = join_overlapping(texts) if CONTEXT_PACKING else "\n\n".join(texts)
+            pages = f"{section['pages'][0]}-{section['pages'][1]}" if section["pages"] else "unknown"
+            record_prompt_tokens("section_summary", SECTION_SUMMARY_PROMPT.format(pages=pages, content=text),
+                                 saved=count_tokens("\n\n".join(texts)) - count_tokens(text))
+            return token_text(section_chain.invoke({"pages": pages, "content": text}))
+
+        def combine(summaries):
+            return token_text(combine_chain.invoke({"content": "\n\n".join(summaries)}))
+
+        # Section summaries share the batch LLM pool and its concurrency limit
+        result = build_summaries(sections, summarize, combine, previous=previous,
+                                 fanout=SUMMARY_REDUCE_FANOUT, executor=batch_llm_executor)
+        summaries = {"status": "ready", **result, "updated_at": time.time(), "error": None}
+    except Exception as e:
+        summaries = {**previous, "status": "failed", "error": str(e)}
+
+    # A refresh that landed meanwhile has scheduled its own build; drop this one
+    current = in_memory_collections.get(collection_name)
+    if current is None or current.get("physical_collection") != physical:
+        return None
+    current["summaries"] = summaries
+    save_collection_metadata(collection_name)
+    return summaries
+
+def schedule_summaries(collection_name: str):
+    """Queue a background summary build for a collection"""
+    if not SUMMARY_PRECOMPUTE or collection_name not in in_memory_collections:
+        return None
+    with _summary_builds_lock:
+        if collection_name in _summary_builds:
+            return None  # already queued
+        _summary_builds.add(collection_name)
+    entry = in_memory_collections[collection_name]
+    entry["summaries"] = {**(entry.get("summaries") or {}), "status": "pending"}
+
+    def build():
+        # Leaves the set when it starts, so a refresh landing mid-build queues the next one
+        with _summary_builds_lock:
+            _summary_builds.discard(collection_name)
+        return build_collection_summaries(collection_name)
+
+    return summary_executor.submit(build)
+
+def precomputed_summary(collection_name: str):
+    """The current document summary, or None while it is missing or being rebuilt"""
+    summaries = (in_memory_collections.get(collection_name) or {}).get("summaries") or {}
+    return summaries.get("document") if summaries.get("status") == "ready" else None
+
+# ----------------------------------------
+# 📡 Streaming
+# ----------------------------------------
+
+def source_metadata(docs):
+    """Page references and snippets for retrieved chunks"""
+    return [
+        {
+            "page": doc.metadata.get("page"),
+            "page_label": doc.metadata.get("page_label"),
+            "snippet": doc.page_content[:200]
+        }
+        for doc in docs
+    ]
+
+def token_text(chunk) -> str:
+    """Text of a streamed LLM chunk (chat models yield message chunks, LLMs yield strings)"""
+    return chunk.content if hasattr(chunk, "content") else str(chunk)
+
+def qa_prompt(llm):
+    """The "stuff" prompt RetrievalQA builds for ``llm``"""
+    from langchain.chains.question_answering.stuff_prompt import PROMPT_SELECTOR
+    return PROMPT_SELECTOR.get_prompt(llm)
+
+def format_qa_prompt(prompt, docs, question: str):
+    """Fill the QA prompt the way RetrievalQA's stuff chain does"""
+    return prompt.format_prompt(context="\n\n".join(d.page_content for d in docs), question=question)
+
+def pack_docs(docs, route: str):
+    """Retrieved docs as they go into the prompt, plus packing stats (None with CONTEXT_PACKING=false)"""
+    if not CONTEXT_PACKING:
+        return list(docs), None
+    with timed(STAGE_SECONDS, "packing", route=route):
+        return pack_context(docs, CONTEXT_TOKEN_BUDGET, CONTEXT_MMR_LAMBDA, CONTEXT_DUPLICATE_SIMILARITY)
+
+def record_prompt_tokens(route: str, prompt_text: str, stats=None, saved: int = 0):
+    """Count the estimated prompt tokens, and what they would have been without packing
+
+    The savings come from packing ``stats`` or are passed as ``saved``. Also
+    added to the request's timings (``prompt_tokens_before/after``).
+    """
+    after = count_tokens(prompt_text)
+    before = after + (stats["tokens_before"] - stats["tokens_after"] if stats else saved)
+    PROMPT_TOKENS_TOTAL.inc(before, route=route, packing="before")
+    PROMPT_TOKENS_TOTAL.inc(after, route=route, packing="after")
+    annotate(prompt_tokens_before=before, prompt_tokens_after=after)
+    return {"before": before, "after": after}
+
+def packed_qa_prompt(prompt, docs, question: str, route: str):
+    """Pack ``docs`` and fill the QA prompt; returns the prompt and its token counts"""
+    packed, stats = pack_docs(docs, route)
+    value = format_qa_prompt(prompt, packed, question)
+    return value, record_prompt_tokens(route, value.to_string(), stats)
+
+def packed_summary_content(docs, route: str):
+    """Pack summary chunks into the content of SUMMARY_PROMPT; returns the content and its token counts"""
+    packed, stats = pack_docs(docs, route)
+    content = "\n\n".join(d.page_content for d in packed)
+    return content, record_prompt_tokens(route, SUMMARY_PROMPT.format(content=content), stats)
+
+def create_pdf_qa_stream(store, llm=None, retriever=None):
+    """Streaming counterpart of the PDF Q&A tool
+
+    Uses the same "stuff" prompt RetrievalQA builds for ``llm``, but yields
+    ``("sources", docs)`` after retrieval and then ``("token", text)`` as the
+    LLM generates.
+    """
+    llm = llm or get_llm()
+    retriever = retriever or store.as_retriever(search_kwargs=retriever_kwargs(store.collection_name, QA_K))
+    prompt = qa_prompt(llm)
+
+    def qa_stream(query: str):
+        with timed(STAGE_SECONDS, "retrieval", route="qa_stream"):
+            docs = retriever.invoke(query)
+        yield "sources", docs
+        prompt_value, _ = packed_qa_prompt(prompt, docs, query, "qa_stream")
+        with timed(STAGE_SECONDS, "llm", route="qa_stream"):
+            for chunk in llm.stream(prompt_value):
+                yield "token", token_text(chunk)
+
+    return qa_stream
+
+def create_summary_stream(store, llm=None):
+    """Streaming counterpart of the PDF summary tool"""
+    from langchain.prompts import PromptTemplate
+
+    chain = PromptTemplate.from_template(SUMMARY_PROMPT) | (llm or get_llm())
+    retriever = store.as_retriever(search_kwargs=retriever_kwargs(store.collection_name, SUMMARY_K))
+
+    def summary_stream(query: str):
+        with timed(STAGE_SECONDS, "retrieval", route="summary_stream"):
+            docs = retriever.invoke(SUMMARY_QUERY)[:SUMMARY_DOCS]
+        yield "sources", docs
+        if not docs:
+            yield "token", "No content available for summary"
+            return
+        content, _ = packed_summary_content(docs, "summary_stream")
+        with timed(STAGE_SECONDS, "llm", route="summary_stream"):
+            for chunk in chain.stream({"content": content}):
+                yield "token", token_text(chunk)
+
+    return summary_stream
+
+def sse_event(event: str, data) -> str:
+    """Format one Server-Sent Event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 # ----------------------------------------
 # 🧠 Enhanced Agent
 # ----------------------------------------
 
-def build_agent(pdf_tool, summary_tool):
-    """Build intelligent routing agent"""
+SUMMARY_KEYWORDS = ["summary", "summarize", "overview", "general", "what is this about"]
+
+def is_summary_request(message: str) -> bool:
+    """Route based on keywords"""
+    message_lower = message.lower()
+    return any(keyword in message_lower for keyword in SUMMARY_KEYWORDS)
+
+def build_agent(pdf_tool, summary_tool, precomputed=None):
+    """Build intelligent routing agent
+
+    ``precomputed()`` returns a ready-made document summary (or None), which
+    answers summary requests without retrieval or an LLM call.
+    """
     def agent_logic(message: str) -> str:
         try:
-            message_lower = message.lower()
-            
-            # Route based on keywords
-            summary_keywords = ["summary", "summarize", "overview", "general", "what is this about"]
-            
-            if any(keyword in message_lower for keyword in summary_keywords):
-                return summary_tool.run(message)
+            if is_summary_request(message):
+                summary = precomputed() if precomputed else None
+                annotate(route="precomputed" if summary else "summary")
+                return summary or summary_tool.run(message)
             else:
+                annotate(route="qa")
                 return pdf_tool.run(message)
                 
+        except LLMRateLimitError:
+            raise
         except Exception as e:
+            ERRORS_TOTAL.inc(stage="agent")
             return f"Error processing request: {str(e)}"
     
     return agent_logic
 
+def build_streaming_agent(qa_stream, summary_stream, precomputed=None):
+    """Route a message to the streaming QA or summary path (same routing as build_agent)"""
+    def precomputed_stream(summary: str):
+        yield "sources", []
+        yield "token", summary
+
+    def stream_logic(message: str):
+        if is_summary_request(message):
+            summary = precomputed() if precomputed else None
+            return precomputed_stream(summary) if summary else summary_stream(message)
+        return qa_stream(message)
+
+    return stream_logic
+
+# ----------------------------------------
+# ♻️ Pipeline Registry
+# ----------------------------------------
+
+def build_pipeline(collection_name: str):
+    """Build the store, retriever, tools and agent for a collection"""
+    store = load_qdrant_store(collection_name)
+    llm = get_shared_llm()
+    if HYBRID_SEARCH:
+        from hybrid_retriever import HybridRetriever
+        retriever = HybridRetriever(store=store, sparse_index=lambda: get_sparse_index(collection_name),
+                                    k=QA_K, fetch_k=HYBRID_FETCH_K, rrf_k=RRF_K,
+                                    search_params=search_params(collection_name))
+    else:
+        retriever = store.as_retriever(search_kwargs=retriever_kwargs(store.collection_name, QA_K))
+    pdf_tool = create_pdf_qa_tool(store, llm=llm, retriever=retriever)
+    summary_tool = create_summary_tool(store, llm=llm)
+
+    def precomputed():
+        return precomputed_summary(collection_name)
+
+    return {
+        "store": store,
+        "retriever": retriever,
+        "llm": llm,
+        "pdf_tool": pdf_tool,
+        "summary_tool": summary_tool,
+        "agent": build_agent(pdf_tool, summary_tool, precomputed=precomputed),
+        "stream_agent": build_streaming_agent(
+            create_pdf_qa_stream(store, llm=llm, retriever=retriever),
+            create_summary_stream(store, llm=llm),
+            precomputed=precomputed
+        )
+    }
+
+class PipelineRegistry:
+    """LRU cache of built pipelines keyed by collection name, with an idle TTL"""
+
+    def __init__(self, builder, max_size: int = PIPELINE_CACHE_SIZE, idle_ttl: float = PIPELINE_IDLE_TTL):
+        self.builder = builder
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self._entries = OrderedDict()
+        self._generations = {}  # collection -> invalidation count, to spot builds that raced an invalidate
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _evict_idle(self, now: float):
+        expired = [name for name, entry in self._entries.items() if now - entry["last_used"] > self.idle_ttl]
+        for name in expired:
+            del self._entries[name]
+
+    def get(self, collection_name: str):
+        """Return the cached pipeline for a collection, building it on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._entries.get(collection_name)
+            if entry is not None:
+                entry["last_used"] = now
+                self._entries.move_to_end(collection_name)
+                self.hits += 1
+                return entry["pipeline"]
+            self.misses += 1
+            generation = self._generations.get(collection_name, 0)
+
+        # Build outside the lock so a slow build doesn't block other collections
+        pipeline = self.builder(collection_name)
+
+        with self._lock:
+            if self._generations.get(collection_name, 0) != generation:
+                # Invalidated while building: the pipeline may be for the old version, so don't cache it
+                return pipeline
+            self._entries[collection_name] = {"pipeline": pipeline, "last_used": time.monotonic()}
+            self._entries.move_to_end(collection_name)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return pipeline
+
+    def invalidate(self, collection_name: str):
+        """Drop the cached pipeline for a collection (e.g. after a refresh)"""
+        with self._lock:
+            self._entries.pop(collection_name, None)
+            self._generations[collection_name] = self._generations.get(collection_name, 0) + 1
+
+    def stats(self):
+        """Return cache size and hit/miss counters"""
+        with self._lock:
+            return {
+                "cached": len(self._entries),
+                "max_size": self.max_size,
+                "idle_ttl": self.idle_ttl,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+pipeline_registry = PipelineRegistry(build_pipeline)
+
+# Agent/tool failures come back as text; never cache them as answers
+ERROR_RESPONSE_PREFIXES = ("Error processing", "Error generating")
+
+def invalidate_collection_caches(collection_name: str):
+    """Drop the cached pipeline and answers for a collection (e.g. after a refresh)"""
+    pipeline_registry.invalidate(collection_name)
+    if answer_cache is not None:
+        answer_cache.invalidate(collection_name)
+
+# ----------------------------------------
+# 📥 Upload Spooling
+# ----------------------------------------
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds MAX_UPLOAD_MB"""
+
+async def spool_upload(file: UploadFile, max_bytes: int) -> str:
+    """Copy an upload to a spool file chunk by chunk and return its path"""
+    size = getattr(file, "size", None)
+    if size is not None and size > max_bytes:
+        raise UploadTooLargeError(f"File exceeds the {MAX_UPLOAD_MB:g} MB upload limit")
+
+    fd, spool_path = tempfile.mkstemp(suffix=".pdf", dir=UPLOAD_SPOOL_DIR)
+    try:
+        written = 0
+        with os.fdopen(fd, "wb") as spool_file:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > max_bytes:
+                    raise UploadTooLargeError(f"File exceeds the {MAX_UPLOAD_MB:g} MB upload limit")
+                await run_in_threadpool(spool_file.write, chunk)
+    except BaseException:
+        remove_file(spool_path)
+        raise
+    return spool_path
+
+# ----------------------------------------
+# 💬 Chat Helpers
+# ----------------------------------------
+
+def not_ready_response(collection_name: str):
+    """409 response while a new collection is still ingesting (refreshes keep serving the live version)"""
+    if collection_name in in_memory_collections:
+        return None
+    active = active_job_record(collection_name)
+    if active is None:
+        if shared_state is not None and shared_collection_pending(collection_name):
+            _shared_sync_wakeup.set()
+            return JSONResponse(status_code=409, headers={"Retry-After": "1"}, content={
+                "status": "not_ready",
+                "collection_name": collection_name,
+                "message": "Collection was just published by another worker and is still loading here, try again shortly"
+            })
+        return None
+    return JSONResponse(status_code=409, content={
+        "status": "not_ready",
+        "collection_name": collection_name,
+        "job_id": active["job_id"],
+        "job_status": active["status"],
+        "progress": active["progress"],
+        "message": "Collection is still being ingested, try again when the job completes"
+    })
+
+def lookup_answer(collection_name: str, message: str, embedding=None):
+    """Check the answer cache; the returned state is passed on to ``remember_answer``
+
+    Pass ``embedding`` when the question was already embedded (e.g. in a batch).
+    """
+    lookup = {"answer": None, "cache": None, "embedding": None, "generation": None}
+    if answer_cache is None:
+        return lookup
+    lookup["generation"] = answer_cache.generation(collection_name)
+    embed = (lambda text: embedding) if embedding is not None else (lambda text: get_embedder().embed_query(text))
+    cached, match, lookup["embedding"] = answer_cache.lookup(collection_name, message, embed=embed)
+    if cached is None:
+        lookup["cache"] = {"hit": False}
+    else:
+        lookup["answer"] = cached["answer"]
+        lookup["cache"] = {
+            "hit": True,
+            "match": match,
+            "cached_question": cached["question"],
+            "similarity": round(cached.get("similarity", 1.0), 4)
+        }
+    return lookup
+
+def remember_answer(collection_name: str, message: str, response, lookup):
+    """Cache a freshly generated answer (tool errors are never cached)
+
+    With precomputed summaries, summary requests are already instant and a
+    live-fallback summary would outlive the precomputed one, so they are
+    not cached either.
+    """
+    if SUMMARY_PRECOMPUTE and is_summary_request(message):
+        return
+    if answer_cache is not None and not str(response).startswith(ERROR_RESPONSE_PREFIXES):
+        answer_cache.put(collection_name, message, response, embedding=lookup["embedding"],
+                         generation=lookup["generation"])
+
+def stream_chat_events(collection_name: str, message: str):
+    """Yield SSE events for a chat: ``sources``, then ``token``s, then ``done`` (or ``error``)"""
+    started = time.perf_counter()
+    route = "cached"
+    try:
+        lookup = lookup_answer(collection_name, message)
+        if lookup["answer"] is not None:
+            yield sse_event("sources", {"sources": []})
+            yield sse_event("token", {"token": lookup["answer"]})
+        else:
+            route = "summary" if is_summary_request(message) else "qa"
+            pipeline = pipeline_registry.get(collection_name)
+            tokens = []
+            for kind, value in pipeline["stream_agent"](message):
+                if kind == "sources":
+                    yield sse_event("sources", {"sources": source_metadata(value)})
+                else:
+                    tokens.append(value)
+                    yield sse_event("token", {"token": value})
+            lookup["answer"] = "".join(tokens)
+            remember_answer(collection_name, message, lookup["answer"], lookup)
+        done = {
+            "status": "success",
+            "collection_name": collection_name,
+            "message": message,
+            "response": lookup["answer"],
+            "storage_type": STORAGE_TYPE
+        }
+        if lookup["cache"] is not None:
+            done["cache"] = lookup["cache"]
+        record_request("fin_chat_stream", route, "success", started)
+        yield sse_event("done", done)
+    except LLMRateLimitError as e:
+        record_request("fin_chat_stream", route, "rate_limited", started)
+        yield sse_event("error", {"status": "rate_limited", "error": str(e), "retry_after": e.retry_after,
+                                  "message": "The LLM provider is rate limiting requests, please retry later"})
+    except Exception as e:
+        ERRORS_TOTAL.inc(stage="fin_chat_stream")
+        record_request("fin_chat_stream", route, "error", started)
+        yield sse_event("error", {"status": "error", "error": str(e), "message": "Failed to process chat request"})
+
+# ----------------------------------------
+# 📦 Batch Questions
+# ----------------------------------------
+
+class BatchChatRequest(BaseModel):
+    collection_name: str
+    questions: List[str]
+
+def search_batch(store, vectors, k: int):
+    """Run the vector searches for several query vectors in one Qdrant request"""
+    from langchain_core.documents import Document
+    from qdrant_client.models import QueryRequest
+
+    responses = get_qdrant_client().query_batch_points(
+        collection_name=store.collection_name,
+        requests=[QueryRequest(query=list(vector), limit=k, with_payload=True, params=search_params(store.collection_name))
+                  for vector in vectors]
+    )
+    return [
+        [
+            Document(
+                page_content=point.payload.get(store.content_payload_key, ""),
+                metadata={**(point.payload.get(store.metadata_payload_key) or {}), "_id": point.id}
+            )
+            for point in response.points
+        ]
+        for response in responses
+    ]
+
+def answer_batch(collection_name: str, questions):
+    """Answer many questions against one collection
+
+    All questions (plus the summary query, if any question asks for a
+    summary) are embedded in a single call and searched in a single Qdrant
+    request; cache misses then go to the LLM on ``batch_llm_executor``.
+    Results keep the order of ``questions``.
+    """
+    from langchain.prompts import PromptTemplate
+
+    started = time.perf_counter()
+    pipeline = pipeline_registry.get(collection_name)
+    store, llm = pipeline["store"], pipeline["llm"]
+    results = [{"index": i, "question": q, "response": None, "error": None, "cached": False} for i, q in enumerate(questions)]
+
+    summary_requested = any(is_summary_request(q) for q in questions)
+    texts = list(questions) + ([SUMMARY_QUERY] if summary_requested else [])
+    vectors = get_embedder().embed_documents(texts)
+    embedded = time.perf_counter()
+
+    # Cached answers and the precomputed document summary skip retrieval and the LLM
+    lookups = [lookup_answer(collection_name, q, embedding=vectors[i]) for i, q in enumerate(questions)]
+    document_summary = precomputed_summary(collection_name) if summary_requested else None
+    pending = []
+    for i, lookup in enumerate(lookups):
+        if lookup["answer"] is not None:
+            results[i].update(response=lookup["answer"], cached=True)
+        elif document_summary and is_summary_request(questions[i]):
+            results[i].update(response=document_summary, precomputed=True)
+        else:
+            pending.append(i)
+            continue
+        results[i]["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    qa_pending = [i for i in pending if not is_summary_request(questions[i])]
+    qa_docs = {}
+    if qa_pending:
+        # Hybrid retrieval fuses each question's dense candidates with its BM25 hits
+        dense = search_batch(store, [vectors[i] for i in qa_pending], HYBRID_FETCH_K if HYBRID_SEARCH else QA_K)
+        for i, docs in zip(qa_pending, dense):
+            qa_docs[i] = pipeline["retriever"].fuse(questions[i], docs) if HYBRID_SEARCH else docs
+    summary_docs = []
+    if summary_requested and len(qa_pending) < len(pending):
+        summary_docs = search_batch(store, [vectors[-1]], SUMMARY_K)[0][:SUMMARY_DOCS]
+    searched = time.perf_counter()
+
+    prompt = qa_prompt(llm)
+    summary_chain = PromptTemplate.from_template(SUMMARY_PROMPT) | llm
+
+    def generate(i: int):
+        call_started = time.perf_counter()
+        try:
+            if i in qa_docs:
+                prompt_value, results[i]["prompt_tokens"] = packed_qa_prompt(prompt, qa_docs[i], questions[i], "batch")
+                answer = token_text(llm.invoke(prompt_value))
+            elif summary_docs:
+                content, results[i]["prompt_tokens"] = packed_summary_content(summary_docs, "batch")
+                answer = token_text(summary_chain.invoke({"content": content}))
+            else:
+                answer = "No content available for summary"
+            results[i].update(response=answer, llm_ms=round((time.perf_counter() - call_started) * 1000, 1))
+            STAGE_SECONDS.observe(time.perf_counter() - call_started, stage="llm", route="batch")
+            remember_answer(collection_name, questions[i], answer, lookups[i])
+        except LLMRateLimitError as e:
+            results[i].update(error=str(e), retry_after=e.retry_after)
+        except Exception as e:
+            ERRORS_TOTAL.inc(stage="batch")
+            results[i]["error"] = str(e)
+        results[i]["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    # Each worker fills in its own result slot, so order is preserved
+    for future in [batch_llm_executor.submit(generate, i) for i in pending]:
+        future.result()
+    STAGE_SECONDS.observe(embedded - started, stage="embed", route="batch")
+    STAGE_SECONDS.observe(searched - embedded, stage="retrieval", route="batch")
+
+    return {
+        "results": results,
+        "timings": {
+            "embed_ms": round((embedded - started) * 1000, 1),
+            "search_ms": round((searched - embedded) * 1000, 1),
+            "total_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
+    }
+
+# ----------------------------------------
+# 🔀 Multi-Collection Questions
+# ----------------------------------------
+
+class MultiChatRequest(BaseModel):
+    message: str
+    collection_names: Optional[List[str]] = None  # None or empty = every collection
+    k: Optional[int] = None
+
+def search_collection_scored(collection_name: str, vector, k: int):
+    """Top ``k`` chunks of one collection with their similarity scores and source attribution"""
+    from langchain_core.documents import Document
+
+    store = load_qdrant_store(collection_name)
+    filename = in_memory_collections.get(collection_name, {}).get("filename")
+    response = get_qdrant_client().query_points(collection_name=store.collection_name, query=list(vector),
+                                          limit=k, with_payload=True, search_params=search_params(collection_name))
+    return [
+        Document(
+            page_content=point.payload.get(store.content_payload_key, ""),
+            metadata={**(point.payload.get(store.metadata_payload_key) or {}), "_id": point.id,
+                      "collection": collection_name, "filename": filename, "score": point.score}
+        )
+        for point in response.points
+    ]
+
+def merge_by_score(results, k: int):
+    """Global top ``k`` over per-collection result lists (same embedding model, so scores compare)"""
+    docs = [doc for collection_docs in results for doc in collection_docs]
+    return sorted(docs, key=lambda doc: doc.metadata["score"], reverse=True)[:k]
+
+def attributed_context(docs):
+    """Label each chunk with its collection and page so the answer can cite sources"""
+    return "\n\n".join(
+        f"[{doc.metadata['collection']}, page {(doc.metadata.get('page') or 0) + 1}]\n{doc.page_content}"
+        for doc in docs
+    )
+
+def answer_multi(collection_names, message: str, k: int = MULTI_SEARCH_K):
+    """Answer one question over several collections
+
+    The question is embedded once, every collection is searched in parallel
+    on ``multi_search_executor`` (so search time tracks the slowest
+    collection, not the sum), the hits are merged by score into one global
+    top ``k`` and a single LLM call answers over the merged context.
+    Collections whose search fails are reported and left out.
+    """
+    started = time.perf_counter()
+    vector = get_embedder().embed_query(message)
+    embedded = time.perf_counter()
+
+    def search(collection_name: str):
+        search_started = time.perf_counter()
+        try:
+            return search_collection_scored(collection_name, vector, k), None, search_started
+        except Exception as e:
+            return [], str(e), search_started
+
+    futures = {name: multi_search_executor.submit(search, name) for name in collection_names}
+    collections, results = {}, []
+    for name, future in futures.items():
+        docs, error, search_started = future.result()
+        collections[name] = {"hits": len(docs), "used": 0, "error": error,
+                             "search_ms": round((time.perf_counter() - search_started) * 1000, 1)}
+        results.append(docs)
+    searched = time.perf_counter()
+
+    docs, packing = pack_docs(merge_by_score(results, k), "multi")
+    for doc in docs:
+        collections[doc.metadata["collection"]]["used"] += 1
+    prompt_tokens = None
+    if docs:
+        llm = get_shared_llm()
+        prompt = qa_prompt(llm).format_prompt(context=attributed_context(docs), question=message)
+        prompt_tokens = record_prompt_tokens("multi", prompt.to_string(), packing)
+        response = token_text(llm.invoke(prompt))
+    else:
+        response = "No relevant content found in the selected collections"
+    answered = time.perf_counter()
+    STAGE_SECONDS.observe(embedded - started, stage="embed", route="multi")
+    STAGE_SECONDS.observe(searched - embedded, stage="retrieval", route="multi")
+    STAGE_SECONDS.observe(answered - searched, stage="llm", route="multi")
+
+    return {
+        "response": response,
+        "sources": [
+            {
+                "collection": doc.metadata["collection"],
+                "filename": doc.metadata.get("filename"),
+                "page": doc.metadata.get("page"),
+                "page_label": doc.metadata.get("page_label"),
+                "score": round(doc.metadata["score"], 4),
+                "snippet": doc.page_content[:200]
+            }
+            for doc in docs
+        ],
+        "collections": collections,
+        "context": {**(packing or {}), "prompt_tokens": prompt_tokens},
+        "timings": {
+            "embed_ms": round((embedded - started) * 1000, 1),
+            "search_ms": round((searched - embedded) * 1000, 1),
+            "search_sum_ms": round(sum(c["search_ms"] for c in collections.values()), 1),
+            "llm_ms": round((answered - searched) * 1000, 1),
+            "total_ms": round((answered - started) * 1000, 1)
+        }
+    }
+
 # ----------------------------------------
 # 🚀 FastAPI Endpoints
 # ----------------------------------------
@@ -248,69 +1996,299 @@ async def root():
     return {
         "message": "Finance Chat Application", 
         "status": "running",
-        "storage_type": "Qdrant In-Memory",
+        "storage_type": STORAGE_TYPE,
         "collections_count": len(in_memory_collections),
+        "pipeline_cache": pipeline_registry.stats(),
+        "ingestion": job_manager.stats(),
+        "embedding_cache": _embedding_cache.stats() if _embedding_cache is not None else None,
+        "query_batching": _embedder.stats() if hasattr(_embedder, "stats") else None,
+        "answer_cache": answer_cache.stats() if answer_cache is not None else None,
+        "llm_scheduler": llm_scheduler.stats(),
+        "worker": {"pid": os.getpid(), "slot": worker_slot(), "shared_state": shared_state is not None},
         "endpoints": {
             "upload": "/upload_pdf",
             "chat": "/fin_chat",
-            "collections": "/collections"
+            "chat_stream": "/fin_chat/stream",
+            "chat_batch": "/fin_chat/batch",
+            "chat_multi": "/fin_chat/multi",
+            "collections": "/collections",
+            "jobs": "/jobs",
+            "snapshots": "/snapshots",
+            "ready": "/ready",
+            "metrics": "/metrics"
         }
     }
 
 @app.post("/upload_pdf")
-async def upload_pdf(file: UploadFile = File(...)):
-    """Upload PDF and create vector store"""
+async def upload_pdf(file: UploadFile = File(...),
+                     wait: bool = Query(False, description="Wait for ingestion to finish before responding"),
+                     mode: str = Query(REFRESH_MODE, description="Refresh mode: incremental or full"),
+                     quantization: str = Query(None, description="Vector storage: none or int8 (default: keep current, then VECTOR_QUANTIZATION)")):
+    """Upload PDF and queue a background ingestion job"""
     try:
         if not file.filename.endswith('.pdf'):
             return JSONResponse(status_code=400, content={"error": "Only PDF files are supported"})
+        if mode not in REFRESH_MODES:
+            return JSONResponse(status_code=400, content={"error": f"Unknown refresh mode '{mode}'. Use one of {list(REFRESH_MODES)}"})
+        if quantization is not None and quantization not in QUANTIZATION_MODES:
+            return JSONResponse(status_code=400, content={"error": f"Unknown quantization '{quantization}'. Use one of {list(QUANTIZATION_MODES)}"})
         
-        file_bytes = await file.read()
         collection_name = file.filename.replace(".pdf", "").lower().replace(" ", "_")
+        if not COLLECTION_NAME_PATTERN.match(collection_name):
+            return JSONResponse(status_code=400, content={
+                "error": f"Invalid file name '{file.filename}': use letters, digits, spaces, '_', '.' or '-', "
+                         "starting with a letter or digit"
+            })
+
+        active = active_job_record(collection_name)
+        if active is not None:
+            return JSONResponse(status_code=409, content={
+                "error": f"Collection '{collection_name}' is already being ingested",
+                "job_id": active["job_id"]
+            })
+
+        # Stream the body to disk instead of reading it into memory
+        try:
+            spool_path = await spool_upload(file, int(MAX_UPLOAD_MB * 1024 * 1024))
+        except UploadTooLargeError as e:
+            return JSONResponse(status_code=413, content={"error": str(e)})
         
-        # Create store
-        store = create_or_refresh_store(collection_name, file_bytes, file.filename)
-        
-        return {
-            "status": "success", 
-            "message": "PDF uploaded and processed successfully",
+        # Parse/split/embed on the ingestion worker pool; the spool file is removed when the job ends
+        try:
+            job = job_manager.submit(collection_name, file.filename, ingest_pdf,
+                                     collection_name, spool_path, file.filename, mode=mode,
+                                     quantization=quantization, cleanup=lambda: remove_file(spool_path))
+        except QueueFullError as e:
+            return JSONResponse(status_code=429, content={"error": str(e)})
+
+        if wait:
+            await asyncio.wrap_future(job.future)
+            if job.error:
+                return JSONResponse(status_code=500, content={"error": f"Upload failed: {job.error}", "job_id": job.job_id})
+            return {
+                "status": "success", 
+                "message": "PDF uploaded and processed successfully",
+                "job_id": job.job_id,
+                "collection_name": collection_name,
+                "filename": file.filename,
+                "storage_type": STORAGE_TYPE,
+                "doc_count": job.result["doc_count"],
+                "refresh": job.result["refresh"],
+                "quantization": job.result["quantization"]
+            }
+
+        return JSONResponse(status_code=202, content={
+            "status": "accepted",
+            "message": "PDF uploaded, ingestion queued",
+            "job_id": job.job_id,
+            "job_url": f"/jobs/{job.job_id}",
             "collection_name": collection_name,
             "filename": file.filename,
-            "storage_type": "Qdrant In-Memory",
-            "doc_count": in_memory_collections[collection_name]["doc_count"]
-        }
+            "storage_type": STORAGE_TYPE
+        })
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": f"Upload failed: {str(e)}"})
 
+@app.get("/jobs")
+async def list_jobs_endpoint():
+    """List recent ingestion jobs"""
+    jobs = [job.to_dict() for job in job_manager.list()]
+    if shared_state is not None:
+        # Jobs running on other workers
+        local = {job["job_id"] for job in jobs}
+        jobs += [job for job in shared_state.list_jobs() if job["job_id"] not in local]
+    return {
+        "status": "success",
+        "jobs": jobs,
+        "count": len(jobs),
+        **job_manager.stats()
+    }
+
+@app.get("/jobs/{job_id}")
+async def get_job_endpoint(job_id: str):
+    """Get status and progress of an ingestion job"""
+    job = job_manager.get(job_id)
+    if job is None and shared_state is not None:
+        shared_job = shared_state.get_job(job_id)
+        if shared_job is not None:
+            return {"status": "success", "job": shared_job}
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": f"Job '{job_id}' not found"})
+    return {"status": "success", "job": job.to_dict()}
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job_endpoint(job_id: str):
+    """Cancel a queued or running ingestion job"""
+    job = job_manager.cancel(job_id)
+    if job is None and shared_state is not None and shared_state.request_cancel(job_id):
+        # Owned by another worker, which applies the request within SHARED_JOB_SYNC_SECONDS
+        return {"status": "success", "message": "Cancellation requested", "job": shared_state.get_job(job_id)}
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": f"Job '{job_id}' not found"})
+    return {
+        "status": "success",
+        "message": "Cancellation requested" if job.is_active else f"Job already {job.status}",
+        "job": job.to_dict()
+    }
+
 @app.post("/fin_chat")
 async def fin_chat(collection_name: str = Query(..., description="Collection name"), 
-                  message: str = Query(..., description="Chat message")):
+                  message: str = Query(..., description="Chat message"),
+                  timings: bool = Query(False, description="Include a per-stage timing breakdown")):
     """Chat with the finance document"""
+    started = time.perf_counter()
+    with track_request() as request_timings:
+        # Off the event loop, so concurrent chats overlap (and identical ones share an LLM call)
+        return await run_in_threadpool(fin_chat_response, collection_name, message, timings, started, request_timings)
+
+def fin_chat_response(collection_name: str, message: str, timings: bool, started: float, request_timings: dict):
+    """Body of ``/fin_chat``; every exit is counted in the request metrics"""
+    def finish(result, status: str):
+        route = request_timings.pop("route", "none")
+        record_request("fin_chat", route, status, started)
+        if timings and isinstance(result, dict):
+            result["timings"] = {"route": route, **request_timings,
+                                 "total_ms": round((time.perf_counter() - started) * 1000, 3)}
+        return result
+
     try:
-        # Load store
-        store = load_qdrant_store(collection_name)
-        
-        # Create tools
-        pdf_tool = create_pdf_qa_tool(store)
-        summary_tool = create_summary_tool(store)
-        
-        # Build agent
-        agent = build_agent(pdf_tool, summary_tool)
+        not_ready = not_ready_response(collection_name)
+        if not_ready is not None:
+            return finish(not_ready, "not_ready")
+
+        # Answer repeated and near-duplicate questions without retrieval or the LLM
+        with timed(STAGE_SECONDS, "cache_lookup", route="chat"):
+            lookup = lookup_answer(collection_name, message)
+        if lookup["answer"] is not None:
+            annotate(route="cached")
+            return finish({
+                "status": "success",
+                "collection_name": collection_name,
+                "message": message,
+                "response": lookup["answer"],
+                "storage_type": STORAGE_TYPE,
+                "cache": lookup["cache"]
+            }, "success")
+
+        # Reuse the cached store, tools and agent for this collection
+        with timed(STAGE_SECONDS, "pipeline", route="chat"):
+            pipeline = pipeline_registry.get(collection_name)
         
         # Get response
-        response = agent(message)
+        response = pipeline["agent"](message)
+        remember_answer(collection_name, message, response, lookup)
         
-        return {
+        result = {
             "status": "success",
             "collection_name": collection_name,
             "message": message,
             "response": response,
-            "storage_type": "Qdrant In-Memory"
+            "storage_type": STORAGE_TYPE
         }
+        if lookup["cache"] is not None:
+            result["cache"] = lookup["cache"]
+        # Tool failures come back as answer text, but count as errors
+        return finish(result, "error" if str(response).startswith(ERROR_RESPONSE_PREFIXES) else "success")
+    except LLMRateLimitError as e:
+        return finish(rate_limited_response(e), "rate_limited")
     except Exception as e:
-        return JSONResponse(status_code=500, content={
+        ERRORS_TOTAL.inc(stage="fin_chat")
+        return finish(JSONResponse(status_code=500, content={
             "status": "error",
             "error": str(e),
             "message": "Failed to process chat request"
+        }), "error")
+
+@app.post("/fin_chat/stream")
+async def fin_chat_stream(collection_name: str = Query(..., description="Collection name"),
+                          message: str = Query(..., description="Chat message")):
+    """Chat with the finance document, streaming sources and then tokens as Server-Sent Events"""
+    not_ready = not_ready_response(collection_name)
+    if not_ready is not None:
+        return not_ready
+    # The generator is synchronous, so Starlette iterates it on the threadpool
+    return StreamingResponse(
+        stream_chat_events(collection_name, message),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/fin_chat/batch")
+async def fin_chat_batch(request: BatchChatRequest):
+    """Answer many questions against one collection with batched retrieval and concurrent LLM calls"""
+    started = time.perf_counter()
+    collection_name = request.collection_name
+    if not request.questions:
+        return JSONResponse(status_code=400, content={"error": "No questions provided"})
+    if len(request.questions) > BATCH_MAX_QUESTIONS:
+        return JSONResponse(status_code=400, content={
+            "error": f"Too many questions ({len(request.questions)}); the limit is {BATCH_MAX_QUESTIONS}"
+        })
+    try:
+        not_ready = not_ready_response(collection_name)
+        if not_ready is not None:
+            return not_ready
+
+        batch = await run_in_threadpool(answer_batch, collection_name, request.questions)
+        record_request("fin_chat_batch", "batch", "success", started)
+        return {
+            "status": "success",
+            "collection_name": collection_name,
+            "count": len(batch["results"]),
+            "errors": sum(1 for r in batch["results"] if r["error"]),
+            "storage_type": STORAGE_TYPE,
+            **batch
+        }
+    except Exception as e:
+        record_request("fin_chat_batch", "batch", "error", started)
+        return JSONResponse(status_code=500, content={
+            "status": "error",
+            "error": str(e),
+            "message": "Failed to process batch request"
+        })
+
+@app.post("/fin_chat/multi")
+async def fin_chat_multi(request: MultiChatRequest):
+    """Ask one question across several collections (or all of them) with a single LLM call"""
+    started = time.perf_counter()
+    collection_names = list(dict.fromkeys(request.collection_names or in_memory_collections))
+    if not collection_names:
+        return JSONResponse(status_code=404, content={"error": "No collections available"})
+    if len(collection_names) > MULTI_MAX_COLLECTIONS:
+        return JSONResponse(status_code=400, content={
+            "error": f"Too many collections ({len(collection_names)}); the limit is {MULTI_MAX_COLLECTIONS}"
+        })
+    missing = [name for name in collection_names if name not in in_memory_collections]
+    for name in missing:
+        not_ready = not_ready_response(name)
+        if not_ready is not None:
+            return not_ready
+    if missing:
+        return JSONResponse(status_code=404, content={
+            "error": f"Collections not found: {missing}. Available collections: {list(in_memory_collections.keys())}"
+        })
+    k = request.k or MULTI_SEARCH_K
+    if k < 1:
+        return JSONResponse(status_code=400, content={"error": "k must be at least 1"})
+    try:
+        result = await run_in_threadpool(answer_multi, collection_names, request.message, k)
+        record_request("fin_chat_multi", "multi", "success", started)
+        return {
+            "status": "success",
+            "collection_names": collection_names,
+            "message": request.message,
+            "storage_type": STORAGE_TYPE,
+            **result
+        }
+    except LLMRateLimitError as e:
+        record_request("fin_chat_multi", "multi", "rate_limited", started)
+        return rate_limited_response(e)
+    except Exception as e:
+        record_request("fin_chat_multi", "multi", "error", started)
+        return JSONResponse(status_code=500, content={
+            "status": "error",
+            "error": str(e),
+            "message": "Failed to process multi-collection request"
         })
 
 @app.get("/collections")
@@ -322,7 +2300,7 @@ async def list_collections_endpoint():
             "status": "success",
             "collections": collections,
             "count": len(collections),
-            "storage_type": "Qdrant In-Memory"
+            "storage_type": STORAGE_TYPE
         }
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": f"Failed to list collections: {str(e)}"})
@@ -337,12 +2315,153 @@ def get_collection_info_endpoint(collection_name: str):
         
         return {
             "status": "success",
-            "storage_type": "Qdrant In-Memory",
+            "storage_type": STORAGE_TYPE,
             **info
         }
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": f"Failed to get collection info: {str(e)}"})
 
+@app.get("/collection/{collection_name}/facts")
+def query_facts_endpoint(collection_name: str,
+                         metric: str = Query(None, description="Metric name (substring match)"),
+                         period: str = Query(None, description="Period label, e.g. FY2024 or Q1 FY26"),
+                         table: str = Query(None, description="Table title (substring match)"),
+                         unit: str = Query(None, description="Unit, e.g. millions or %"),
+                         op: str = Query("list", description="list, sum, avg, min, max, count or change"),
+                         group_by: str = Query(None, description="metric, period, table, unit or page"),
+                         exact: bool = Query(False, description="Require exact name matches"),
+                         limit: int = Query(100, description="Max rows/groups/series returned")):
+    """Filter and aggregate numeric facts extracted from the document's tables (no LLM)"""
+    if collection_name not in in_memory_collections:
+        return JSONResponse(status_code=404, content={"error": f"Collection '{collection_name}' not found"})
+    fact_store = in_memory_collections[collection_name].get("fact_store")
+    if fact_store is None:
+        return JSONResponse(status_code=404, content={"error": f"No facts for '{collection_name}' (FACT_EXTRACTION is off)"})
+    try:
+        start = time.perf_counter()
+        result = fact_store.query(metric=metric, period=period, table=table, unit=unit,
+                                  op=op, group_by=group_by, exact=exact, limit=limit)
+        return {
+            "status": "success",
+            "collection_name": collection_name,
+            "op": op,
+            **result,
+            "ms": round((time.perf_counter() - start) * 1000, 3)
+        }
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+@app.get("/collection/{collection_name}/summary")
+def get_collection_summary_endpoint(collection_name: str):
+    """Get the precomputed document and section summaries of a collection"""
+    if collection_name not in in_memory_collections:
+        return JSONResponse(status_code=404, content={"error": f"Collection '{collection_name}' not found"})
+    summaries = in_memory_collections[collection_name].get("summaries")
+    if not summaries:
+        return JSONResponse(status_code=404, content={"error": f"No summaries for '{collection_name}' (SUMMARY_PRECOMPUTE is off)"})
+    return {
+        "status": "success",
+        "collection_name": collection_name,
+        "summary_status": summaries.get("status"),
+        "document": summaries.get("document"),
+        "sections": [{key: s.get(key) for key in ("pages", "summary")} for s in summaries.get("sections") or []],
+        "updated_at": summaries.get("updated_at"),
+        "error": summaries.get("error")
+    }
+
+@app.post("/snapshots")
+async def create_snapshot_endpoint(name: str = Query(None, description="Snapshot name (default: timestamp)")):
+    """Snapshot all collections (vectors, payloads and metadata) to disk"""
+    try:
+        start = time.perf_counter()
+        result = await run_in_threadpool(create_snapshot, name)
+        return {"status": "success", **result, "seconds": round(time.perf_counter() - start, 3)}
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": f"Failed to create snapshot: {str(e)}"})
+
+@app.get("/snapshots")
+async def list_snapshots_endpoint():
+    """List available snapshots, newest first"""
+    snapshots = list_snapshots(SNAPSHOT_DIR)
+    return {"status": "success", "snapshots": snapshots, "count": len(snapshots)}
+
+@app.post("/snapshots/{name}/restore")
+async def restore_snapshot_endpoint(name: str):
+    """Restore collections from a snapshot (use 'latest' for the newest)"""
+    try:
+        start = time.perf_counter()
+        result = await run_in_threadpool(restore_snapshot, name)
+        return {"status": "success", **result, "seconds": round(time.perf_counter() - start, 3)}
+    except ValueError as e:
+        return JSONResponse(status_code=404, content={"error": str(e)})
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": f"Failed to restore snapshot: {str(e)}"})
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Stage latency histograms and request/error counters in the Prometheus text format"""
+    scheduler = llm_scheduler.stats()
+    for state in ("queued", "running", "in_flight_prompts"):
+        LLM_QUEUE.set(scheduler[state], state=state)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/ready")
+async def readiness_endpoint():
+    """Readiness probe: 200 once the embedding model is loaded, 503 before"""
+    report = startup_report()
+    ready = report["model_loaded"] and report["warmup"]["status"] != "failed"
+    return JSONResponse(status_code=200 if ready else 503, content={
+        "status": "ready" if ready else "starting",
+        **report
+    })
+
+@app.get("/startup")
+async def startup_report_endpoint():
+    """Startup-time report: import and model load timings"""
+    return {"status": "success", **startup_report()}
+
+@app.on_event("startup")
+def restore_collections():
+    """Bring back persisted collections (on-disk/server mode, shared state) and/or a configured snapshot"""
+    started = time.perf_counter()
+    if shared_state is not None:
+        # Every worker loads what is already published; the leader (slot 0) does the one-off work below
+        worker_slot()
+        sync_shared_collections()
+        threading.Thread(target=shared_sync_loop, name="shared-sync", daemon=True).start()
+        threading.Thread(target=shared_job_loop, name="shared-jobs", daemon=True).start()
+    restore_collections_from_storage()
+    if worker_slot() == 0:
+        if shared_state is not None:
+            shared_state.prune_jobs(SHARED_JOB_STALE_SECONDS)
+        if RESTORE_SNAPSHOT:
+            restore_snapshot(RESTORE_SNAPSHOT)
+        # Build summaries missing from older metadata or interrupted by a restart
+        for collection_name, entry in list(in_memory_collections.items()):
+            if (entry.get("summaries") or {}).get("status") != "ready":
+                schedule_summaries(collection_name)
+    record_startup("restore_collections", started)
+    if WARMUP_ON_STARTUP:
+        threading.Thread(target=warm_up, name="warmup", daemon=True).start()
+
+@app.on_event("shutdown")
+def shutdown_ingestion():
+    """Stop ingestion workers when the server shuts down"""
+    job_manager.shutdown(wait=False)
+    summary_executor.shutdown(wait=False)
+    batch_llm_executor.shutdown(wait=False)
+    multi_search_executor.shutdown(wait=False)
+    shutdown_pool()
+    if _embedding_cache is not None:
+        _embedding_cache.flush()
+    # Release the on-disk storage lock cleanly rather than at interpreter exit
+    if _qdrant_client is not None:
+        _qdrant_client.close()
+
+record_startup("import:app", _app_import_started)
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", "8000")))
\ No newline at end of file
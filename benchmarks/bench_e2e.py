@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+End-to-End Benchmark
+Starts the app under uvicorn with the deterministic fake LLM (LLM_PROVIDER=fake),
+uploads synthetic financial reports and drives /fin_chat under concurrent load.
+Reports ingest pages/sec and chunks/sec, chat latency percentiles and
+throughput per concurrency level (successful answers only; non-2xx responses
+are counted separately), and the server's peak RSS. Runs fully offline
+with --fake-embeddings.
+
+Usage:
+    python benchmarks/bench_e2e.py [--pages 50,200] [--requests 200] [--concurrency 1,8]
+                                   [--llm-latency-ms 300] [--fake-embeddings] [--workers 4]
+                                   [--output e2e.json] [--compare baseline.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from synthetic_pdf import LINE_ITEMS, SEGMENTS, write_pdf  # noqa: E402
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Higher is better for these; everything else (latencies, memory) is lower-is-better
+HIGHER_IS_BETTER = ("pages_per_sec", "chunks_per_sec", "requests_per_sec")
+
+
+def start_server(port: int, env: dict, workers: int = 1):
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=REPO_ROOT, env={**os.environ, **env}
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 300
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            if requests.get(f"{base_url}/ready", timeout=2).status_code == 200:
+                return process, base_url
+        except requests.exceptions.ConnectionError:
+            pass
+        time.sleep(0.25)
+    process.terminate()
+    raise RuntimeError("Server did not become ready within 300s")
+
+
+def peak_rss_mb(pid: int):
+    """Summed peak resident set size of a process and its children, i.e. all workers (Linux /proc; None elsewhere)"""
+    try:
+        children = Path(f"/proc/{pid}/task/{pid}/children").read_text().split()
+        total_kb = 0
+        for process_id in [pid] + [int(child) for child in children]:
+            for line in Path(f"/proc/{process_id}/status").read_text().splitlines():
+                if line.startswith("VmHWM:"):
+                    total_kb += int(line.split()[1])
+        return round(total_kb / 1024, 1)
+    except OSError:
+        return None
+
+
+def ingest(base_url: str, pages: int, seed: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = write_pdf(Path(tmp) / f"bench_{pages}p.pdf", pages, seed=seed)
+        started = time.perf_counter()
+        with open(pdf_path, "rb") as f:
+            response = requests.post(f"{base_url}/upload_pdf", params={"wait": "true", "mode": "full"},
+                                     files={"file": (pdf_path.name, f, "application/pdf")})
+        seconds = time.perf_counter() - started
+    response.raise_for_status()
+    chunks = response.json()["doc_count"]
+    return {
+        "collection": response.json()["collection_name"],
+        "pages": pages,
+        "chunks": chunks,
+        "seconds": round(seconds, 3),
+        "pages_per_sec": round(pages / seconds, 2),
+        "chunks_per_sec": round(chunks / seconds, 2)
+    }
+
+
+def make_questions(count: int, seed: int, summary_share: float):
+    rng = random.Random(seed)
+    questions = []
+    for _ in range(count):
+        if rng.random() < summary_share:
+            questions.append("Give me a summary of this report")
+        else:
+            questions.append(f"What was {rng.choice(LINE_ITEMS)} for {rng.choice(SEGMENTS)} "
+                             f"in FY{rng.randint(2019, 2024)}?")
+    return questions
+
+
+def percentile(sorted_values, q: float):
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+
+def wait_for_workers(base_url: str, collections, workers: int, timeout: float = 300):
+    """Wait until every worker has loaded ``collections`` (published by whichever worker took the uploads)
+
+    Each probe opens a new connection, so the kernel hands it to any worker;
+    ``20 * workers`` consecutive probes listing every collection leave a
+    worker that hasn't loaded them a ~e^-20 chance of going unnoticed.
+    """
+    needed, streak = 20 * workers, 0
+    deadline = time.time() + timeout
+    while streak < needed:
+        if time.time() > deadline:
+            raise RuntimeError(f"Collections not loaded by every worker within {timeout:.0f}s")
+        loaded = requests.get(f"{base_url}/collections", headers={"Connection": "close"}).json()["collections"]
+        if set(collections) <= set(loaded):
+            streak += 1
+        else:
+            streak = 0
+            time.sleep(0.1)
+
+
+def chat_load(base_url: str, collections, questions, concurrency: int):
+    """Send every question once, ``concurrency`` at a time; one HTTP session per worker thread
+
+    Non-2xx answers (e.g. ``409`` not_ready) are counted by status code and
+    left out of the latencies and throughput, which cover successful answers only.
+    """
+    local = threading.local()
+
+    def ask(i: int):
+        session = getattr(local, "session", None) or requests.Session()
+        local.session = session
+        started = time.perf_counter()
+        response = session.post(f"{base_url}/fin_chat", params={
+            "collection_name": collections[i % len(collections)], "message": questions[i]
+        })
+        return (time.perf_counter() - started) * 1000, response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(ask, range(len(questions))))
+    wall = time.perf_counter() - started
+
+    latencies = sorted(ms for ms, status in results if 200 <= status < 300)
+    failed = {}
+    for _, status in results:
+        if not 200 <= status < 300:
+            failed[str(status)] = failed.get(str(status), 0) + 1
+    return {
+        "requests": len(results),
+        "ok": len(latencies),
+        "errors": len(results) - len(latencies),
+        "error_statuses": failed,
+        "requests_per_sec": round(len(latencies) / wall, 2),
+        "p50_ms": round(statistics.median(latencies), 1) if latencies else None,
+        "p95_ms": round(percentile(latencies, 0.95), 1) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99), 1) if latencies else None,
+        "max_ms": round(latencies[-1], 1) if latencies else None
+    }
+
+
+def flatten(results):
+    """``{"ingest.200p.pages_per_sec": ..., "chat.c8.p95_ms": ..., "peak_rss_mb": ...}`` for comparisons"""
+    flat = {}
+    for run in results["ingest"]:
+        for key in ("pages_per_sec", "chunks_per_sec", "seconds"):
+            flat[f"ingest.{run['pages']}p.{key}"] = run[key]
+    for level, run in results["chat"].items():
+        for key in ("requests_per_sec", "p50_ms", "p95_ms", "p99_ms"):
+            flat[f"chat.{level}.{key}"] = run[key]
+    flat["peak_rss_mb"] = results["peak_rss_mb"]
+    return flat
+
+
+def print_report(results, baseline=None):
+    flat = flatten(results)
+    before = flatten(baseline) if baseline else {}
+    print(f"\n{'Metric':<34}{'Value':>12}" + (f"{'Baseline':>12}{'Change':>10}" if baseline else ""))
+    for key, value in flat.items():
+        line = f"{key:<34}{value if value is not None else '-':>12}"
+        if baseline:
+            old = before.get(key)
+            if value is None or not old:
+                line += f"{old if old is not None else '-':>12}{'-':>10}"
+            else:
+                change = (value - old) / old * 100
+                better = change > 0 if key.endswith(HIGHER_IS_BETTER) else change < 0
+                line += f"{old:>12}{change:>+9.1f}%" + (" ✅" if better and abs(change) >= 5 else
+                                                        " ⚠️" if abs(change) >= 5 else "")
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end ingest and chat benchmark with a fake LLM")
+    parser.add_argument("--pages", default="50,200", help="Comma-separated synthetic PDF sizes to ingest")
+    parser.add_argument("--requests", type=int, default=200, help="Chat requests per concurrency level")
+    parser.add_argument("--concurrency", default="1,8", help="Comma-separated client concurrency levels")
+    parser.add_argument("--llm-latency-ms", type=float, default=300, help="Simulated LLM time per call")
+    parser.add_argument("--summary-share", type=float, default=0.1, help="Fraction of summary requests")
+    parser.add_argument("--fake-embeddings", action="store_true", help="Deterministic embeddings (no model download)")
+    parser.add_argument("--answer-cache", action="store_true", help="Keep the answer cache on (off by default)")
+    parser.add_argument("--workers", type=int, default=1, help="Server worker processes (shared state when > 1)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON from a previous --output to diff against")
+    args = parser.parse_args()
+
+    env = {
+        "LLM_PROVIDER": "fake",
+        "FAKE_LLM_LATENCY_MS": str(args.llm_latency_ms),
+        "EMBED_CACHE_MAX_ENTRIES": "0",  # measure real embedding work on every run
+        "SUMMARY_PRECOMPUTE": "false",  # no background LLM work competing with the load
+        "ANSWER_CACHE_SIZE": "1024" if args.answer_cache else "0",
+        "QDRANT_PATH": ""
+    }
+    if args.fake_embeddings:
+        env["EMBED_PROVIDER"] = "fake"
+    shared_dir = tempfile.TemporaryDirectory() if args.workers > 1 else None
+    if shared_dir is not None:
+        env["SHARED_STATE_DIR"] = shared_dir.name
+    config = {**{key: value for key, value in vars(args).items() if key not in ("output", "compare", "port")},
+              "python": platform.python_version(), "cpus": os.cpu_count()}
+
+    process, base_url = start_server(args.port, env, args.workers)
+    try:
+        print(f"🚀 Server ready at {base_url} (pid {process.pid})")
+        ingest_runs = []
+        for pages in [int(p) for p in args.pages.split(",")]:
+            run = ingest(base_url, pages, args.seed)
+            ingest_runs.append(run)
+            print(f"📄 {pages} pages -> {run['chunks']} chunks in {run['seconds']:.1f}s "
+                  f"({run['pages_per_sec']} pages/s, {run['chunks_per_sec']} chunks/s)")
+
+        collections = [run["collection"] for run in ingest_runs]
+        if args.workers > 1:
+            wait_for_workers(base_url, collections, args.workers)
+            print(f"🔄 Collections loaded on all {args.workers} workers")
+        chat = {}
+        for concurrency in [int(c) for c in args.concurrency.split(",")]:
+            questions = make_questions(args.requests, args.seed + concurrency, args.summary_share)
+            chat[f"c{concurrency}"] = run = chat_load(base_url, collections, questions, concurrency)
+            print(f"💬 concurrency {concurrency}: {run['requests_per_sec']} req/s, p50 {run['p50_ms']} ms, "
+                  f"p95 {run['p95_ms']} ms, p99 {run['p99_ms']} ms, {run['errors']} errors"
+                  + (f" {run['error_statuses']} (excluded)" if run["errors"] else ""))
+        rss = peak_rss_mb(process.pid)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        if shared_dir is not None:
+            shared_dir.cleanup()
+
+    results = {"config": config, "ingest": ingest_runs, "chat": chat, "peak_rss_mb": rss}
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    print_report(results, baseline)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"\n💾 Saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
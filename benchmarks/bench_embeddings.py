@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Embedding Backend Benchmark
+Compares the embedding backends (PyTorch sentence-transformers vs quantized
+ONNX Runtime through FastEmbed) on the same model: load time, single-query
+latency, chunk throughput for ingestion, and query throughput/latency under
+concurrency, with each query embedded on its own and through the
+micro-batching layer the app uses (EMBED_QUERY_BATCHING).
+
+Usage:
+    python benchmarks/bench_embeddings.py [--backends huggingface,onnx] [--threads 4]
+                                          [--queries 256] [--concurrency 1,8,32] [--chunks 256]
+                                          [--output emb.json] [--compare baseline.json]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from embedding_backends import MicroBatchingEmbeddings, load_embeddings  # noqa: E402
+from synthetic_pdf import LINE_ITEMS, SEGMENTS, page_lines  # noqa: E402
+
+EMBED_DIM = 384
+CHUNK_CHARS = 800  # app chunk size
+
+# Higher is better for these; everything else (latencies, load time) is lower-is-better
+HIGHER_IS_BETTER = ("chunks_per_sec", "queries_per_sec")
+
+
+def make_questions(count: int, seed: int):
+    """Distinct questions, so neither the batcher's dedupe nor its recent-query cache kicks in"""
+    combos = list(itertools.product(LINE_ITEMS, SEGMENTS, range(2015, 2025)))
+    random.Random(seed).shuffle(combos)
+    return [f"What was {item} for {segment} in FY{year}? (#{i})"
+            for i, (item, segment, year) in enumerate(itertools.islice(itertools.cycle(combos), count))]
+
+
+def make_chunks(count: int, seed: int):
+    rng = random.Random(seed)
+    chunks, current = [], ""
+    for page in itertools.count(1):
+        for line in page_lines(page, rng):
+            current += line + "\n"
+            if len(current) >= CHUNK_CHARS:
+                chunks.append(current[:CHUNK_CHARS])
+                current = ""
+                if len(chunks) == count:
+                    return chunks
+
+
+def percentile(sorted_values, q: float):
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+
+def query_load(embed_query, questions, concurrency: int):
+    """Embed every question once, ``concurrency`` callers at a time"""
+    def embed(question):
+        started = time.perf_counter()
+        embed_query(question)
+        return (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = sorted(pool.map(embed, questions))
+    wall = time.perf_counter() - started
+    return {
+        "queries_per_sec": round(len(questions) / wall, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2)
+    }
+
+
+def bench_backend(backend: str, args):
+    started = time.perf_counter()
+    model = load_embeddings(backend, args.model, EMBED_DIM, threads=args.threads, batch_size=args.batch_size)
+    model.embed_query("warm up")  # first inference pays one-off kernel setup
+    result = {"load_seconds": round(time.perf_counter() - started, 2)}
+
+    questions = make_questions(args.queries, args.seed)
+    single = []
+    for question in questions[:min(len(questions), 64)]:
+        call_started = time.perf_counter()
+        model.embed_query(question)
+        single.append((time.perf_counter() - call_started) * 1000)
+    single.sort()
+    result["single_query"] = {"p50_ms": round(statistics.median(single), 2), "p95_ms": round(percentile(single, 0.95), 2)}
+
+    chunks = make_chunks(args.chunks, args.seed)
+    call_started = time.perf_counter()
+    for start in range(0, len(chunks), args.batch_size):
+        model.embed_documents(chunks[start:start + args.batch_size])
+    result["chunks_per_sec"] = round(len(chunks) / (time.perf_counter() - call_started), 1)
+
+    result["queries"] = {}
+    for concurrency in [int(c) for c in args.concurrency.split(",")]:
+        batched = MicroBatchingEmbeddings(model, max_batch=args.max_batch, max_wait=args.batch_wait_ms / 1000,
+                                          cache_size=0)
+        result["queries"][f"c{concurrency}"] = {
+            "direct": query_load(model.embed_query, questions, concurrency),
+            "batched": {**query_load(batched.embed_query, questions, concurrency),
+                        "avg_batch": batched.stats()["avg_batch"]}
+        }
+    return result
+
+
+def flatten(results):
+    """``{"onnx.chunks_per_sec": ..., "onnx.c8.batched.p95_ms": ...}`` for comparisons"""
+    flat = {}
+    for backend, run in results["backends"].items():
+        flat[f"{backend}.load_seconds"] = run["load_seconds"]
+        flat[f"{backend}.single.p50_ms"] = run["single_query"]["p50_ms"]
+        flat[f"{backend}.chunks_per_sec"] = run["chunks_per_sec"]
+        for level, modes in run["queries"].items():
+            for mode, stats in modes.items():
+                for key in ("queries_per_sec", "p50_ms", "p95_ms"):
+                    flat[f"{backend}.{level}.{mode}.{key}"] = stats[key]
+    return flat
+
+
+def print_report(results, baseline=None):
+    flat = flatten(results)
+    before = flatten(baseline) if baseline else {}
+    print(f"\n{'Metric':<42}{'Value':>12}" + (f"{'Baseline':>12}{'Change':>10}" if baseline else ""))
+    for key, value in flat.items():
+        line = f"{key:<42}{value:>12}"
+        if baseline:
+            old = before.get(key)
+            if not old:
+                line += f"{old if old is not None else '-':>12}{'-':>10}"
+            else:
+                change = (value - old) / old * 100
+                better = change > 0 if key.endswith(HIGHER_IS_BETTER) else change < 0
+                line += f"{old:>12}{change:>+9.1f}%" + (" ✅" if better and abs(change) >= 5 else
+                                                        " ⚠️" if abs(change) >= 5 else "")
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding backend and query micro-batching benchmark")
+    parser.add_argument("--backends", default="huggingface,onnx", help="Comma-separated EMBED_PROVIDER values")
+    parser.add_argument("--model", default="BAAI/bge-small-en-v1.5", help="Model name (or local path for huggingface)")
+    parser.add_argument("--threads", type=int, default=0, help="Intra-op CPU threads (0 = library default)")
+    parser.add_argument("--batch-size", type=int, default=32, help="Chunks per embedding call (EMBED_BATCH_SIZE)")
+    parser.add_argument("--queries", type=int, default=256, help="Queries per concurrency level")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrent callers")
+    parser.add_argument("--chunks", type=int, default=256, help="800-character chunks for the ingest throughput test")
+    parser.add_argument("--max-batch", type=int, default=32, help="Micro-batch size limit (EMBED_QUERY_MAX_BATCH)")
+    parser.add_argument("--batch-wait-ms", type=float, default=0, help="Micro-batch straggler wait (EMBED_QUERY_BATCH_WAIT_MS)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON from a previous --output to diff against")
+    args = parser.parse_args()
+
+    results = {
+        "config": {**{key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+                   "python": platform.python_version(), "cpus": os.cpu_count()},
+        "backends": {}
+    }
+    for backend in args.backends.split(","):
+        try:
+            run = bench_backend(backend, args)
+        except Exception as e:
+            print(f"⚠️  Skipping {backend}: {str(e)}")
+            continue
+        results["backends"][backend] = run
+        print(f"🧮 {backend}: loaded in {run['load_seconds']}s, single query p50 {run['single_query']['p50_ms']} ms, "
+              f"{run['chunks_per_sec']} chunks/s")
+        for level, modes in run["queries"].items():
+            print(f"   {level}: direct {modes['direct']['queries_per_sec']} q/s (p95 {modes['direct']['p95_ms']} ms), "
+                  f"batched {modes['batched']['queries_per_sec']} q/s (p95 {modes['batched']['p95_ms']} ms, "
+                  f"avg batch {modes['batched']['avg_batch']})")
+
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    print_report(results, baseline)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"\n💾 Saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
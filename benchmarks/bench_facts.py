@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Fact Store Benchmark
+Answers "what was <line item> for <segment> in FY<year>?" questions from a
+synthetic report two ways: a direct fact store query and the RAG agent
+(retrieval + LLM). Reports latency percentiles and accuracy against the
+figures the PDF was generated from.
+
+Usage:
+    python benchmarks/bench_facts.py [--pages 100] [--queries 50] [--fake-llm] [--output facts.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Keep the run self-contained: in-memory Qdrant, no background summaries, no cached answers
+os.environ.pop("QDRANT_PATH", None)
+os.environ["SUMMARY_PRECOMPUTE"] = "false"
+os.environ["FACT_EXTRACTION"] = "true"
+os.environ["ANSWER_CACHE_SIZE"] = "0"
+
+import app  # noqa: E402
+from synthetic_pdf import LINE_ITEMS, page_lines, write_pdf  # noqa: E402
+
+COLLECTION = "bench_facts"
+SEED = 42  # write_pdf's default seed
+HEADER_PATTERN = re.compile(r"Operations - (.+) \(in millions\)")
+ROW_PATTERN = re.compile(r"^(%s)\s+([\d,]+)\s+([\d,]+)$" % "|".join(re.escape(item) for item in LINE_ITEMS))
+
+
+def expected_facts(pages: int):
+    """Replay the generator to get (item, segment, year) -> set of reported values"""
+    rng = random.Random(SEED)
+    truth = {}
+    for page_number in range(pages):
+        lines = page_lines(page_number, rng)
+        year = 2020 + (page_number % 5)
+        segment = None
+        for line in lines:
+            header = HEADER_PATTERN.search(line)
+            if header:
+                segment = header.group(1)
+            row = ROW_PATTERN.match(line)
+            if row and segment:
+                item, prior, current = row.groups()
+                truth.setdefault((item, segment, year - 1), set()).add(float(prior.replace(",", "")))
+                truth.setdefault((item, segment, year), set()).add(float(current.replace(",", "")))
+    return truth
+
+
+def percentiles(latencies):
+    latencies = sorted(latencies)
+    return {
+        "p50": round(statistics.median(latencies), 3),
+        "p95": round(latencies[int(0.95 * (len(latencies) - 1))], 3)
+    }
+
+
+def run_facts(fact_store, queries):
+    latencies, correct = [], 0
+    for (item, segment, year), values in queries:
+        start = time.perf_counter()
+        result = fact_store.query(metric=item, period=f"FY{year}", table=segment, exact=False)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found = {fact["value"] for fact in result["facts"] if fact["metric"].lower() == item.lower()}
+        correct += bool(found & values)
+    return {"accuracy": round(correct / len(queries), 3), "latency_ms": percentiles(latencies)}
+
+
+def run_rag(agent, queries):
+    latencies, correct = [], 0
+    for (item, segment, year), values in queries:
+        start = time.perf_counter()
+        answer = str(agent(f"What was {item} for the {segment} segment in FY{year}, in millions?"))
+        latencies.append((time.perf_counter() - start) * 1000)
+        numbers = {float(n.replace(",", "")) for n in re.findall(r"\d[\d,]*(?:\.\d+)?", answer)}
+        correct += bool(numbers & values)
+    return {"accuracy": round(correct / len(queries), 3), "latency_ms": percentiles(latencies)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fact store queries against the RAG path")
+    parser.add_argument("--pages", type=int, default=100, help="Pages in the synthetic PDF")
+    parser.add_argument("--queries", type=int, default=50, help="Questions to ask each path")
+    parser.add_argument("--seed", type=int, default=7, help="Seed for picking questions")
+    parser.add_argument("--fake-llm", action="store_true",
+                        help="Replace the LLM with a canned reply (measures retrieval overhead only)")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    if args.fake_llm:
+        from langchain_core.language_models import FakeListChatModel
+        app.get_llm = lambda: FakeListChatModel(responses=["I could not find that figure."])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = write_pdf(Path(tmp) / "report.pdf", args.pages)
+        start = time.perf_counter()
+        app.create_or_refresh_store_from_file(COLLECTION, str(pdf_path), "report.pdf")
+        print(f"📄 Ingested {args.pages} pages in {time.perf_counter() - start:.1f}s")
+
+    fact_store = app.in_memory_collections[COLLECTION]["fact_store"]
+    truth = expected_facts(args.pages)
+    queries = sorted(truth.items())
+    random.Random(args.seed).shuffle(queries)
+    queries = queries[:args.queries]
+    print(f"🔢 {len(fact_store)} facts ({fact_store.nbytes} bytes), {len(queries)} queries")
+
+    results = {"facts": run_facts(fact_store, queries)}
+    results["rag"] = run_rag(app.pipeline_registry.get(COLLECTION)["agent"], queries)
+
+    print(f"\n{'Path':<8}{'accuracy':>10}{'p50 ms':>12}{'p95 ms':>12}")
+    for name, result in results.items():
+        print(f"{name:<8}{result['accuracy']:>10.3f}{result['latency_ms']['p50']:>12.3f}{result['latency_ms']['p95']:>12.3f}")
+    if args.fake_llm:
+        print("\nℹ️  --fake-llm: RAG accuracy is not meaningful, latency excludes the LLM call")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({"pages": args.pages, "queries": len(queries),
+                                                 "fake_llm": args.fake_llm, **results}, indent=2))
+        print(f"\n💾 Saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+PDF Parse Benchmark
+Times page-parallel parsing against the serial PyPDFLoader on a synthetic
+multi-hundred-page report and checks that both produce identical Documents.
+
+Usage:
+    python benchmarks/bench_pdf_parse.py [--pages 500] [--workers 1,2,4,8] [--repeat 3]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from langchain_community.document_loaders import PyPDFLoader  # noqa: E402
+
+from pdf_parsing import load_pdf, shutdown_pool  # noqa: E402
+from synthetic_pdf import write_pdf  # noqa: E402
+
+
+def time_call(func, repeat: int):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark page-parallel PDF parsing")
+    parser.add_argument("--pages", type=int, default=500, help="Pages in the synthetic PDF")
+    parser.add_argument("--workers", default=None, help="Comma-separated worker counts (default: 1,2,4..CPU count)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per configuration (median reported)")
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    if args.workers:
+        worker_counts = [int(w) for w in args.workers.split(",")]
+    else:
+        worker_counts = sorted({1, cpus} | {2 ** i for i in range(1, 6) if 2 ** i < cpus})
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = str(write_pdf(Path(tmp_dir) / "synthetic_report.pdf", args.pages))
+        print(f"📄 Synthetic report: {args.pages} pages, {os.path.getsize(pdf_path):,} bytes, {cpus} CPUs")
+
+        baseline, expected = time_call(lambda: PyPDFLoader(pdf_path).load(), args.repeat)
+        print(f"\n{'Parser':<24}{'Seconds':>10}{'Pages/sec':>12}{'Speedup':>10}")
+        print(f"{'PyPDFLoader (serial)':<24}{baseline:>10.3f}{args.pages / baseline:>12.1f}{1.0:>10.2f}")
+
+        for workers in worker_counts:
+            # Warm the pool once so process start-up isn't counted against every run
+            load_pdf(pdf_path, workers=workers)
+            elapsed, docs = time_call(lambda: load_pdf(pdf_path, workers=workers), args.repeat)
+            identical = [(d.page_content, d.metadata) for d in docs] == [(d.page_content, d.metadata) for d in expected]
+            label = f"parallel x{workers}"
+            print(f"{label:<24}{elapsed:>10.3f}{args.pages / elapsed:>12.1f}{baseline / elapsed:>10.2f}"
+                  f"{'' if identical else '  ❌ output differs'}")
+
+    shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
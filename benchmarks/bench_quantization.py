@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Quantization Benchmark
+Memory, recall@k and search latency of float32 vectors vs Qdrant-style
+scalar int8 quantization, with and without rescoring against the float32
+originals.
+
+Qdrant's local mode ignores quantization, so the int8 search is emulated with
+NumPy the way Qdrant does it (one value range for the whole collection,
+clipped at QUANTIZATION_QUANTILE, oversampled candidates rescored with the
+originals). Recall and memory carry over to a Qdrant server; the latencies
+compare NumPy implementations, not Qdrant's SIMD kernels.
+
+Usage:
+    python benchmarks/bench_quantization.py [--pages 100] [--random 200000] [--queries 200] [--k 3]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("EMBED_CACHE_MAX_ENTRIES", "0")
+
+import app  # noqa: E402
+from synthetic_pdf import LINE_ITEMS, SEGMENTS, write_pdf  # noqa: E402
+
+
+def report_vectors(pages: int, queries: int, seed: int):
+    """Embeddings of the synthetic report's chunks plus generated questions"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = write_pdf(Path(tmp) / "report.pdf", pages)
+        chunks = [chunk.page_content for chunk in app.iter_chunks(app.load_pdf_pages(str(pdf_path)))]
+    rng = random.Random(seed)
+    questions = [
+        f"What was {rng.choice(LINE_ITEMS)} for {rng.choice(SEGMENTS)} in FY{rng.randint(2019, 2024)}?"
+        for _ in range(queries)
+    ]
+    embedder = app.get_embedder()
+    return np.asarray(embedder.embed_documents(chunks), dtype=np.float32), \
+        np.asarray(embedder.embed_documents(questions), dtype=np.float32)
+
+
+def random_vectors(count: int, queries: int, seed: int):
+    """Clustered random unit vectors (a stand-in for many filings' chunks)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(count // 200, 1), app.EMBED_DIM)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), count)] + 0.5 * rng.standard_normal((count, app.EMBED_DIM)).astype(np.float32)
+    picked = vectors[rng.integers(0, count, queries)] + 0.3 * rng.standard_normal((queries, app.EMBED_DIM)).astype(np.float32)
+    return vectors, picked
+
+
+def normalize(vectors):
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def quantize(vectors, quantile: float):
+    """uint8 codes with one offset/scale for the whole collection, clipped at ``quantile``"""
+    low, high = np.quantile(vectors, [(1 - quantile) / 2, 1 - (1 - quantile) / 2])
+    scale = (high - low) / 255
+    codes = np.clip(np.rint((vectors - low) / scale), 0, 255).astype(np.uint8)
+    return codes, float(low), float(scale)
+
+
+def top_k(scores, k: int):
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def search_int8(codes, code_sums, low, scale, query, k: int, rescore_with=None, oversampling: float = 1.0):
+    """Approximate dot products from codes; optionally rescore oversampled candidates with originals"""
+    query_codes = np.clip(np.rint((query - low) / scale), 0, 255).astype(np.float32)
+    # x.q ~ scale^2 (c.d) + scale * low * (sum c + sum d) + dim * low^2; the last terms only shift scores
+    scores = scale * scale * (codes @ query_codes) + scale * low * code_sums
+    if rescore_with is None:
+        return top_k(scores, k)
+    candidates = top_k(scores, min(len(scores), max(k, int(k * oversampling))))
+    return candidates[top_k(rescore_with[candidates] @ query, k)]
+
+
+def evaluate(search, queries, exact, k: int):
+    latencies, recall = [], []
+    for query, expected in zip(queries, exact):
+        start = time.perf_counter()
+        found = search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+        recall.append(len(set(found.tolist()) & set(expected.tolist())) / k)
+    latencies.sort()
+    return {
+        "recall": round(statistics.mean(recall), 4),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))], 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark float32 vs int8 quantized vector search")
+    parser.add_argument("--pages", type=int, default=100, help="Pages in the synthetic PDF (ignored with --random)")
+    parser.add_argument("--random", type=int, default=0, help="Use this many clustered random vectors instead")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3, help="Results per query (QA_K in the app)")
+    parser.add_argument("--oversampling", default="1,2,4", help="Rescoring oversampling factors to try")
+    parser.add_argument("--quantile", type=float, default=app.QUANTIZATION_QUANTILE)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    if args.random:
+        vectors, queries = random_vectors(args.random, args.queries, args.seed)
+    else:
+        vectors, queries = report_vectors(args.pages, args.queries, args.seed)
+    vectors, queries = normalize(vectors), normalize(queries)
+    count, dim = vectors.shape
+    k = min(args.k, count)
+    print(f"🔢 {count} vectors x {dim} dims, {len(queries)} queries, k={k}")
+
+    exact = [top_k(vectors @ query, k) for query in queries]
+    codes, low, scale = quantize(vectors, args.quantile)
+    code_sums = codes.sum(axis=1, dtype=np.float32)
+
+    float32_bytes = count * dim * 4
+    int8_bytes = count * (dim + 4)  # codes plus a float32 correction per vector
+    results = {"float32": {"ram_bytes": float32_bytes, "disk_bytes": 0,
+                           **evaluate(lambda q: top_k(vectors @ q, k), queries, exact, k)}}
+    results["int8"] = {"ram_bytes": int8_bytes, "disk_bytes": 0,
+                       **evaluate(lambda q: search_int8(codes, code_sums, low, scale, q, k), queries, exact, k)}
+    for factor in [float(f) for f in args.oversampling.split(",")]:
+        results[f"int8+rescore x{factor:g}"] = {
+            "ram_bytes": int8_bytes, "disk_bytes": float32_bytes,
+            **evaluate(lambda q: search_int8(codes, code_sums, low, scale, q, k, rescore_with=vectors,
+                                             oversampling=factor), queries, exact, k)
+        }
+
+    print(f"\n{'Mode':<22}{'RAM MB':>10}{'disk MB':>10}{'recall@' + str(k):>11}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, result in results.items():
+        print(f"{name:<22}{result['ram_bytes'] / 1e6:>10.2f}{result['disk_bytes'] / 1e6:>10.2f}"
+              f"{result['recall']:>11.4f}{result['p50_ms']:>10.3f}{result['p95_ms']:>10.3f}")
+    print(f"\nℹ️  int8 keeps {int8_bytes / float32_bytes:.0%} of the float32 vector RAM; "
+          "rescoring reads the float32 originals from disk")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({"vectors": count, "dim": dim, "queries": len(queries), "k": k,
+                                                 "quantile": args.quantile, "results": results}, indent=2))
+        print(f"\n💾 Saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Retrieval Benchmark
+Compares dense-only retrieval with hybrid BM25 + dense retrieval (reciprocal
+rank fusion) on a synthetic report: recall@k and per-query latency for
+figure, line-item and fiscal-year lookups.
+
+Usage:
+    python benchmarks/bench_retrieval.py [--pages 100] [--queries 200] [--k 1,3,5,10] [--output retrieval.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Keep the run self-contained: in-memory Qdrant, no background summaries, no shared embedding cache
+os.environ.pop("QDRANT_PATH", None)
+os.environ["SUMMARY_PRECOMPUTE"] = "false"
+os.environ["HYBRID_SEARCH"] = "true"
+os.environ["EMBED_CACHE_MAX_ENTRIES"] = "0"
+
+import app  # noqa: E402
+from hybrid_retriever import HybridRetriever  # noqa: E402
+from synthetic_pdf import LINE_ITEMS, write_pdf  # noqa: E402
+
+COLLECTION = "bench_retrieval"
+ROW_PATTERN = re.compile(r"^(%s)\s+([\d,]+)\s+([\d,]+)$" % "|".join(re.escape(item) for item in LINE_ITEMS), re.M)
+HEADER_PATTERN = re.compile(r"Operations - (.+) \(in millions\)")
+YEARS_PATTERN = re.compile(r"FY(\d{4})\s+FY(\d{4})")
+
+
+def stored_chunks():
+    """(point id, text, page) for every chunk in the benchmark collection"""
+    chunks, offset = [], None
+    while True:
+        points, offset = app.get_qdrant_client().scroll(collection_name=COLLECTION, limit=256, offset=offset, with_payload=True)
+        chunks.extend((str(p.id), p.payload["page_content"], p.payload["metadata"].get("page")) for p in points)
+        if offset is None:
+            return chunks
+
+
+def build_queries(chunks, count: int, seed: int):
+    """Questions about table rows, each with the ids of chunks that contain the answer"""
+    facts = []
+    for point_id, text, page in chunks:
+        header, years = HEADER_PATTERN.search(text), YEARS_PATTERN.search(text)
+        for item, prior, current in ROW_PATTERN.findall(text):
+            facts.append({"item": item, "prior": prior, "current": current, "page": page,
+                          "segment": header.group(1) if header else None,
+                          "years": years.groups() if years else None})
+    rng = random.Random(seed)
+    rng.shuffle(facts)
+
+    queries = []
+    for fact in facts[:count]:
+        value = fact["current"]
+        kind = rng.choice(["figure", "line_item"] if fact["segment"] and fact["years"] else ["figure"])
+        if kind == "figure":
+            question = f"Which line item was reported as {value} million?"
+        else:
+            question = f"What was {fact['item']} for {fact['segment']} in FY{fact['years'][1]}?"
+        row = re.compile(r"^%s\s+%s\s+%s$" % (re.escape(fact["item"]), re.escape(fact["prior"]), re.escape(value)), re.M)
+        relevant = {point_id for point_id, text, page in chunks if page == fact["page"] and row.search(text)}
+        queries.append({"kind": kind, "question": question, "relevant": relevant})
+    return queries
+
+
+def evaluate(retrieve, queries, ks):
+    """recall@k per query kind plus latency percentiles for ``retrieve(question, k)``"""
+    max_k = max(ks)
+    hits = {k: {} for k in ks}
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        ids = [str(doc.metadata.get("_id")) for doc in retrieve(query["question"], max_k)]
+        latencies.append((time.perf_counter() - start) * 1000)
+        for k in ks:
+            found = bool(query["relevant"] & set(ids[:k]))
+            for kind in (query["kind"], "all"):
+                hits[k].setdefault(kind, []).append(found)
+    latencies.sort()
+    return {
+        "recall": {f"@{k}": {kind: round(sum(v) / len(v), 3) for kind, v in hits[k].items()} for k in ks},
+        "latency_ms": {
+            "p50": round(statistics.median(latencies), 2),
+            "p95": round(latencies[int(0.95 * (len(latencies) - 1))], 2)
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dense vs hybrid retrieval")
+    parser.add_argument("--pages", type=int, default=100, help="Pages in the synthetic PDF")
+    parser.add_argument("--queries", type=int, default=200, help="Questions to evaluate")
+    parser.add_argument("--k", default="1,3,5,10", help="Comma-separated cut-offs for recall@k")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+    ks = [int(k) for k in args.k.split(",")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = write_pdf(Path(tmp) / "report.pdf", args.pages)
+        start = time.perf_counter()
+        app.create_or_refresh_store_from_file(COLLECTION, str(pdf_path), "report.pdf")
+        print(f"📄 Ingested {args.pages} pages in {time.perf_counter() - start:.1f}s")
+
+    chunks = stored_chunks()
+    queries = build_queries(chunks, args.queries, args.seed)
+    index = app.get_sparse_index(COLLECTION)
+    print(f"🔎 {len(chunks)} chunks, {index.vocabulary_size} BM25 terms, {len(queries)} queries")
+
+    store = app.load_qdrant_store(COLLECTION)
+    results = {
+        "dense": evaluate(lambda q, k: store.similarity_search(q, k=k), queries, ks),
+        "hybrid": evaluate(
+            lambda q, k: HybridRetriever(store=store, sparse_index=lambda: index, k=k,
+                                         fetch_k=max(app.HYBRID_FETCH_K, k), rrf_k=app.RRF_K).invoke(q),
+            queries, ks
+        )
+    }
+
+    kinds = sorted({query["kind"] for query in queries}) + ["all"]
+    print(f"\n{'Retriever':<10}{'k':>4}" + "".join(f"{kind:>12}" for kind in kinds) + f"{'p50 ms':>10}{'p95 ms':>10}")
+    for name, result in results.items():
+        for k in ks:
+            recall = result["recall"][f"@{k}"]
+            print(f"{name:<10}{k:>4}" + "".join(f"{recall.get(kind, 0):>12.3f}" for kind in kinds)
+                  + f"{result['latency_ms']['p50']:>10.2f}{result['latency_ms']['p95']:>10.2f}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({"pages": args.pages, "queries": len(queries), **results}, indent=2))
+        print(f"\n💾 Saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
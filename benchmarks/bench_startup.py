@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark
+Measures cold-start cost in fresh interpreters: importing app.py, then the
+warm-up steps (heavy imports, embedding model load, first inference).
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--output startup.json] [--compare baseline.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter() - started
+app.warm_up()
+report = app.startup_report()
+report["timings"]["import:app(wall)"] = round(imported, 4)
+print(json.dumps(report))
+"""
+
+
+def run_probe():
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=REPO_ROOT, capture_output=True, text=True,
+        env={**os.environ, "WARMUP_ON_STARTUP": "false"}
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "probe failed")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark app cold start")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to start")
+    parser.add_argument("--output", help="Write median timings to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON from a previous --output to diff against")
+    args = parser.parse_args()
+
+    samples = {}
+    for run in range(args.runs):
+        report = run_probe()
+        if report["warmup"]["status"] == "failed":
+            print(f"⚠️  Warm-up failed on run {run + 1}: {report['warmup']['error']}")
+        for step, seconds in report["timings"].items():
+            samples.setdefault(step, []).append(seconds)
+
+    medians = {step: round(statistics.median(values), 4) for step, values in samples.items()}
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else {}
+
+    print(f"\n{'Step':<36}{'Median s':>10}" + (f"{'Baseline':>10}{'Delta':>10}" if baseline else ""))
+    for step, seconds in medians.items():
+        line = f"{step:<36}{seconds:>10.3f}"
+        if baseline:
+            before = baseline.get(step)
+            line += f"{before:>10.3f}{seconds - before:>+10.3f}" if before is not None else f"{'-':>10}{'-':>10}"
+        print(line)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(medians, indent=2))
+        print(f"\n💾 Saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Synthetic Financial PDF Generator
+Writes deterministic multi-page "annual report" PDFs for benchmarking, with no
+dependencies beyond the standard library.
+"""
+
+import random
+import sys
+from pathlib import Path
+
+SEGMENTS = ["Data Center", "Gaming", "Professional Visualization", "Automotive", "OEM and Other"]
+LINE_ITEMS = [
+    "Revenue", "Cost of revenue", "Gross profit", "Research and development",
+    "Sales, general and administrative", "Operating income", "Interest income",
+    "Net income", "Capital expenditures", "Free cash flow"
+]
+RISK_TOPICS = [
+    "supply chain concentration", "export controls", "foreign exchange movements",
+    "customer concentration", "cybersecurity incidents", "interest rate changes",
+    "litigation and regulatory proceedings", "macroeconomic conditions"
+]
+NARRATIVE = [
+    "Management believes the {segment} segment will continue to benefit from {topic}.",
+    "During fiscal {year}, {segment} revenue grew as customers expanded deployments.",
+    "The Company is exposed to risks related to {topic}, which could affect results.",
+    "Operating expenses in fiscal {year} reflected continued investment in {segment}.",
+    "Liquidity remains strong, and the Company expects capital spending to fund {segment} growth.",
+    "Results for fiscal {year} may not be indicative of future performance given {topic}.",
+]
+
+LINES_PER_PAGE = 46
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def page_lines(page_number: int, rng: random.Random, company: str = "Example Corp"):
+    """Generate the text lines for one synthetic report page"""
+    year = 2020 + (page_number % 5)
+    lines = [f"{company} Annual Report - Fiscal {year}", f"Page {page_number + 1}", ""]
+    if page_number % 4 == 0:
+        # Tabular page: a consolidated statement with figures by fiscal year
+        segment = SEGMENTS[page_number % len(SEGMENTS)]
+        lines.append(f"Consolidated Statement of Operations - {segment} (in millions)")
+        lines.append(f"{'Line item':<36}{'FY' + str(year - 1):>14}{'FY' + str(year):>14}")
+        for item in LINE_ITEMS:
+            prior = rng.randint(500, 60000)
+            current = int(prior * rng.uniform(0.8, 1.6))
+            lines.append(f"{item:<36}{prior:>14,}{current:>14,}")
+        lines.append("")
+    while len(lines) < LINES_PER_PAGE:
+        template = rng.choice(NARRATIVE)
+        lines.append(template.format(
+            segment=rng.choice(SEGMENTS), topic=rng.choice(RISK_TOPICS), year=year
+        ))
+    return lines
+
+
+def build_pdf(pages: int, seed: int = 42, company: str = "Example Corp") -> bytes:
+    """Build a synthetic financial report PDF with ``pages`` pages"""
+    rng = random.Random(seed)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>",
+    ]
+    kids = []
+    for page_number in range(pages):
+        stream = ["BT", "/F1 9 Tf", "11 TL", f"40 {PAGE_HEIGHT - 50} Td"]
+        for line in page_lines(page_number, rng, company):
+            stream.append(f"({_escape(line)}) Tj T*")
+        stream.append("ET")
+        content = "\n".join(stream).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        content_ref = len(objects)
+        objects.append((
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Contents {content_ref} 0 R /Resources << /Font << /F1 3 0 R >> >> >>"
+        ).encode())
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def write_pdf(path, pages: int, seed: int = 42, company: str = "Example Corp") -> Path:
+    """Write a synthetic report to ``path`` and return it"""
+    path = Path(path)
+    path.write_bytes(build_pdf(pages, seed=seed, company=company))
+    return path
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python benchmarks/synthetic_pdf.py <output.pdf> <pages> [seed]")
+        sys.exit(1)
+    target = write_pdf(sys.argv[1], int(sys.argv[2]), seed=int(sys.argv[3]) if len(sys.argv) > 3 else 42)
+    print(f"📄 Wrote {target} ({target.stat().st_size:,} bytes)")
@@ -0,0 +1,166 @@
+"""
+Context Packing
+Assembles the retrieved chunks into the context passed to the LLM. Chunks
+are split with a 200-character overlap, so neighbours retrieved together
+repeat text: chunks from the same page that overlap are merged back into one
+passage, near-duplicates are dropped with maximal marginal relevance (MMR)
+over word overlap, and the remaining passages are packed in MMR order into a
+token budget (the last one is cut at a sentence or word boundary).
+
+Works on LangChain ``Document``-like objects (``page_content`` and
+``metadata``) without importing LangChain.
+"""
+
+from llm_scheduler import CHARS_PER_TOKEN
+from sparse_index import tokenize
+
+MIN_OVERLAP_CHARS = 20  # shorter suffix/prefix matches are coincidence, not chunk overlap
+MAX_OVERLAP_CHARS = 400  # longest overlap looked for (the splitter uses 200)
+MIN_PARTIAL_TOKENS = 64  # a passage is only cut to fit if at least this much of it fits
+
+
+def count_tokens(text: str) -> int:
+    """Estimated tokens, the same estimate the LLM scheduler charges"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def overlap_length(left: str, right: str) -> int:
+    """Length of the longest suffix of ``left`` that starts ``right`` (0 below MIN_OVERLAP_CHARS)"""
+    for size in range(min(len(left), len(right), MAX_OVERLAP_CHARS), MIN_OVERLAP_CHARS - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def join_overlapping(texts):
+    """Concatenate consecutive chunks, dropping the text each repeats from the one before"""
+    joined = []
+    for text in texts:
+        if joined:
+            overlap = overlap_length(joined[-1], text)
+            if overlap:
+                joined[-1] += text[overlap:]
+                continue
+        joined.append(text)
+    return "\n\n".join(joined)
+
+
+def _merge(left: str, right: str):
+    """``left`` and ``right`` as one passage if one contains or overlaps the other, else None"""
+    if right in left:
+        return left
+    if left in right:
+        return right
+    overlap = overlap_length(left, right)
+    if overlap:
+        return left + right[overlap:]
+    overlap = overlap_length(right, left)
+    if overlap:
+        return right + left[overlap:]
+    return None
+
+
+def _page_key(doc):
+    metadata = doc.metadata
+    return (metadata.get("collection"), metadata.get("source") or metadata.get("filename"), metadata.get("page"))
+
+
+def merge_passages(docs):
+    """``[(text, doc, rank)]``: overlapping chunks of the same page merged, in order of their best rank"""
+    passages = []  # [text, first doc, best rank, page key]
+    for rank, doc in enumerate(docs):
+        key = _page_key(doc)
+        current = [doc.page_content, doc, rank, key]
+        # Absorb every passage of the same page this one overlaps (a middle chunk can bridge two)
+        for passage in [p for p in passages if p[3] == key]:
+            merged = _merge(passage[0], current[0])
+            if merged is not None:
+                passages.remove(passage)
+                current = [merged, passage[1], passage[2], key]
+        passages.append(current)
+    passages.sort(key=lambda passage: passage[2])
+    return [(text, doc, rank) for text, doc, rank, _ in passages]
+
+
+def _similarity(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def mmr_order(texts, lambda_mult: float = 0.7, duplicate_similarity: float = 0.9):
+    """Indices of ``texts`` (given in relevance order) in MMR order, without near-duplicates
+
+    Relevance falls linearly with retrieval rank; redundancy is the highest
+    word-set (Jaccard) similarity to an already selected passage. Passages at
+    least ``duplicate_similarity`` similar to a selected one are dropped.
+    """
+    terms = [set(tokenize(text)) for text in texts]
+    remaining = list(range(len(texts)))
+    selected = []
+    while remaining:
+        best, best_score = None, None
+        for i in list(remaining):
+            redundancy = max((_similarity(terms[i], terms[j]) for j in selected), default=0.0)
+            if redundancy >= duplicate_similarity:
+                remaining.remove(i)
+                continue
+            score = lambda_mult * (1 - i / len(texts)) - (1 - lambda_mult) * redundancy
+            if best_score is None or score > best_score:
+                best, best_score = i, score
+        if best is None:
+            break
+        selected.append(best)
+        remaining.remove(best)
+    return selected
+
+
+def truncate_to_tokens(text: str, tokens: int) -> str:
+    """Cut ``text`` to about ``tokens`` tokens at the last sentence end, or else word boundary"""
+    limit = tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    sentence_end = max(cut.rfind(". "), cut.rfind(".\n"), cut.rfind("\n"))
+    if sentence_end >= limit // 2:
+        return cut[:sentence_end + 1].rstrip()
+    space = cut.rfind(" ")
+    return cut[:space].rstrip() if space > 0 else cut
+
+
+def pack_context(docs, token_budget: int = 0, lambda_mult: float = 0.7, duplicate_similarity: float = 0.9):
+    """Merge, dedupe and budget retrieved ``docs`` (best first)
+
+    Returns ``(packed_docs, stats)``. Packed docs are new documents with the
+    metadata of their best-ranked chunk; ``token_budget`` of 0 means no
+    budget. ``stats`` has chunk counts and the estimated context tokens
+    before and after packing.
+    """
+    docs = list(docs)
+    passages = merge_passages(docs)
+    order = mmr_order([text for text, _, _ in passages], lambda_mult, duplicate_similarity)
+
+    packed, used, truncated, over_budget = [], 0, 0, 0
+    for i in order:
+        text, doc, _ = passages[i]
+        tokens = count_tokens(text)
+        remaining = token_budget - used if token_budget else tokens
+        if tokens > remaining:
+            if remaining < MIN_PARTIAL_TOKENS and packed:
+                over_budget += 1
+                continue
+            text = truncate_to_tokens(text, remaining)
+            tokens = count_tokens(text)
+            truncated += 1
+        packed.append(type(doc)(page_content=text, metadata=dict(doc.metadata)))
+        used += tokens
+
+    stats = {
+        "chunks": len(docs),
+        "passages": len(packed),
+        "merged": len(docs) - len(passages),
+        "duplicates": len(passages) - len(order),
+        "truncated": truncated,
+        "over_budget": over_budget,
+        "tokens_before": sum(count_tokens(doc.page_content) for doc in docs),
+        "tokens_after": used
+    }
+    return packed, stats
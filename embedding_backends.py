@@ -0,0 +1,153 @@
+"""
+Embedding Backends
+Builds the embedding model selected by EMBED_PROVIDER and batches concurrent
+query embeddings:
+
+- ``huggingface``: BGE-small through sentence-transformers on PyTorch
+- ``onnx``: the same model exported to ONNX with int8 weights, run by ONNX
+  Runtime through FastEmbed (``pip install fastembed``)
+- ``fake``: deterministic hash vectors for offline benchmarks
+
+Imported lazily by app.py together with the rest of the LangChain stack.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from langchain_core.embeddings import Embeddings
+
+PROVIDERS = ("huggingface", "onnx", "fake")
+
+
+def load_embeddings(provider: str, model_name: str, dim: int, threads: int = 0, batch_size: int = 32) -> Embeddings:
+    """Embedding model for ``provider``; ``threads`` > 0 fixes the model's intra-op CPU threads"""
+    if provider == "fake":
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        return DeterministicFakeEmbedding(size=dim)
+    if provider == "onnx":
+        return OnnxEmbeddings(model_name, threads=threads, batch_size=batch_size)
+    if provider == "huggingface":
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        from langchain_huggingface import HuggingFaceEmbeddings
+        return HuggingFaceEmbeddings(model_name=model_name, encode_kwargs={"batch_size": batch_size})
+    raise ValueError(f"Unknown EMBED_PROVIDER '{provider}' (expected one of {', '.join(PROVIDERS)})")
+
+
+class OnnxEmbeddings(Embeddings):
+    """Quantized ONNX export of the model on ONNX Runtime, via FastEmbed
+
+    FastEmbed downloads the model's ONNX export (int8-quantized for
+    BGE-small) on first use. ``threads`` of 0 lets ONNX Runtime use every
+    core. Vectors come back unit-normalized, which cosine search and the
+    answer cache treat the same as PyTorch's unnormalized ones.
+    """
+
+    def __init__(self, model_name: str, threads: int = 0, batch_size: int = 32):
+        try:
+            from fastembed import TextEmbedding
+        except ImportError:
+            raise RuntimeError("EMBED_PROVIDER=onnx needs FastEmbed: pip install fastembed")
+        self.model = TextEmbedding(model_name=model_name, threads=threads or None)
+        self.batch_size = batch_size
+
+    def embed_documents(self, texts):
+        return [vector.tolist() for vector in self.model.embed(list(texts), batch_size=self.batch_size)]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class MicroBatchingEmbeddings(Embeddings):
+    """Embeds concurrent ``embed_query`` calls together in one model call
+
+    Queries are queued for a single background thread. While it runs one
+    batch, newly arriving queries pile up and become the next batch, so an
+    idle model answers a lone query right away and a busy one batches
+    automatically. ``max_wait`` optionally holds a batch a little longer for
+    stragglers. Identical queries in a batch are embedded once, and recent
+    query vectors are kept in a small LRU: a chat embeds its question for the
+    answer-cache lookup and again for retrieval.
+
+    ``embed_documents`` (ingestion, already batched) goes straight to the
+    wrapped model. Batching assumes queries and documents are embedded the
+    same way, which holds for BGE-small on every backend here.
+    """
+
+    def __init__(self, base: Embeddings, max_batch: int = 32, max_wait: float = 0.0, cache_size: int = 256):
+        self.base = base
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.cache_size = cache_size
+        self._recent = OrderedDict()
+        self._pending = []  # (text, future)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._counts = {"queries": 0, "recent_hits": 0, "batches": 0, "embedded": 0}
+
+    def embed_documents(self, texts):
+        return self.base.embed_documents(texts)
+
+    def embed_query(self, text):
+        future = Future()
+        with self._cond:
+            self._counts["queries"] += 1
+            vector = self._recent.get(text)
+            if vector is not None:
+                self._recent.move_to_end(text)
+                self._counts["recent_hits"] += 1
+                return list(vector)
+            self._pending.append((text, future))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return list(future.result())
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            deadline = time.monotonic() + self.max_wait
+            while len(self._pending) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                vectors = dict(zip(texts, self.base.embed_documents(texts)))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            with self._cond:
+                self._counts["batches"] += 1
+                self._counts["embedded"] += len(texts)
+                if self.cache_size > 0:
+                    for text, vector in vectors.items():
+                        self._recent[text] = vector
+                        self._recent.move_to_end(text)
+                    while len(self._recent) > self.cache_size:
+                        self._recent.popitem(last=False)
+            for text, future in batch:
+                future.set_result(vectors[text])
+
+    def stats(self):
+        with self._cond:
+            counts = dict(self._counts)
+            queued = len(self._pending)
+        return {
+            **counts,
+            "queued": queued,
+            "avg_batch": round(counts["embedded"] / counts["batches"], 2) if counts["batches"] else 0.0
+        }
@@ -0,0 +1,176 @@
+"""
+Embedding Cache
+Content-addressed cache of chunk embeddings, stored as float32 rows in a
+memory-mapped file, so re-uploaded or amended filings only embed new text.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+KEY_BYTES = 32  # sha256 digest
+
+
+def cache_key(model_name: str, text: str) -> bytes:
+    """Content address of a chunk: sha256 of the model name plus the chunk text"""
+    return hashlib.sha256(f"{model_name}\x00{text}".encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """Fixed-capacity LRU store of embeddings keyed by ``cache_key``
+
+    Vectors live in ``vectors.npy`` (an ``(max_entries, dim)`` float32
+    memmap) and slot keys in ``keys.npy``, so the cache survives restarts.
+    Least-recently-used slots are overwritten once the cache is full.
+    """
+
+    def __init__(self, cache_dir, dim: int, max_entries: int):
+        self.dim = dim
+        self.max_entries = max_entries
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._vectors_path = self.cache_dir / "vectors.npy"
+        self._keys_path = self.cache_dir / "keys.npy"
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._open()
+
+    def _open(self):
+        shape = (self.max_entries, self.dim)
+        vectors = keys = None
+        if self._vectors_path.exists() and self._keys_path.exists():
+            try:
+                vectors = np.load(self._vectors_path, mmap_mode="r+")
+                keys = np.load(self._keys_path)
+                if vectors.shape != shape or vectors.dtype != np.float32 or keys.shape != (self.max_entries, KEY_BYTES):
+                    vectors = keys = None  # capacity or model dimension changed: start over
+            except (OSError, ValueError):
+                vectors = keys = None
+        if vectors is None:
+            vectors = np.lib.format.open_memmap(self._vectors_path, mode="w+", dtype=np.float32, shape=shape)
+            keys = np.zeros((self.max_entries, KEY_BYTES), dtype=np.uint8)
+        self._vectors = vectors
+        self._keys = keys
+        # Recency order is not persisted; reloaded entries start in slot order
+        self._index = OrderedDict()
+        self._free = []
+        for slot in range(self.max_entries):
+            key = keys[slot].tobytes()
+            if any(key):
+                self._index[key] = slot
+            else:
+                self._free.append(slot)
+        self._free.reverse()
+        self._dirty = False
+
+    def get_many(self, keys):
+        """Return a list with the cached vector (or None) for each key"""
+        found = []
+        with self._lock:
+            for key in keys:
+                slot = self._index.get(key)
+                if slot is None:
+                    found.append(None)
+                    self.misses += 1
+                else:
+                    self._index.move_to_end(key)
+                    found.append(np.array(self._vectors[slot]))
+                    self.hits += 1
+        return found
+
+    def put_many(self, keys, vectors):
+        """Store vectors under their keys, evicting least-recently-used entries"""
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                slot = self._index.get(key)
+                if slot is None:
+                    if self._free:
+                        slot = self._free.pop()
+                    else:
+                        _, slot = self._index.popitem(last=False)
+                        self.evictions += 1
+                    self._keys[slot] = np.frombuffer(key, dtype=np.uint8)
+                self._index[key] = slot
+                self._index.move_to_end(key)
+                self._vectors[slot] = np.asarray(vector, dtype=np.float32)
+            self._dirty = True
+
+    def flush(self):
+        """Persist vectors and the key table to disk"""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._vectors.flush()
+            tmp_path = self._keys_path.with_suffix(".tmp.npy")
+            np.save(tmp_path, self._keys)
+            tmp_path.replace(self._keys_path)
+            self._dirty = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._index),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size_bytes": self.max_entries * self.dim * 4
+            }
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves chunk vectors from an EmbeddingCache
+
+    Only cache misses are sent to the wrapped model, in batches of
+    ``batch_size``. Each wrapper keeps its own hit/miss counters, so one
+    instance per ingestion reports that collection's cache usage.
+    """
+
+    def __init__(self, base: Embeddings, cache: EmbeddingCache, model_name: str, batch_size: int = 32):
+        self.base = base
+        self.cache = cache
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts):
+        keys = [cache_key(self.model_name, text) for text in texts]
+        vectors = self.cache.get_many(keys)
+
+        # Embed each distinct missing text once
+        missing = OrderedDict()
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(keys[i], texts[i])
+        self.hits += len(texts) - sum(1 for v in vectors if v is None)
+        self.misses += len(missing)
+
+        missing_keys = list(missing.keys())
+        computed = {}
+        for start in range(0, len(missing_keys), self.batch_size):
+            batch_keys = missing_keys[start:start + self.batch_size]
+            batch_vectors = self.base.embed_documents([missing[key] for key in batch_keys])
+            self.cache.put_many(batch_keys, batch_vectors)
+            computed.update(zip(batch_keys, batch_vectors))
+
+        return [
+            vector.tolist() if vector is not None else list(computed[key])
+            for key, vector in zip(keys, vectors)
+        ]
+
+    def embed_query(self, text):
+        return self.base.embed_query(text)
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,252 @@
+"""
+Fact Store
+Numeric facts (metric, period, value, unit, page) extracted from the tables
+in a document, held as NumPy columns for millisecond filtering and
+aggregation without the LLM.
+"""
+
+import re
+
+import numpy as np
+
+# Period labels in table headers: FY2024, FY 24, Q1 FY26, Q3 2024, 2024, Apr 27, 2025
+PERIOD_PATTERN = re.compile(
+    r"(?:Q[1-4]\s*)?FY\s*'?\d{2}(?:\d{2})?\b"
+    r"|(?:Q[1-4]\s+)?(?<![\d,.])(?:19|20)\d{2}(?![\d,.])"
+    r"|\b[A-Z][a-z]{2}\.? \d{1,2}, (?:19|20)\d{2}\b"
+)
+VALUE_PATTERN = re.compile(r"\(?-?\$?\s?\d[\d,]*(?:\.\d+)?\)?\s?%?|[—–]")
+ROW_PATTERN = re.compile(r"^(?P<label>[A-Za-z](?:[^\d$()]|\([A-Za-z ,]+\))*?)[\s.:]+(?P<values>(?:\$?\s*\(?-?\d[\d,]*(?:\.\d+)?\)?\s?%?|[—–])(?:\s+.*)?)$")
+UNIT_PATTERN = re.compile(r"in (thousands|millions|billions)", re.I)
+
+OPERATIONS = ("list", "sum", "avg", "min", "max", "count", "change")
+GROUP_BY = ("metric", "period", "table", "unit", "page")
+
+
+def normalize_metric(label: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", label.lower()).split())
+
+
+def normalize_period(label: str) -> str:
+    """``FY 24`` -> ``FY2024``, ``Q1 FY26`` -> ``Q1FY2026``; other labels lose their spaces"""
+    period = re.sub(r"[\s'.,]", "", label.upper())
+    return re.sub(r"FY(\d{2})$", r"FY20\1", period)
+
+
+MONTHS = ["JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"]
+
+
+def period_sort_key(period: str):
+    """Chronological key for normalized periods (year, then quarter or month)"""
+    years = re.findall(r"(?:19|20)\d{2}", period)
+    quarter = re.match(r"Q([1-4])", period)
+    month = period[:3] if period[:3] in MONTHS else None
+    within = int(quarter.group(1)) if quarter else (MONTHS.index(month) + 1 if month else 0)
+    return (int(years[-1]) if years else 0, within, period)
+
+
+def parse_value(token: str):
+    """``$1,234`` -> 1234.0, ``(56)`` -> -56.0, ``12.5%`` -> 12.5; dashes mean no value"""
+    token = token.strip()
+    if token in ("—", "–"):
+        return None
+    negative = token.startswith("(") or token.startswith("-")
+    digits = re.sub(r"[^\d.]", "", token)
+    if not digits:
+        return None
+    value = float(digits)
+    return -value if negative else value
+
+
+def extract_facts(text: str, page=None):
+    """Find period-headed tables in page text and return their facts as dicts"""
+    facts = []
+    lines = [line.strip() for line in text.splitlines()]
+    i = 0
+    while i < len(lines):
+        # A header has two or more period labels and no other numbers
+        periods = PERIOD_PATTERN.findall(lines[i])
+        if len(periods) < 2 or re.search(r"\d", PERIOD_PATTERN.sub("", lines[i])):
+            i += 1
+            continue
+
+        # Title and unit come from the lines just above the header
+        context = [line for line in lines[max(0, i - 3):i] if line]
+        title = context[-1] if context else ""
+        unit_match = UNIT_PATTERN.search(" ".join(context + [lines[i]]))
+        table_unit = unit_match.group(1).lower() if unit_match else ""
+        table = UNIT_PATTERN.sub("", title).strip(" ()-,") if not PERIOD_PATTERN.search(title) else ""
+        periods = [normalize_period(p) for p in periods]
+
+        i += 1
+        while i < len(lines):
+            row = ROW_PATTERN.match(lines[i])
+            if not row:
+                break
+            tokens = VALUE_PATTERN.findall(row.group("values"))
+            if len(tokens) >= len(periods):
+                # Extra columns (e.g. % change) follow the period columns
+                for period, token in zip(periods, tokens):
+                    value = parse_value(token)
+                    if value is None:
+                        continue
+                    label = row.group("label").strip(" .:")
+                    if token.strip().endswith("%"):
+                        unit = "%"
+                    else:
+                        unit = "per share" if "per share" in label.lower() else table_unit
+                    facts.append({
+                        "metric": label,
+                        "period": period,
+                        "value": value,
+                        "unit": unit,
+                        "page": page,
+                        "table": table
+                    })
+            i += 1
+    return facts
+
+
+class FactStore:
+    """Columnar store: int32 codes for metric/period/unit/table, float64 values, int32 pages"""
+
+    def __init__(self, facts=()):
+        self._vocab = {"metric": [], "period": [], "unit": [], "table": []}
+        self._labels = []  # original metric label per metric code
+        codes = {name: {} for name in self._vocab}
+        columns = {name: [] for name in self._vocab}
+        values, pages = [], []
+        for fact in facts:
+            for name in self._vocab:
+                key = normalize_metric(fact[name]) if name == "metric" else fact[name]
+                if key not in codes[name]:
+                    codes[name][key] = len(self._vocab[name])
+                    self._vocab[name].append(key)
+                    if name == "metric":
+                        self._labels.append(fact["metric"])
+                columns[name].append(codes[name][key])
+            values.append(fact["value"])
+            pages.append(-1 if fact.get("page") is None else fact["page"])
+        self._codes = {name: np.asarray(column, dtype=np.int32) for name, column in columns.items()}
+        self.values = np.asarray(values, dtype=np.float64)
+        self.pages = np.asarray(pages, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.values.nbytes + self.pages.nbytes + sum(c.nbytes for c in self._codes.values()))
+
+    def metrics(self):
+        return list(self._labels)
+
+    def periods(self):
+        return list(self._vocab["period"])
+
+    def _match(self, name: str, wanted: str, exact: bool = False):
+        """Codes of vocabulary entries matching a filter (substring match unless ``exact``)"""
+        if name == "metric":
+            wanted = normalize_metric(wanted)
+        elif name == "period":
+            wanted = normalize_period(wanted)
+        wanted = wanted.lower()
+        vocab = self._vocab[name]
+        return [code for code, entry in enumerate(vocab)
+                if (entry.lower() == wanted if exact else wanted in entry.lower())]
+
+    def _row(self, i: int):
+        return {
+            "metric": self._labels[self._codes["metric"][i]],
+            "period": self._vocab["period"][self._codes["period"][i]],
+            "value": float(self.values[i]),
+            "unit": self._vocab["unit"][self._codes["unit"][i]],
+            "page": int(self.pages[i]) + 1 if self.pages[i] >= 0 else None,
+            "table": self._vocab["table"][self._codes["table"][i]]
+        }
+
+    def query(self, metric: str = None, period: str = None, table: str = None, unit: str = None,
+              op: str = "list", group_by: str = None, exact: bool = False, limit: int = 100):
+        """Filter facts and optionally aggregate them
+
+        Filters match case-insensitive substrings of the normalized metric,
+        period and table names (``exact`` requires equality). ``op`` is one
+        of OPERATIONS; aggregates are computed per ``group_by`` value, and
+        ``change`` returns period-over-period changes per metric and table.
+        """
+        if op not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{op}'. Use one of {list(OPERATIONS)}")
+        if group_by is not None and group_by not in GROUP_BY:
+            raise ValueError(f"Cannot group by '{group_by}'. Use one of {list(GROUP_BY)}")
+
+        mask = np.ones(len(self.values), dtype=bool)
+        for name, wanted in (("metric", metric), ("period", period), ("table", table), ("unit", unit)):
+            if wanted:
+                mask &= np.isin(self._codes[name], self._match(name, wanted, exact))
+        rows = np.flatnonzero(mask)
+
+        if op == "list":
+            return {"count": int(len(rows)), "facts": [self._row(i) for i in rows[:limit]]}
+        if op == "change":
+            return {"count": int(len(rows)), "series": self._changes(rows)[:limit]}
+
+        reducer = {"sum": np.sum, "avg": np.mean, "min": np.min, "max": np.max, "count": len}[op]
+        if group_by is None:
+            value = reducer(self.values[rows]) if len(rows) else None
+            return {"count": int(len(rows)), "value": None if value is None else float(value)}
+        keys = self.pages[rows] if group_by == "page" else self._codes[group_by][rows]
+        groups = []
+        for key in np.unique(keys):
+            selected = rows[keys == key]
+            if group_by == "page":
+                label = int(key) + 1 if key >= 0 else None
+            elif group_by == "metric":
+                label = self._labels[key]
+            else:
+                label = self._vocab[group_by][key]
+            groups.append({group_by: label, "count": int(len(selected)), "value": float(reducer(self.values[selected]))})
+        if group_by == "period":
+            groups.sort(key=lambda group: period_sort_key(group["period"]))
+        return {"count": int(len(rows)), "groups": groups[:limit]}
+
+    def _changes(self, rows):
+        """Period-over-period change per (metric, table), periods in chronological order"""
+        series = []
+        pairs = np.stack([self._codes["metric"][rows], self._codes["table"][rows]], axis=1) if len(rows) else np.empty((0, 2), dtype=np.int32)
+        for metric_code, table_code in np.unique(pairs, axis=0):
+            selected = rows[(self._codes["metric"][rows] == metric_code) & (self._codes["table"][rows] == table_code)]
+            by_period = {}
+            for i in selected:
+                by_period.setdefault(self._vocab["period"][self._codes["period"][i]], float(self.values[i]))
+            points = []
+            previous = None
+            for period in sorted(by_period, key=period_sort_key):
+                value = by_period[period]
+                point = {"period": period, "value": value}
+                if previous is not None:
+                    point["change"] = round(value - previous, 6)
+                    point["pct_change"] = round((value - previous) / abs(previous) * 100, 2) if previous else None
+                points.append(point)
+                previous = value
+            series.append({"metric": self._labels[metric_code], "table": self._vocab["table"][table_code], "points": points})
+        return series
+
+    def to_dict(self):
+        """JSON-serializable form (codes, values and vocabularies)"""
+        return {
+            "vocab": self._vocab,
+            "labels": self._labels,
+            "codes": {name: column.tolist() for name, column in self._codes.items()},
+            "values": self.values.tolist(),
+            "pages": self.pages.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        store = cls()
+        store._vocab = {name: list(entries) for name, entries in data["vocab"].items()}
+        store._labels = list(data["labels"])
+        store._codes = {name: np.asarray(column, dtype=np.int32) for name, column in data["codes"].items()}
+        store.values = np.asarray(data["values"], dtype=np.float64)
+        store.pages = np.asarray(data["pages"], dtype=np.int32)
+        return store
@@ -0,0 +1,68 @@
+"""
+Fake LLM
+Deterministic local stand-in for the chat model (LLM_PROVIDER=fake), so the
+app can be run and benchmarked without a Groq or OpenAI key. Answers are
+picked from the prompt itself, with optional simulated latency.
+"""
+
+import re
+import time
+from typing import Any, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+WORD_PATTERN = re.compile(r"[a-z0-9][a-z0-9,.]*")
+
+
+def _words(text: str):
+    return set(WORD_PATTERN.findall(text.lower()))
+
+
+class FakeFinanceLLM(BaseChatModel):
+    """Answer with the context line that shares the most words with the question
+
+    Multi-message prompts (QA: context, then question) get the best matching
+    line; single-message prompts (summaries) get the first lines of their
+    content. ``latency`` is slept once per call and ``token_latency`` per
+    streamed word.
+    """
+
+    latency: float = 0.0
+    token_latency: float = 0.0
+    summary_lines: int = 2
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-finance"
+
+    def answer(self, messages: List[BaseMessage]) -> str:
+        texts = [str(message.content) for message in messages]
+        if len(texts) > 1:
+            question = _words(texts[-1])
+            lines = [line.strip() for text in texts[:-1] for line in text.splitlines() if line.strip()]
+            scored = [(len(question & _words(line)), -i, line) for i, line in enumerate(lines)]
+            best = max(scored, default=(0, 0, ""))
+            return best[2] if best[0] else "I don't know."
+        lines = [line.strip() for line in texts[0].splitlines() if line.strip()][1:-1]
+        return " ".join(lines[:self.summary_lines]) or "No content to summarize."
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.answer(messages)))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        if self.latency:
+            time.sleep(self.latency)
+        words = self.answer(messages).split(" ")
+        for i, word in enumerate(words):
+            if self.token_latency:
+                time.sleep(self.token_latency)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word if i == len(words) - 1 else word + " "))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
@@ -5,16 +5,99 @@ A simple client to interact with the Finance Chat API
 """
 
 import requests
+import asyncio
 import json
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from requests.adapters import HTTPAdapter
 
 BASE_URL = "http://127.0.0.1:8000"
+POOL_SIZE = 16            # keep-alive connections per client
+BULK_CONCURRENCY = 4      # files uploaded/ingesting at once in bulk mode
+BULK_RETRIES = 3          # extra attempts per file on connection errors or busy server
+QUESTIONS_PER_BATCH = 50  # questions per /fin_chat/batch call in batch-questions mode
+RETRY_STATUSES = (429, 502, 503, 504)
+MAX_BACKOFF = 30.0
+
+def make_session(pool_size: int = POOL_SIZE):
+    """HTTP session with a keep-alive connection pool sized for concurrent use"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def backoff_seconds(attempt: int, retry_after=None):
+    """Server's Retry-After if given, else exponential backoff (1s, 2s, 4s, ...)"""
+    try:
+        return min(float(retry_after), MAX_BACKOFF)
+    except (TypeError, ValueError):
+        return min(2.0 ** attempt, MAX_BACKOFF)
+
+def read_questions(path):
+    """One question per line; blank lines and # comments are skipped"""
+    lines = Path(path).read_text(encoding="utf-8").splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith("#")]
+
+class BulkProgress:
+    """Thread-safe one-line progress display for bulk uploads"""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+        self.interactive = sys.stdout.isatty()
+
+    def update(self, result: dict):
+        with self.lock:
+            self.done += 1
+            self.failed += result["status"] != "completed"
+            elapsed = time.perf_counter() - self.started
+            icon = "✅" if result["status"] == "completed" else "❌"
+            line = (f"📦 {self.done}/{self.total} files ({self.failed} failed), {elapsed:.0f}s elapsed"
+                    f" | {icon} {result['file']}")
+            if self.interactive:
+                print(f"\r\033[K{line}", end="" if self.done < self.total else "\n", flush=True)
+            else:
+                print(line)
 
 class FinanceChatClient:
-    def __init__(self, base_url: str = BASE_URL):
+    def __init__(self, base_url: str = BASE_URL, pool_size: int = POOL_SIZE):
         self.base_url = base_url
-        
+        # Reuse connections across calls instead of a new TCP connection per request
+        self.session = make_session(pool_size)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _with_retries(self, send, retries: int):
+        """Call ``send()`` until it succeeds, retrying connection errors and busy-server statuses
+
+        Returns ``(response, attempts)``; the last error is raised once retries run out.
+        """
+        for attempt in range(retries + 1):
+            try:
+                response = send()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt == retries:
+                    raise
+                time.sleep(backoff_seconds(attempt))
+                continue
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                return response, attempt + 1
+            time.sleep(backoff_seconds(attempt, response.headers.get("Retry-After")))
+
     def upload_pdf(self, file_path: str):
         """Upload a PDF file to the server"""
         try:
@@ -31,9 +114,23 @@ class FinanceChatClient:
             
             with open(file_path, 'rb') as f:
                 files = {'file': (file_path.name, f, 'application/pdf')}
-                response = requests.post(f"{self.base_url}/upload_pdf", files=files)
+                response = self.session.post(f"{self.base_url}/upload_pdf", files=files)
             
-            if response.status_code == 200:
+            if response.status_code == 202:
+                result = response.json()
+                print(f"⏳ Ingestion queued (job {result.get('job_id')})")
+                job = self.wait_for_job(result.get('job_id'))
+                if not job or job.get('status') != 'completed':
+                    return None
+                print("✅ Upload successful!")
+                print(f"   Collection: {result.get('collection_name')}")
+                print(f"   Chunks: {job.get('progress', {}).get('chunks_total', 0)}")
+                refresh = (job.get('result') or {}).get('refresh')
+                if refresh:
+                    print(f"   Refresh ({refresh.get('mode')}): {refresh.get('added', 0)} added, "
+                          f"{refresh.get('kept', 0)} kept, {refresh.get('removed', 0)} removed")
+                return result.get('collection_name')
+            elif response.status_code == 200:
                 result = response.json()
                 print("✅ Upload successful!")
                 print(f"   Collection: {result.get('collection_name')}")
@@ -51,8 +148,142 @@ class FinanceChatClient:
             print(f"❌ Upload error: {str(e)}")
             return None
     
-    def send_chat_message(self, collection_name: str, message: str):
+    def wait_for_job(self, job_id: str, poll_interval: float = 1.0, quiet: bool = False):
+        """Poll an ingestion job until it finishes, printing progress unless ``quiet``"""
+        try:
+            while True:
+                response = self.session.get(f"{self.base_url}/jobs/{job_id}")
+                if response.status_code != 200:
+                    print(f"❌ Failed to get job status: {response.status_code}")
+                    return None
+                job = response.json().get('job', {})
+                progress = job.get('progress', {})
+                if not quiet:
+                    print(f"   {job.get('stage')}: {progress.get('pages_parsed', 0)} pages parsed, "
+                          f"{progress.get('chunks_embedded', 0)}/{progress.get('chunks_total', 0)} chunks embedded")
+                if job.get('status') in ('completed', 'failed', 'cancelled'):
+                    if job.get('status') != 'completed' and not quiet:
+                        print(f"❌ Ingestion {job.get('status')}: {job.get('error') or ''}")
+                    return job
+                time.sleep(poll_interval)
+        except requests.exceptions.ConnectionError:
+            print("❌ Connection failed. Make sure the server is running at http://localhost:8000")
+            return None
+
+    def _upload_one(self, file_path: Path, retries: int, poll_interval: float):
+        """Upload one file and wait for its ingestion job; returns a result record instead of printing"""
+        started = time.perf_counter()
+        result = {"file": file_path.name, "collection_name": None, "status": "failed",
+                  "chunks": 0, "attempts": 0, "seconds": 0.0, "error": None}
+
+        def send():
+            with open(file_path, 'rb') as f:
+                files = {'file': (file_path.name, f, 'application/pdf')}
+                return self.session.post(f"{self.base_url}/upload_pdf", files=files)
+
+        try:
+            response, result["attempts"] = self._with_retries(send, retries)
+            body = response.json() if response.headers.get('content-type') == 'application/json' else {}
+            result["collection_name"] = body.get('collection_name')
+            if response.status_code == 202:
+                job = self.wait_for_job(body.get('job_id'), poll_interval, quiet=True) or {}
+                result["status"] = job.get('status', 'failed')
+                result["chunks"] = job.get('progress', {}).get('chunks_total', 0)
+                result["error"] = job.get('error')
+            elif response.status_code == 200:
+                result["status"] = "completed"
+                result["chunks"] = body.get('doc_count', 0)
+            else:
+                result["error"] = body.get('error', response.text)
+        except Exception as e:
+            result["error"] = str(e)
+        result["seconds"] = round(time.perf_counter() - started, 2)
+        return result
+
+    def upload_directory(self, directory: str, concurrency: int = BULK_CONCURRENCY, retries: int = BULK_RETRIES,
+                         pattern: str = "*.pdf", poll_interval: float = 1.0):
+        """Upload every PDF in a directory, ``concurrency`` files at a time, with retries and progress
+
+        Busy-server responses (429/5xx) and connection errors are retried with
+        backoff; results come back in file name order.
+        """
+        files = sorted(path for path in Path(directory).glob(pattern) if path.suffix.lower() == '.pdf')
+        if not files:
+            print(f"📁 No PDF files found in {directory}")
+            return []
+
+        print(f"📤 Uploading {len(files)} files from {directory} ({concurrency} at a time)...")
+        progress = BulkProgress(len(files))
+        results = {}
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = {pool.submit(self._upload_one, path, retries, poll_interval): path for path in files}
+            for future in as_completed(futures):
+                results[futures[future]] = result = future.result()
+                progress.update(result)
+
+        ordered = [results[path] for path in files]
+        failed = [result for result in ordered if result["status"] != "completed"]
+        elapsed = time.perf_counter() - progress.started
+        print(f"✅ {len(ordered) - len(failed)}/{len(ordered)} files ingested, "
+              f"{sum(r['chunks'] for r in ordered)} chunks in {elapsed:.1f}s")
+        for result in failed:
+            print(f"❌ {result['file']}: {result['status']} after {result['attempts']} attempt(s): {result['error']}")
+        return ordered
+
+    def ask_file(self, collection_name: str, questions_path: str, output_path: str,
+                 batch_size: int = QUESTIONS_PER_BATCH, retries: int = BULK_RETRIES):
+        """Answer every question in a file and write one JSON line per answer
+
+        Questions go to ``/fin_chat/batch`` ``batch_size`` at a time; lines are
+        written (and flushed) as each batch completes, in question order.
+        """
+        try:
+            questions = read_questions(questions_path)
+        except OSError as e:
+            print(f"❌ Could not read questions: {str(e)}")
+            return None
+        if not questions:
+            print(f"📁 No questions found in {questions_path}")
+            return None
+
+        print(f"💬 Answering {len(questions)} questions against {collection_name} (batches of {batch_size})...")
+        started = time.perf_counter()
+        answered = errors = 0
+        with open(output_path, "w", encoding="utf-8") as out:
+            for offset in range(0, len(questions), batch_size):
+                chunk = questions[offset:offset + batch_size]
+                payload = {"collection_name": collection_name, "questions": chunk}
+                try:
+                    response, _ = self._with_retries(
+                        lambda: self.session.post(f"{self.base_url}/fin_chat/batch", json=payload), retries)
+                except requests.exceptions.ConnectionError:
+                    print("❌ Connection failed. Make sure the server is running at http://localhost:8000")
+                    return None
+                if response.status_code == 409:
+                    print("⏳ Collection is still being ingested, try again shortly")
+                    return None
+                if response.status_code == 200:
+                    records = response.json().get("results", [])
+                else:
+                    error = response.json().get('error', response.text) if response.headers.get('content-type') == 'application/json' else response.text
+                    records = [{"question": q, "response": None, "error": error} for q in chunk]
+                for i, record in enumerate(records):
+                    line = {"index": offset + i, "question": record.get("question"), "response": record.get("response"),
+                            "error": record.get("error"), "latency_ms": record.get("latency_ms"),
+                            "cached": record.get("cached", False)}
+                    out.write(json.dumps(line) + "\n")
+                    errors += bool(line["error"])
+                answered += len(records)
+                out.flush()
+                print(f"   {answered}/{len(questions)} answered ({errors} errors)")
+
+        print(f"✅ Wrote {answered} answers to {output_path} in {time.perf_counter() - started:.1f}s")
+        return {"answered": answered, "errors": errors, "output": output_path}
+
+    def send_chat_message(self, collection_name: str, message: str, stream: bool = False):
         """Send a chat message to the finance chatbot"""
+        if stream:
+            return self.stream_chat_message(collection_name, message)
         try:
             print(f"💬 Asking: {message}")
             print("🤔 Processing...")
@@ -61,8 +292,11 @@ class FinanceChatClient:
                 "collection_name": collection_name,
                 "message": message
             }
-            response = requests.post(f"{self.base_url}/fin_chat", params=params)
+            response = self.session.post(f"{self.base_url}/fin_chat", params=params)
 
+            if response.status_code == 409:
+                print("⏳ Collection is still being ingested, try again shortly")
+                return None
             if response.status_code == 200:
                 result = response.json()
                 print("✅ Response received!")
@@ -81,10 +315,99 @@ class FinanceChatClient:
             print(f"❌ Chat error: {str(e)}")
             return None
     
+    def send_multi_chat_message(self, collection_names, message: str):
+        """Ask one question across several collections (None = all of them)"""
+        try:
+            print(f"💬 Asking across {', '.join(collection_names) if collection_names else 'all collections'}: {message}")
+            print("🤔 Processing...")
+
+            payload = {"message": message, "collection_names": collection_names or None}
+            response = self.session.post(f"{self.base_url}/fin_chat/multi", json=payload)
+
+            if response.status_code == 200:
+                result = response.json()
+                print("✅ Response received!")
+                print(f"🤖 Answer: {result.get('response', 'No response')}")
+                print("📚 Sources:")
+                for source in result.get("sources", []):
+                    print(f"   - {source['collection']} ({source.get('filename')}), page {source.get('page_label')}, score {source['score']}")
+                timings = result.get("timings", {})
+                print(f"⏱️  Search {timings.get('search_ms')} ms (sum over collections {timings.get('search_sum_ms')} ms), total {timings.get('total_ms')} ms")
+                return result
+            else:
+                print(f"❌ Chat failed with status {response.status_code}")
+                error_msg = response.json().get('error', response.text) if response.headers.get('content-type') == 'application/json' else response.text
+                print(f"   Error: {error_msg}")
+                return None
+
+        except requests.exceptions.ConnectionError:
+            print("❌ Connection failed. Make sure the server is running at http://localhost:8000")
+            return None
+        except Exception as e:
+            print(f"❌ Chat error: {str(e)}")
+            return None
+
+    def stream_chat_message(self, collection_name: str, message: str):
+        """Send a chat message and print the answer token by token as it streams"""
+        try:
+            print(f"💬 Asking: {message}")
+            
+            params = {
+                "collection_name": collection_name,
+                "message": message
+            }
+            with self.session.post(f"{self.base_url}/fin_chat/stream", params=params, stream=True) as response:
+                if response.status_code == 409:
+                    print("⏳ Collection is still being ingested, try again shortly")
+                    return None
+                if response.status_code != 200:
+                    print(f"❌ Chat failed with status {response.status_code}")
+                    print(f"   Error: {response.text}")
+                    return None
+
+                result = None
+                for event, data in self._iter_sse(response):
+                    if event == "sources":
+                        pages = [s["page_label"] or s["page"] for s in data.get("sources", [])]
+                        if pages:
+                            print(f"📄 Sources: pages {', '.join(str(p) for p in pages)}")
+                        print("🤖 Answer: ", end="", flush=True)
+                    elif event == "token":
+                        print(data["token"], end="", flush=True)
+                    elif event == "done":
+                        print()
+                        result = data
+                    elif event == "error":
+                        print()
+                        print(f"❌ Chat error: {data.get('error')}")
+                        return None
+                return result
+                
+        except requests.exceptions.ConnectionError:
+            print("❌ Connection failed. Make sure the server is running at http://localhost:8000")
+            return None
+        except Exception as e:
+            print(f"❌ Chat error: {str(e)}")
+            return None
+
+    @staticmethod
+    def _iter_sse(response):
+        """Yield (event, data) pairs from a Server-Sent Events response"""
+        event, data = "message", []
+        for line in response.iter_lines(decode_unicode=True):
+            if not line:
+                if data:
+                    yield event, json.loads("\n".join(data))
+                event, data = "message", []
+            elif line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data.append(line[len("data:"):].strip())
+
     def list_collections(self):
         """List all available collections"""
         try:
-            response = requests.get(f"{self.base_url}/collections")
+            response = self.session.get(f"{self.base_url}/collections")
             if response.status_code == 200:
                 result = response.json()
                 collections = result.get('collections', [])
@@ -102,7 +425,7 @@ class FinanceChatClient:
     def get_collection_info(self, collection_name: str):
         """Get information about a collection"""
         try:
-            response = requests.get(f"{self.base_url}/collection/{collection_name}/info")
+            response = self.session.get(f"{self.base_url}/collection/{collection_name}/info")
             if response.status_code == 200:
                 result = response.json()
                 print(f"📊 Collection Info: {collection_name}")
@@ -116,7 +439,129 @@ class FinanceChatClient:
             print(f"❌ Error getting collection info: {str(e)}")
             return None
 
-def interactive_mode():
+class AsyncFinanceChatClient:
+    """asyncio client over a pooled httpx connection; methods return the API's JSON instead of printing
+
+    Use as ``async with AsyncFinanceChatClient() as client: ...`` to fan out
+    many chats or uploads from one event loop.
+    """
+
+    def __init__(self, base_url: str = BASE_URL, pool_size: int = POOL_SIZE, timeout: float = 300.0):
+        import httpx  # only the async client needs it
+
+        self.base_url = base_url
+        self.client = httpx.AsyncClient(
+            base_url=base_url, timeout=timeout,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        )
+        self._transport_errors = (httpx.TransportError,)
+
+    async def close(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _with_retries(self, send, retries: int):
+        """Async counterpart of ``FinanceChatClient._with_retries``"""
+        for attempt in range(retries + 1):
+            try:
+                response = await send()
+            except self._transport_errors:
+                if attempt == retries:
+                    raise
+                await asyncio.sleep(backoff_seconds(attempt))
+                continue
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                return response, attempt + 1
+            await asyncio.sleep(backoff_seconds(attempt, response.headers.get("Retry-After")))
+
+    async def wait_for_job(self, job_id: str, poll_interval: float = 1.0):
+        """Poll an ingestion job until it completes, fails or is cancelled"""
+        while True:
+            response = await self.client.get(f"/jobs/{job_id}")
+            response.raise_for_status()
+            job = response.json().get("job", {})
+            if job.get("status") in ("completed", "failed", "cancelled"):
+                return job
+            await asyncio.sleep(poll_interval)
+
+    async def upload_pdf(self, file_path: str, retries: int = 0, poll_interval: float = 1.0):
+        """Upload a PDF and wait for ingestion; returns ``{file, collection_name, status, chunks, attempts, seconds, error}``"""
+        file_path = Path(file_path)
+        started = time.perf_counter()
+        result = {"file": file_path.name, "collection_name": None, "status": "failed",
+                  "chunks": 0, "attempts": 0, "seconds": 0.0, "error": None}
+        content = file_path.read_bytes()
+
+        def send():
+            return self.client.post("/upload_pdf", files={"file": (file_path.name, content, "application/pdf")})
+
+        try:
+            response, result["attempts"] = await self._with_retries(send, retries)
+            body = response.json() if response.headers.get("content-type") == "application/json" else {}
+            result["collection_name"] = body.get("collection_name")
+            if response.status_code == 202:
+                job = await self.wait_for_job(body.get("job_id"), poll_interval)
+                result["status"] = job.get("status", "failed")
+                result["chunks"] = job.get("progress", {}).get("chunks_total", 0)
+                result["error"] = job.get("error")
+            elif response.status_code == 200:
+                result["status"] = "completed"
+                result["chunks"] = body.get("doc_count", 0)
+            else:
+                result["error"] = body.get("error", response.text)
+        except Exception as e:
+            result["error"] = str(e)
+        result["seconds"] = round(time.perf_counter() - started, 2)
+        return result
+
+    async def upload_directory(self, directory: str, concurrency: int = BULK_CONCURRENCY,
+                               retries: int = BULK_RETRIES, pattern: str = "*.pdf"):
+        """Upload every PDF in a directory, at most ``concurrency`` at a time; results in file name order"""
+        files = sorted(path for path in Path(directory).glob(pattern) if path.suffix.lower() == ".pdf")
+        progress = BulkProgress(len(files))
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def upload(path):
+            async with semaphore:
+                result = await self.upload_pdf(path, retries=retries)
+            progress.update(result)
+            return result
+
+        return list(await asyncio.gather(*(upload(path) for path in files)))
+
+    async def chat(self, collection_name: str, message: str):
+        response = await self.client.post("/fin_chat", params={"collection_name": collection_name, "message": message})
+        response.raise_for_status()
+        return response.json()
+
+    async def chat_batch(self, collection_name: str, questions):
+        response = await self.client.post("/fin_chat/batch", json={"collection_name": collection_name,
+                                                                   "questions": list(questions)})
+        response.raise_for_status()
+        return response.json()
+
+    async def chat_multi(self, message: str, collection_names=None):
+        response = await self.client.post("/fin_chat/multi", json={"message": message,
+                                                                   "collection_names": collection_names or None})
+        response.raise_for_status()
+        return response.json()
+
+    async def list_collections(self):
+        response = await self.client.get("/collections")
+        response.raise_for_status()
+        return response.json().get("collections", [])
+
+    async def get_collection_info(self, collection_name: str):
+        response = await self.client.get(f"/collection/{collection_name}/info")
+        response.raise_for_status()
+        return response.json()
+
+def interactive_mode(stream: bool = False):
     """Interactive chat mode"""
     client = FinanceChatClient()
     
@@ -161,7 +606,7 @@ def interactive_mode():
             if not message:
                 continue
                 
-            client.send_chat_message(selected_collection, message)
+            client.send_chat_message(selected_collection, message, stream=stream)
             
         except KeyboardInterrupt:
             print("\n\n👋 Goodbye!")
@@ -179,6 +624,26 @@ def main():
             collection_name = sys.argv[2]
             message = " ".join(sys.argv[3:])
             client.send_chat_message(collection_name, message)
+        elif sys.argv[1] == "stream" and len(sys.argv) > 3:
+            client = FinanceChatClient()
+            collection_name = sys.argv[2]
+            message = " ".join(sys.argv[3:])
+            client.send_chat_message(collection_name, message, stream=True)
+        elif sys.argv[1] == "compare" and len(sys.argv) > 3:
+            client = FinanceChatClient()
+            collection_names = [] if sys.argv[2] == "all" else sys.argv[2].split(",")
+            message = " ".join(sys.argv[3:])
+            client.send_multi_chat_message(collection_names, message)
+        elif sys.argv[1] == "bulk" and len(sys.argv) > 2:
+            client = FinanceChatClient()
+            concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else BULK_CONCURRENCY
+            results = client.upload_directory(sys.argv[2], concurrency=concurrency)
+            sys.exit(1 if any(result["status"] != "completed" for result in results) else 0)
+        elif sys.argv[1] == "ask-file" and len(sys.argv) > 4:
+            client = FinanceChatClient()
+            client.ask_file(sys.argv[2], sys.argv[3], sys.argv[4])
+        elif sys.argv[1] == "--stream":
+            interactive_mode(stream=True)
         elif sys.argv[1] == "list":
             client = FinanceChatClient()
             client.list_collections()
@@ -186,8 +651,13 @@ def main():
             print("Usage:")
             print("  python finance_chat.py upload <pdf_file>")
             print("  python finance_chat.py chat <collection_name> <message>")
+            print("  python finance_chat.py stream <collection_name> <message>")
+            print("  python finance_chat.py compare <name1,name2,...|all> <message>")
+            print("  python finance_chat.py bulk <directory> [concurrency]")
+            print("  python finance_chat.py ask-file <collection_name> <questions.txt> <answers.jsonl>")
             print("  python finance_chat.py list")
             print("  python finance_chat.py  # Interactive mode")
+            print("  python finance_chat.py --stream  # Interactive mode with streamed answers")
     else:
         # Interactive mode
         interactive_mode()
@@ -0,0 +1,55 @@
+"""
+Hybrid Retriever
+Dense (Qdrant) plus sparse (BM25) retrieval fused with reciprocal rank fusion.
+Imported lazily by app.py together with the rest of the LangChain stack.
+"""
+
+from typing import Any, Callable, List
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from sparse_index import reciprocal_rank_fusion
+
+
+class HybridRetriever(BaseRetriever):
+    """Fuse dense and BM25 candidates for a query and return the top ``k``
+
+    ``sparse_index`` is a callable returning the collection's current
+    BM25Index (or None, which falls back to dense-only), so a refresh that
+    swaps the index is picked up without rebuilding the retriever.
+    """
+
+    store: Any
+    sparse_index: Callable[[], Any]
+    k: int = 3
+    fetch_k: int = 20
+    rrf_k: int = 60
+    search_params: Any = None  # Qdrant SearchParams for the dense search (e.g. quantization rescoring)
+
+    def fuse(self, query: str, dense_docs: List[Document]) -> List[Document]:
+        """Fuse already-fetched dense results with BM25 results for ``query``"""
+        index = self.sparse_index()
+        if index is None:
+            return dense_docs[:self.k]
+        sparse_ids = [doc_id for doc_id, _ in index.search(query, self.fetch_k)]
+        by_id = {str(doc.metadata.get("_id")): doc for doc in dense_docs}
+        fused = reciprocal_rank_fusion([list(by_id), sparse_ids], k=self.rrf_k)[:self.k]
+
+        # Keyword-only hits are fetched from Qdrant by id
+        missing = [doc_id for doc_id in fused if doc_id not in by_id]
+        if missing:
+            points = self.store.client.retrieve(collection_name=self.store.collection_name, ids=missing, with_payload=True)
+            for point in points:
+                metadata = dict(point.payload.get(self.store.metadata_payload_key) or {})
+                metadata["_id"] = point.id
+                by_id[str(point.id)] = Document(
+                    page_content=point.payload.get(self.store.content_payload_key, ""),
+                    metadata=metadata
+                )
+        # Ids removed by a concurrent refresh are skipped
+        return [by_id[doc_id] for doc_id in fused if doc_id in by_id]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.fuse(query, self.store.similarity_search(query, k=self.fetch_k, search_params=self.search_params))
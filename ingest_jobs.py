@@ -0,0 +1,219 @@
+"""
+Ingestion Jobs
+Background job queue for PDF ingestion so uploads don't block the API event loop.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Job lifecycle states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+
+class JobCancelled(Exception):
+    """Raised inside an ingestion job when cancellation was requested"""
+
+
+class QueueFullError(Exception):
+    """Raised when too many ingestion jobs are already pending"""
+
+
+class IngestJob:
+    """A single ingestion job with its status and progress counters"""
+
+    def __init__(self, collection_name: str, filename: str):
+        self.job_id = uuid.uuid4().hex
+        self.collection_name = collection_name
+        self.filename = filename
+        self.status = QUEUED
+        self.stage = "queued"
+        self.error = None
+        self.result = None
+        self.progress = {
+            "pages_parsed": 0,
+            "chunks_total": 0,
+            "chunks_embedded": 0,
+            "chunks_reused": 0
+        }
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+        self.cleanup = None
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def update(self, stage: str = None, **progress):
+        """Update the current stage and/or progress counters"""
+        with self._lock:
+            if stage is not None:
+                self.stage = stage
+            self.progress.update(progress)
+
+    def advance(self, counter: str, amount: int = 1):
+        """Increment a progress counter"""
+        with self._lock:
+            self.progress[counter] = self.progress.get(counter, 0) + amount
+
+    def cancel(self):
+        """Request cancellation; running work stops at its next checkpoint"""
+        self._cancel_event.set()
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def raise_if_cancelled(self):
+        """Checkpoint called by the ingestion pipeline between units of work"""
+        if self._cancel_event.is_set():
+            raise JobCancelled(f"Job {self.job_id} was cancelled")
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in ACTIVE_STATES
+
+    def to_dict(self):
+        """Serializable view of the job for API responses"""
+        with self._lock:
+            return {
+                "job_id": self.job_id,
+                "collection_name": self.collection_name,
+                "filename": self.filename,
+                "status": self.status,
+                "stage": self.stage,
+                "progress": dict(self.progress),
+                "error": self.error,
+                "result": self.result,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at
+            }
+
+
+class JobManager:
+    """Runs ingestion jobs on a bounded worker pool and tracks their state"""
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 16, history_size: int = 100, listener=None):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.history_size = history_size
+        # Called with the job whenever it is queued, starts or finishes
+        self.listener = listener
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, collection_name: str, filename: str, func, *args, cleanup=None, **kwargs) -> IngestJob:
+        """Queue ``func(*args, job=job, **kwargs)`` and return the new job
+
+        ``cleanup`` (if given) runs exactly once when the job finishes in any
+        state, including cancellation before it started.
+        """
+        job = IngestJob(collection_name, filename)
+        job.cleanup = cleanup
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if j.is_active)
+            if pending >= self.max_pending:
+                if cleanup:
+                    cleanup()
+                raise QueueFullError(f"Too many ingestion jobs pending ({pending}/{self.max_pending})")
+            self._jobs[job.job_id] = job
+            self._trim_history()
+        self._notify(job)
+        job.future = self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def _notify(self, job: IngestJob):
+        if self.listener is not None:
+            try:
+                self.listener(job)
+            except Exception:
+                pass  # a failing listener must not break ingestion
+
+    def _run(self, job: IngestJob, func, args, kwargs):
+        if job.cancel_requested:
+            self._finish(job, CANCELLED)
+            return None
+        job.status = RUNNING
+        job.started_at = time.time()
+        job.update(stage="starting")
+        self._notify(job)
+        try:
+            job.result = func(*args, job=job, **kwargs)
+            self._finish(job, COMPLETED)
+        except JobCancelled:
+            self._finish(job, CANCELLED)
+        except Exception as e:
+            job.error = str(e)
+            self._finish(job, FAILED)
+        return job.result
+
+    def _finish(self, job: IngestJob, status: str):
+        job.status = status
+        job.finished_at = time.time()
+        job.update(stage=status)
+        cleanup, job.cleanup = job.cleanup, None
+        if cleanup:
+            try:
+                cleanup()
+            except Exception:
+                pass
+        self._notify(job)
+
+    def _trim_history(self):
+        # Drop the oldest finished jobs once the history limit is reached
+        finished = [job_id for job_id, j in self._jobs.items() if not j.is_active]
+        while len(self._jobs) > self.history_size and finished:
+            del self._jobs[finished.pop(0)]
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def active_job(self, collection_name: str):
+        """Return the queued/running job for a collection, if any"""
+        with self._lock:
+            for job in reversed(self._jobs.values()):
+                if job.collection_name == collection_name and job.is_active:
+                    return job
+        return None
+
+    def cancel(self, job_id: str):
+        """Cancel a job; queued jobs never start, running jobs stop at the next checkpoint"""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        if job.is_active:
+            job.cancel()
+            if job.future is not None and job.future.cancel():
+                self._finish(job, CANCELLED)
+        return job
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "queued": sum(1 for j in jobs if j.status == QUEUED),
+            "running": sum(1 for j in jobs if j.status == RUNNING)
+        }
+
+    def shutdown(self, wait: bool = False):
+        for job in self.list():
+            if job.is_active:
+                job.cancel()
+        self._executor.shutdown(wait=wait)
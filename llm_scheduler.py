@@ -0,0 +1,256 @@
+"""
+LLM Scheduler
+Every chat-model call in the process goes through one scheduler: identical
+prompts already in flight share a single provider call, requests and tokens
+are admitted against per-minute budgets (token buckets), and provider rate
+limit errors (HTTP 429) are retried with exponential backoff. Calls that are
+still rate limited after the retries raise ``LLMRateLimitError``.
+
+The LangChain side (``ScheduledChatModel``) lives in ``scheduled_llm.py``, so
+importing this module stays cheap.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Iterator, Optional
+
+CHARS_PER_TOKEN = 4  # rough prompt size estimate; corrected with reported usage after each call
+WAIT_SAMPLES = 1000  # recent admission waits kept for the percentiles in stats()
+
+
+class LLMRateLimitError(Exception):
+    """The provider kept rejecting a call as rate limited; retry after ``retry_after`` seconds"""
+
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """True for provider rate limit errors (Groq/OpenAI ``RateLimitError``, any HTTP 429)"""
+    if getattr(error, "status_code", None) == 429:
+        return True
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) == 429:
+        return True
+    return "ratelimit" in type(error).__name__.lower() or "rate limit" in str(error).lower()
+
+
+def retry_after_seconds(error: Exception):
+    """The provider's ``Retry-After`` hint, if the error carries a response with one"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return max(0.0, float(headers.get("retry-after")))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """``per_minute`` units refilled continuously, with up to one minute's worth of burst
+
+    ``reserve`` takes the units immediately (the level may go negative) and
+    returns how long the caller must wait for them, so callers are admitted
+    in arrival order without polling.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+        return max(0.0, -self.level / self.rate)
+
+    def adjust(self, amount: float, now: float):
+        """Charge (or refund, if negative) the difference between an estimate and the actual usage"""
+        self._refill(now)
+        self.level = min(self.capacity, self.level - amount)
+
+    def available(self, now: float) -> float:
+        self._refill(now)
+        return self.level
+
+
+class LLMScheduler:
+    """Coalesces, rate-limits and retries LLM calls for one provider
+
+    ``requests_per_minute`` / ``tokens_per_minute`` of 0 mean no budget.
+    Token usage is charged up front from the prompt size plus
+    ``completion_tokens`` and corrected once the provider reports usage.
+    """
+
+    def __init__(self, provider: str, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                 completion_tokens: int = 256, max_retries: int = 4, base_backoff: float = 1.0,
+                 max_backoff: float = 30.0, on_wait=None, on_event=None):
+        self.provider = provider
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.completion_tokens = completion_tokens
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.on_wait = on_wait  # called with every admission wait in seconds (e.g. a histogram)
+        self.on_event = on_event  # called with each counted event name (e.g. a counter)
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+        self._queued = 0
+        self._running = 0
+        self._counts = {"calls": 0, "coalesced": 0, "retries": 0, "rate_limited": 0, "failed": 0}
+
+    # ----- admission -----
+
+    def _admit(self, tokens: int):
+        """Wait until the request and token budgets allow one more call"""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(self.requests.reserve(1, now) if self.requests else 0.0,
+                       self.tokens.reserve(tokens, now) if self.tokens else 0.0)
+            self._queued += 1
+        try:
+            if wait > 0:
+                time.sleep(wait)
+        finally:
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._waits.append(wait)
+        if self.on_wait is not None:
+            self.on_wait(wait)
+
+    def _release(self, estimated: int, used: Optional[int]):
+        with self._lock:
+            self._running -= 1
+            if self.tokens is not None and used is not None:
+                self.tokens.adjust(used - estimated, time.monotonic())
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        hinted = retry_after_seconds(error)
+        if hinted is not None:
+            return min(hinted, self.max_backoff)
+        return min(self.max_backoff, self.base_backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counts[name] += 1
+        if self.on_event is not None:
+            self.on_event(name)
+
+    def _rate_limited(self, attempt: int, error: Exception) -> float:
+        """Backoff before the next attempt, or raise ``LLMRateLimitError`` once retries are used up"""
+        self._count("rate_limited")
+        if attempt >= self.max_retries:
+            self._count("failed")
+            raise LLMRateLimitError(f"{self.provider} rate limit exceeded after {attempt + 1} attempts: {str(error)}",
+                                    retry_after=retry_after_seconds(error) or self.base_backoff * 2 ** attempt) from error
+        self._count("retries")
+        return self._backoff(attempt, error)
+
+    # ----- calls -----
+
+    def call(self, key: str, send, tokens: int, usage=None):
+        """Return ``send()``, sharing one call among concurrent callers with the same ``key``
+
+        ``usage(result)`` returns the tokens the provider reports for a result
+        (or None), to correct the up-front token estimate.
+        """
+        with self._lock:
+            shared = self._inflight.get(key)
+            if shared is None:
+                future = self._inflight[key] = Future()
+        if shared is not None:
+            self._count("coalesced")
+            return shared.result()
+
+        try:
+            result = self._call(send, tokens, usage)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def _call(self, send, tokens: int, usage):
+        estimated = tokens + self.completion_tokens
+        attempt = 0
+        while True:
+            self._admit(estimated)
+            self._count("calls")
+            used = None
+            try:
+                result = send()
+                used = usage(result) if usage is not None else None
+                return result
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    self._count("failed")
+                    raise
+                delay = self._rate_limited(attempt, e)
+            finally:
+                self._release(estimated, used)
+            time.sleep(delay)
+            attempt += 1
+
+    def stream(self, open_stream, tokens: int) -> Iterator:
+        """Yield from ``open_stream()``; rate limits before the first chunk are retried like ``call``
+
+        Streams are not coalesced, since every caller needs its own chunks.
+        """
+        estimated = tokens + self.completion_tokens
+        attempt = 0
+        while True:
+            self._admit(estimated)
+            self._count("calls")
+            started = False
+            try:
+                for chunk in open_stream():
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started or not is_rate_limit_error(e):
+                    self._count("failed")
+                    raise
+                delay = self._rate_limited(attempt, e)
+            finally:
+                self._release(estimated, None)
+            time.sleep(delay)
+            attempt += 1
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            waits = sorted(self._waits)
+            budget = {
+                "requests_per_minute": self.requests.capacity if self.requests else None,
+                "tokens_per_minute": self.tokens.capacity if self.tokens else None,
+                "requests_available": round(self.requests.available(now), 1) if self.requests else None,
+                "tokens_available": round(self.tokens.available(now), 1) if self.tokens else None
+            }
+            return {
+                "provider": self.provider,
+                "queued": self._queued,
+                "running": self._running,
+                "in_flight_prompts": len(self._inflight),
+                **self._counts,
+                "wait_ms": {
+                    "p50": round(waits[len(waits) // 2] * 1000, 1) if waits else 0.0,
+                    "p95": round(waits[int(0.95 * (len(waits) - 1))] * 1000, 1) if waits else 0.0,
+                    "max": round(waits[-1] * 1000, 1) if waits else 0.0
+                },
+                "budget": budget
+            }
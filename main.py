@@ -4,18 +4,32 @@ Finance Chat Application - Main Entry Point
 A FastAPI-based application for AI-powered finance document analysis.
 """
 
+import argparse
 import uvicorn
 import os
 from dotenv import load_dotenv
 
+def parse_args():
+    """Server options; each defaults to an environment variable"""
+    parser = argparse.ArgumentParser(description="Run the Finance Chat Application")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WORKERS", "1")),
+                        help="Worker processes; more than 1 shares collections through SHARED_STATE_DIR")
+    parser.add_argument("--reload", action="store_true",
+                        default=os.getenv("RELOAD", "false").lower() in ("1", "true", "yes"),
+                        help="Restart on code changes (development only, single worker)")
+    return parser.parse_args()
+
 def main():
     """Main entry point for the Finance Chat Application"""
     # Load environment variables
     load_dotenv()
+    args = parse_args()
     
     # Check for required environment variables
     required_env_vars = ["GROQ_API_KEY", "OPENAI_API_KEY"]
-    has_api_key = any(os.getenv(var) for var in required_env_vars)
+    has_api_key = any(os.getenv(var) for var in required_env_vars) or os.getenv("LLM_PROVIDER") == "fake"
     
     if not has_api_key:
         print("⚠️  Warning: No API key found!")
@@ -25,6 +39,17 @@ def main():
         print("# OR")
         print("OPENAI_API_KEY=your_openai_api_key_here")
         return
+
+    if args.workers > 1:
+        if args.reload:
+            print("⚠️  --reload only works with a single worker; ignoring it")
+            args.reload = False
+        if os.getenv("QDRANT_PATH") and not os.getenv("QDRANT_URL"):
+            print("❌ QDRANT_PATH is locked by a single process. For several workers set QDRANT_URL,")
+            print("   or unset QDRANT_PATH to replicate collections to every worker.")
+            return
+        # Workers inherit this and coordinate through it
+        os.environ.setdefault("SHARED_STATE_DIR", "data/shared")
     
     print("🚀 Starting Finance Chat Application...")
     print("📊 Features:")
@@ -33,16 +58,20 @@ def main():
     print("   • Document Summarization")
     print("   • Vector Storage with Qdrant")
     print()
-    print("🌐 Server will be available at: http://localhost:8000")
-    print("📖 API Documentation: http://localhost:8000/docs")
+    if args.workers > 1:
+        storage = "Qdrant server " + os.getenv("QDRANT_URL") if os.getenv("QDRANT_URL") else "replicated in-memory Qdrant"
+        print(f"👥 {args.workers} workers ({storage}), shared state in {os.environ['SHARED_STATE_DIR']}")
+    print(f"🌐 Server will be available at: http://localhost:{args.port}")
+    print(f"📖 API Documentation: http://localhost:{args.port}/docs")
     print()
     
     # Start the server
     uvicorn.run(
         "app:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        reload=args.reload,
         log_level="info"
     )
 
@@ -0,0 +1,138 @@
+"""
+PDF Parsing
+Page-parallel PDF text extraction that produces the same Documents as PyPDFLoader.
+"""
+
+import math
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Below this many pages the process pool costs more than it saves
+PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "32"))
+# Smallest page range handed to one worker task
+MIN_PAGES_PER_TASK = 8
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def default_workers() -> int:
+    """Default worker count: one per CPU"""
+    return os.cpu_count() or 1
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Shared process pool, recreated only when the worker count changes"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # spawn, not fork: the parent holds torch/HTTP threads that don't survive fork
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool():
+    """Stop the shared parsing pool (called on server shutdown)"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = None
+        _pool_workers = 0
+
+
+def _extract_page_range(file_path: str, start: int, stop: int):
+    """Worker task: extract text for pages [start, stop) of a PDF
+
+    Mirrors PyPDFParser's per-page extraction (plain mode, no images).
+    """
+    import pypdf
+
+    reader = pypdf.PdfReader(file_path)
+    labels = reader.page_labels
+    pages = []
+    for page_number in range(start, stop):
+        page = reader.pages[page_number]
+        if pypdf.__version__.startswith("3"):
+            text = page.extract_text()
+        else:
+            text = page.extract_text(extraction_mode="plain")
+        pages.append((page_number, text.strip(), labels[page_number]))
+    return pages
+
+
+def _page_ranges(first: int, total: int, workers: int):
+    """Split pages [first, total) into contiguous ranges, a few per worker for load balancing"""
+    remaining = total - first
+    if remaining <= 0:
+        return []
+    size = max(MIN_PAGES_PER_TASK, math.ceil(remaining / (workers * 4)))
+    return [(start, min(start + size, total)) for start in range(first, total, size)]
+
+
+def load_pdf_pages(file_path: str, workers: int = None, min_pages: int = PARALLEL_MIN_PAGES):
+    """Yield one Document per page, in page order, parsing page ranges in parallel
+
+    The first page is read with PyPDFLoader itself, so the document-level
+    metadata (source, total_pages, producer, ...) is exactly what the
+    serial loader produces; the remaining pages are spread across a process
+    pool and merged back in order. Small documents, or ``workers=1``, fall
+    back to the serial loader.
+    """
+    from langchain_community.document_loaders import PyPDFLoader
+    from langchain_core.documents import Document
+
+    workers = workers or default_workers()
+    serial_pages = PyPDFLoader(file_path).lazy_load()
+    try:
+        first_page = next(serial_pages)
+    except StopIteration:
+        return
+
+    total_pages = first_page.metadata.get("total_pages", 1)
+    if workers <= 1 or total_pages < min_pages:
+        yield first_page
+        yield from serial_pages
+        return
+    serial_pages.close()
+
+    doc_metadata = {k: v for k, v in first_page.metadata.items() if k not in ("page", "page_label")}
+    pool = _get_pool(workers)
+    ranges = iter(_page_ranges(1, total_pages, workers))
+    # Keep only a small window of ranges in flight so parsed text never piles
+    # up ahead of a slower consumer (split/embed)
+    pending = deque()
+
+    def submit_next():
+        page_range = next(ranges, None)
+        if page_range is not None:
+            pending.append(pool.submit(_extract_page_range, file_path, *page_range))
+
+    for _ in range(workers * 2):
+        submit_next()
+    try:
+        yield first_page
+        while pending:
+            future = pending.popleft()
+            submit_next()
+            for page_number, text, page_label in future.result():
+                yield Document(
+                    page_content=text,
+                    metadata={**doc_metadata, "page": page_number, "page_label": page_label}
+                )
+    finally:
+        # Consumer stopped early (e.g. job cancelled): drop ranges not yet started
+        for future in pending:
+            future.cancel()
+
+
+def load_pdf(file_path: str, workers: int = None):
+    """Parse a whole PDF into page Documents (list form of ``load_pdf_pages``)"""
+    return list(load_pdf_pages(file_path, workers=workers))
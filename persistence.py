@@ -0,0 +1,177 @@
+"""
+Persistence
+Collection metadata storage and snapshot/restore of Qdrant collections, so
+collections survive restarts without re-embedding.
+"""
+
+import json
+import re
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+from qdrant_client.models import PointStruct
+
+SNAPSHOT_NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+COLLECTION_NAME_PATTERN = SNAPSHOT_NAME_PATTERN  # collection names become file names too
+EXPORT_BATCH_SIZE = 1024
+
+
+def _write_json_atomic(path: Path, data):
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(data))
+    tmp_path.replace(path)
+
+
+class CollectionMetadataStore:
+    """One JSON file per collection (filename, doc_count, content hashes, ...)"""
+
+    def __init__(self, metadata_dir):
+        self.metadata_dir = Path(metadata_dir)
+        self.metadata_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, collection_name: str) -> Path:
+        return self.metadata_dir / f"{validate_collection_name(collection_name)}.json"
+
+    def save(self, collection_name: str, metadata: dict):
+        _write_json_atomic(self._path(collection_name), metadata)
+
+    def load(self, collection_name: str):
+        """Return one collection's metadata, or None if it isn't stored (or is unreadable)"""
+        try:
+            return json.loads(self._path(collection_name).read_text())
+        except (OSError, ValueError):
+            return None
+
+    def delete(self, collection_name: str):
+        path = self._path(collection_name)
+        if path.exists():
+            path.unlink()
+
+    def load_all(self):
+        """Return ``{collection_name: metadata}`` for every stored collection"""
+        collections = {}
+        for path in sorted(self.metadata_dir.glob("*.json")):
+            try:
+                collections[path.stem] = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue  # skip unreadable files rather than failing startup
+        return collections
+
+
+def validate_snapshot_name(name: str) -> str:
+    if not SNAPSHOT_NAME_PATTERN.match(name or ""):
+        raise ValueError(f"Invalid snapshot name '{name}'")
+    return name
+
+
+def validate_collection_name(name: str) -> str:
+    """Reject collection names that could escape the directories they are stored under"""
+    if not COLLECTION_NAME_PATTERN.match(name or ""):
+        raise ValueError(f"Invalid collection name '{name}'")
+    return name
+
+
+def list_snapshots(snapshot_dir):
+    """Return manifests of available snapshots, newest first"""
+    snapshot_dir = Path(snapshot_dir)
+    if not snapshot_dir.exists():
+        return []
+    snapshots = []
+    for manifest_path in snapshot_dir.glob("*/manifest.json"):
+        try:
+            manifest = json.loads(manifest_path.read_text())
+        except (OSError, ValueError):
+            continue
+        snapshots.append({
+            "name": manifest_path.parent.name,
+            "created_at": manifest.get("created_at"),
+            "embed_model": manifest.get("embed_model"),
+            "collections": len(manifest.get("collections", {})),
+            "points": sum(c.get("points", 0) for c in manifest.get("collections", {}).values())
+        })
+    return sorted(snapshots, key=lambda s: s["created_at"] or 0, reverse=True)
+
+
+def export_collection_points(client, physical_name: str, directory, collection_name: str) -> int:
+    """Write a collection's vectors (``<name>.npy``) and ids/payloads (``<name>.jsonl``) to ``directory``"""
+    directory = Path(directory)
+    validate_collection_name(collection_name)
+    vectors = []
+    with open(directory / f"{collection_name}.jsonl", "w") as payload_file:
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name=physical_name, limit=EXPORT_BATCH_SIZE, offset=offset,
+                with_payload=True, with_vectors=True
+            )
+            for point in points:
+                payload_file.write(json.dumps({"id": str(point.id), "payload": point.payload}) + "\n")
+                vectors.append(point.vector)
+            if offset is None:
+                break
+    np.save(directory / f"{collection_name}.npy", np.asarray(vectors, dtype=np.float32))
+    return len(vectors)
+
+
+def export_snapshot(client, collections: dict, snapshot_dir, embed_model: str, name: str = None):
+    """Write a snapshot of ``collections`` (``{name: {"physical": ..., "metadata": ...}}``)
+
+    Each collection is stored as a float32 ``.npy`` vector matrix plus a
+    JSONL file of point ids and payloads, next to a ``manifest.json`` with
+    the collection metadata. The snapshot is written to a temporary
+    directory and renamed into place when complete.
+    """
+    name = validate_snapshot_name(name or time.strftime("snapshot-%Y%m%d-%H%M%S"))
+    snapshot_dir = Path(snapshot_dir)
+    target = snapshot_dir / name
+    if target.exists():
+        raise ValueError(f"Snapshot '{name}' already exists")
+    staging = snapshot_dir / f".{name}.partial"
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+
+    manifest = {"created_at": time.time(), "embed_model": embed_model, "collections": {}}
+    try:
+        for collection_name, entry in collections.items():
+            manifest["collections"][collection_name] = {
+                "points": export_collection_points(client, entry["physical"], staging, collection_name),
+                "metadata": entry.get("metadata", {})
+            }
+        _write_json_atomic(staging / "manifest.json", manifest)
+        staging.rename(target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return {"name": name, "collections": len(manifest["collections"]),
+            "points": sum(c["points"] for c in manifest["collections"].values())}
+
+
+def read_snapshot(snapshot_dir, name: str):
+    """Load a snapshot manifest, resolving ``latest`` to the newest snapshot"""
+    if name == "latest":
+        snapshots = list_snapshots(snapshot_dir)
+        if not snapshots:
+            raise ValueError("No snapshots available")
+        name = snapshots[0]["name"]
+    path = Path(snapshot_dir) / validate_snapshot_name(name)
+    if not (path / "manifest.json").exists():
+        raise ValueError(f"Snapshot '{name}' not found")
+    return path, json.loads((path / "manifest.json").read_text())
+
+
+def iter_snapshot_points(snapshot_path: Path, collection_name: str, batch_size: int = EXPORT_BATCH_SIZE):
+    """Yield batches of PointStructs for one collection of a snapshot"""
+    validate_collection_name(collection_name)
+    vectors = np.load(snapshot_path / f"{collection_name}.npy", mmap_mode="r")
+    batch = []
+    with open(snapshot_path / f"{collection_name}.jsonl") as payload_file:
+        for row, line in enumerate(payload_file):
+            record = json.loads(line)
+            batch.append(PointStruct(id=record["id"], vector=vectors[row].tolist(), payload=record["payload"]))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
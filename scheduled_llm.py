@@ -0,0 +1,70 @@
+"""
+Scheduled LLM
+LangChain chat model that sends every call of a wrapped model through an
+``LLMScheduler``, so prompts, chains and streaming keep working unchanged.
+Imported lazily by app.py together with the rest of the LangChain stack.
+"""
+
+import hashlib
+import json
+from typing import Any, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from llm_scheduler import CHARS_PER_TOKEN
+
+
+def estimate_tokens(messages: List[BaseMessage]) -> int:
+    return sum(len(str(message.content)) for message in messages) // CHARS_PER_TOKEN + 1
+
+
+def prompt_key(model: BaseChatModel, messages: List[BaseMessage], stop=None, **kwargs) -> str:
+    """Identity of a call: the model, the full prompt and any call options"""
+    payload = json.dumps({
+        "model": model._llm_type,
+        "messages": [[message.type, message.content] for message in messages],
+        "stop": stop,
+        "kwargs": kwargs
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def reported_tokens(message) -> Optional[int]:
+    """Total tokens a chat model reported for a response message, if any"""
+    usage = getattr(message, "usage_metadata", None)
+    if usage and usage.get("total_tokens"):
+        return usage["total_tokens"]
+    token_usage = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+    return token_usage.get("total_tokens")
+
+
+class ScheduledChatModel(BaseChatModel):
+    """Chat model that sends every call of ``llm`` through ``scheduler``"""
+
+    llm: BaseChatModel
+    scheduler: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return self.llm._llm_type
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        message = self.scheduler.call(
+            prompt_key(self.llm, messages, stop, **kwargs),
+            lambda: self.llm.invoke(messages, stop=stop, **kwargs),
+            estimate_tokens(messages),
+            usage=reported_tokens
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        for message in self.scheduler.stream(lambda: self.llm.stream(messages, stop=stop, **kwargs),
+                                             estimate_tokens(messages)):
+            chunk = ChatGenerationChunk(message=message)
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
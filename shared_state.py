@@ -0,0 +1,202 @@
+"""
+Shared State
+Lets several worker processes serve the same collections. Every published
+collection version is recorded in a shared directory (metadata, plus an
+exported copy of its points when workers keep vectors in local Qdrant) and
+bumps a global generation counter; workers compare the counter with the last
+one they synced and load changed records before serving requests. Ingestion
+job status is mirrored there too, so any worker can answer job polls.
+
+Worker slots and the publish lock use POSIX file locks (``fcntl``).
+"""
+
+import json
+import os
+import re
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from ingest_jobs import ACTIVE_STATES
+from persistence import CollectionMetadataStore, _write_json_atomic, validate_collection_name
+
+MAX_WORKER_SLOTS = 256
+EXPORTS_KEPT = 2  # the current export plus the previous one, which a slow worker may still be importing
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+def _fcntl():
+    try:
+        import fcntl
+    except ImportError:
+        raise RuntimeError("Shared multi-worker state needs POSIX file locks (fcntl)")
+    return fcntl
+
+
+class SharedState:
+    """Collection records, generation counter and job mirror under ``state_dir``"""
+
+    def __init__(self, state_dir):
+        self.state_dir = Path(state_dir)
+        self.records = CollectionMetadataStore(self.state_dir / "collections")
+        self.exports_dir = self.state_dir / "exports"
+        self.jobs_dir = self.state_dir / "jobs"
+        self.exports_dir.mkdir(parents=True, exist_ok=True)
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self._generation_path = self.state_dir / "GENERATION"
+        self._slot_handle = None
+        self.slot = None
+
+    # ----- worker slots -----
+
+    def claim_slot(self) -> int:
+        """Lock the lowest free worker slot for the life of this process
+
+        Slots are stable across restarts (a restarted worker takes a freed
+        slot), so they can name per-worker directories; slot 0 is the leader
+        that runs once-per-deployment startup work.
+        """
+        fcntl = _fcntl()
+        for slot in range(MAX_WORKER_SLOTS):
+            handle = open(self.state_dir / f"worker-{slot}.lock", "w")
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                handle.close()
+                continue
+            self._slot_handle, self.slot = handle, slot
+            return slot
+        raise RuntimeError(f"All {MAX_WORKER_SLOTS} worker slots in {self.state_dir} are taken")
+
+    @property
+    def is_leader(self) -> bool:
+        return self.slot == 0
+
+    # ----- collections -----
+
+    @contextmanager
+    def _publish_lock(self):
+        fcntl = _fcntl()
+        with open(self.state_dir / "publish.lock", "w") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            yield  # released when the handle closes
+
+    def generation(self) -> int:
+        """Global generation; changes whenever any collection is published"""
+        try:
+            return int(self._generation_path.read_text())
+        except (OSError, ValueError):
+            return 0
+
+    def publish(self, collection_name: str, metadata: dict, export: str = None) -> int:
+        """Record a new version of a collection and return its generation"""
+        with self._publish_lock():
+            generation = self.generation() + 1
+            self.records.save(collection_name, {
+                "generation": generation,
+                "export": export,
+                "metadata": metadata,
+                "published_at": time.time(),
+                "worker": os.getpid()
+            })
+            _write_json_atomic(self._generation_path, generation)
+        if export is not None:
+            self._prune_exports(collection_name)
+        return generation
+
+    def collections(self):
+        """``{collection_name: record}`` for every published collection"""
+        return self.records.load_all()
+
+    def collection(self, collection_name: str):
+        """The published record of one collection, or None"""
+        return self.records.load(collection_name)
+
+    def export_path(self, collection_name: str, export_id: str) -> Path:
+        # Export ids are physical collection names (``<name>__<uuid8>``), so the same rule applies
+        return self.exports_dir / validate_collection_name(collection_name) / validate_collection_name(export_id)
+
+    def write_export(self, collection_name: str, export_id: str, write):
+        """Run ``write(directory)`` into a staging directory and move it into place once complete"""
+        target = self.export_path(collection_name, export_id)
+        if target.exists():
+            return target
+        staging = target.with_name(f".{export_id}.{os.getpid()}.partial")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        try:
+            write(staging)
+            staging.rename(target)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return target
+
+    def _prune_exports(self, collection_name: str):
+        exports = sorted((path for path in (self.exports_dir / validate_collection_name(collection_name)).iterdir()
+                          if not path.name.startswith(".")), key=lambda path: path.stat().st_mtime)
+        for path in exports[:-EXPORTS_KEPT]:
+            shutil.rmtree(path, ignore_errors=True)
+
+    # ----- ingestion jobs -----
+
+    def _job_path(self, job_id: str, suffix: str = ".json"):
+        if not JOB_ID_PATTERN.match(job_id or ""):
+            return None
+        return self.jobs_dir / f"{job_id}{suffix}"
+
+    def save_job(self, job: dict):
+        _write_json_atomic(self._job_path(job["job_id"]), {**job, "worker": os.getpid(), "updated_at": time.time()})
+
+    def get_job(self, job_id: str):
+        path = self._job_path(job_id)
+        try:
+            return json.loads(path.read_text()) if path is not None else None
+        except (OSError, ValueError):
+            return None
+
+    def list_jobs(self):
+        jobs = []
+        for path in self.jobs_dir.glob("*.json"):
+            try:
+                jobs.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+        return sorted(jobs, key=lambda job: job.get("created_at") or 0)
+
+    def active_job(self, collection_name: str, stale_after: float):
+        """Newest queued/running job for a collection whose owner is still reporting progress"""
+        now = time.time()
+        active = [job for job in self.list_jobs()
+                  if job.get("collection_name") == collection_name and job.get("status") in ACTIVE_STATES
+                  and now - job.get("updated_at", 0) < stale_after]
+        return active[-1] if active else None
+
+    def remove_job(self, job_id: str):
+        for suffix in (".json", ".cancel"):
+            path = self._job_path(job_id, suffix)
+            if path is not None and path.exists():
+                path.unlink()
+
+    def request_cancel(self, job_id: str) -> bool:
+        """Ask the worker that owns a job to cancel it"""
+        path = self._job_path(job_id, ".cancel")
+        if path is None or self.get_job(job_id) is None:
+            return False
+        path.touch()
+        return True
+
+    def take_cancel_request(self, job_id: str) -> bool:
+        path = self._job_path(job_id, ".cancel")
+        if path is None or not path.exists():
+            return False
+        path.unlink()
+        return True
+
+    def prune_jobs(self, stale_after: float):
+        """Drop job records nobody has updated for ``stale_after`` seconds (e.g. from dead workers)"""
+        now = time.time()
+        for job in self.list_jobs():
+            if now - job.get("updated_at", 0) >= stale_after:
+                self.remove_job(job["job_id"])
@@ -0,0 +1,95 @@
+"""
+Sparse Index
+In-process BM25 keyword index over a collection's chunks, for exact matches on
+line items, tickers, fiscal-year labels and figures that dense search misses.
+"""
+
+import math
+import re
+import sys
+from collections import Counter
+
+import numpy as np
+
+# Words, tickers and fiscal labels ("fy2024", "q1"), and numbers with separators ("12,345.6")
+TOKEN_PATTERN = re.compile(r"\d[\d,]*(?:\.\d+)?|[a-z][a-z0-9]*")
+
+
+def tokenize(text: str):
+    """Lowercased terms; thousands separators are dropped so "12,345" matches "12345\""""
+    return [token.replace(",", "") for token in TOKEN_PATTERN.findall(text.lower())]
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed set of documents, stored as per-term posting arrays
+
+    Built once per collection version; a refresh builds a new index rather
+    than mutating this one, so readers never see a half-updated index.
+    """
+
+    def __init__(self, documents, k1: float = 1.5, b: float = 0.75):
+        """Index an iterable of ``(doc_id, text)`` pairs (consumed once, texts are not kept)"""
+        self.doc_ids = []
+        self.k1 = k1
+        self.b = b
+        postings = {}
+        lengths = []
+        for doc, (doc_id, text) in enumerate(documents):
+            counts = Counter(tokenize(text))
+            self.doc_ids.append(doc_id)
+            lengths.append(sum(counts.values()))
+            for term, count in counts.items():
+                postings.setdefault(term, ([], []))
+                postings[term][0].append(doc)
+                postings[term][1].append(count)
+        lengths = np.asarray(lengths, dtype=np.float32)
+
+        n_docs = max(len(self.doc_ids), 1)
+        avg_length = float(lengths.mean()) if len(lengths) else 0.0
+        # Length normalisation is per document, so fold it in once at build time
+        norm = k1 * (1 - b + b * lengths / avg_length) if avg_length else np.full_like(lengths, k1)
+        self._postings = {}
+        for term, (docs, counts) in postings.items():
+            docs = np.asarray(docs, dtype=np.int32)
+            tf = np.asarray(counts, dtype=np.float32)
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            self._postings[term] = (docs, (idf * tf * (k1 + 1) / (tf + norm[docs])).astype(np.float32))
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    @property
+    def vocabulary_size(self) -> int:
+        return len(self._postings)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the index (posting arrays, ids and terms)"""
+        postings = sum(docs.nbytes + weights.nbytes + sys.getsizeof(term)
+                       for term, (docs, weights) in self._postings.items())
+        return int(postings + sum(sys.getsizeof(doc_id) for doc_id in self.doc_ids))
+
+    def search(self, query: str, k: int = 10):
+        """Return up to ``k`` ``(doc_id, score)`` pairs, best first"""
+        scores = np.zeros(len(self.doc_ids), dtype=np.float32)
+        matched = False
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if posting is not None:
+                scores[posting[0]] += posting[1]
+                matched = True
+        if not matched:
+            return []
+        k = min(k, int(np.count_nonzero(scores)))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.doc_ids[i], float(scores[i])) for i in top]
+
+
+def reciprocal_rank_fusion(rankings, k: int = 60):
+    """Fuse ranked id lists: score(id) = sum of 1 / (k + rank) over the lists it appears in"""
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
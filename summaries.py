@@ -0,0 +1,99 @@
+"""
+Document Summaries
+Map-reduce summarization over content-defined sections of a collection, so a
+refresh only re-summarizes the sections whose chunks changed.
+"""
+
+import hashlib
+
+
+def _is_boundary(content_hash: str, target_chunks: int) -> bool:
+    return int(content_hash[:8], 16) % target_chunks == 0
+
+
+def split_sections(content_hashes, target_chunks: int = 8):
+    """Group consecutive chunks into sections of about ``target_chunks``
+
+    Boundaries are chosen from the chunk content hashes rather than fixed
+    positions, so inserting or editing text only changes the sections
+    around the edit. Sections are capped at twice the target size.
+    Returns ``[{"hash": ..., "chunks": [index, ...]}]`` in document order.
+    """
+    sections, current = [], []
+    for index, content_hash in enumerate(content_hashes):
+        current.append(index)
+        if _is_boundary(content_hash, target_chunks) or len(current) >= 2 * target_chunks:
+            sections.append(current)
+            current = []
+    if current:
+        sections.append(current)
+    return [
+        {
+            "hash": hashlib.sha256("".join(content_hashes[i] for i in chunks).encode("utf-8")).hexdigest(),
+            "chunks": chunks
+        }
+        for chunks in sections
+    ]
+
+
+def _group_key(summaries) -> str:
+    return hashlib.sha256("\x00".join(summaries).encode("utf-8")).hexdigest()
+
+
+def reduce_summaries(summaries, combine, fanout: int = 8, cache=None, used=None):
+    """Combine summaries ``fanout`` at a time until a single summary remains
+
+    ``cache`` maps a group's key to its combined summary from an earlier
+    run, so groups whose inputs are unchanged are not combined again. Keys
+    of every group combined in this run are added to ``used``.
+    """
+    cache = cache or {}
+    used = used if used is not None else {}
+    while len(summaries) > 1:
+        combined = []
+        for i in range(0, len(summaries), fanout):
+            group = summaries[i:i + fanout]
+            key = _group_key(group)
+            if key not in cache:
+                cache[key] = combine(group)
+            used[key] = cache[key]
+            combined.append(cache[key])
+        summaries = combined
+    return summaries[0] if summaries else ""
+
+
+def build_summaries(sections, summarize, combine, previous=None, fanout: int = 8, executor=None):
+    """Summarize sections (map) and combine them into a document summary (reduce)
+
+    ``summarize(section)`` returns a section's summary and ``combine`` maps
+    a list of summaries to one. Section summaries whose hash appears in
+    ``previous`` (an earlier result of this function) are reused, as are
+    reduce groups whose inputs are unchanged. Map calls run on ``executor``
+    when given.
+    """
+    previous = previous or {}
+    reused = {s["hash"]: s["summary"] for s in previous.get("sections", []) if s.get("summary")}
+    changed = [section for section in sections if section["hash"] not in reused]
+
+    if executor is not None:
+        futures = [executor.submit(summarize, section) for section in changed]
+        fresh = {section["hash"]: future.result() for section, future in zip(changed, futures)}
+    else:
+        fresh = {section["hash"]: summarize(section) for section in changed}
+
+    summaries = []
+    for section in sections:
+        entry = {key: value for key, value in section.items() if key != "chunks"}
+        entry["summary"] = reused[section["hash"]] if section["hash"] in reused else fresh[section["hash"]]
+        summaries.append(entry)
+    # Reduce groups are keyed by their inputs, so only groups containing a changed section are recombined
+    groups = {}
+    document = reduce_summaries([s["summary"] for s in summaries], combine, fanout,
+                                cache=dict(previous.get("groups") or {}), used=groups)
+    return {
+        "document": document,
+        "sections": summaries,
+        "groups": groups,
+        "regenerated": len(changed),
+        "reused": len(sections) - len(changed)
+    }
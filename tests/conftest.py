@@ -0,0 +1,10 @@
+import os
+import tempfile
+
+# The app reads its configuration at import: tests run offline, and anything it writes lands in a scratch dir
+_data = tempfile.mkdtemp(prefix="finance-aichat-tests-")
+for key, value in {"EMBED_PROVIDER": "fake", "LLM_PROVIDER": "fake", "WARMUP_ON_STARTUP": "false",
+                   "EMBED_CACHE_DIR": os.path.join(_data, "embedding_cache"),
+                   "COLLECTION_METADATA_DIR": os.path.join(_data, "collections"),
+                   "SNAPSHOT_DIR": os.path.join(_data, "snapshots")}.items():
+    os.environ.setdefault(key, value)
@@ -0,0 +1,91 @@
+import math
+
+from answer_cache import AnswerCache, normalize_question
+
+
+def angled(degrees):
+    """Unit vector at ``degrees`` from [1, 0]: cosine similarity with it is cos(degrees)"""
+    radians = math.radians(degrees)
+    return [math.cos(radians), math.sin(radians)]
+
+
+def test_normalize_question():
+    assert normalize_question("  What was REVENUE in 2024?? ") == "what was revenue in 2024"
+
+
+def test_exact_hit_ignores_case_and_punctuation():
+    cache = AnswerCache()
+    cache.put("doc", "What was revenue?", "10M")
+    entry, match, embedding = cache.lookup("doc", "what was REVENUE")
+    assert (entry["answer"], match, embedding) == ("10M", "exact", None)
+
+
+def test_exact_hit_does_not_embed():
+    cache = AnswerCache()
+    cache.put("doc", "q", "a")
+    calls = []
+    cache.lookup("doc", "q", embed=lambda text: calls.append(text) or [1.0, 0.0])
+    assert calls == []
+
+
+def test_semantic_hit_above_the_similarity_threshold():
+    cache = AnswerCache(similarity=0.95)
+    cache.put("doc", "What was revenue?", "10M", embedding=angled(0))
+    entry, match, _ = cache.lookup("doc", "How much revenue was there?", embed=lambda text: angled(10))  # cos 0.985
+    assert match == "semantic"
+    assert entry["answer"] == "10M"
+    assert entry["similarity"] > 0.95
+
+
+def test_semantic_miss_below_the_similarity_threshold():
+    cache = AnswerCache(similarity=0.95)
+    cache.put("doc", "What was revenue?", "10M", embedding=angled(0))
+    entry, match, embedding = cache.lookup("doc", "What was the dividend?", embed=lambda text: angled(25))  # cos 0.906
+    assert (entry, match) == (None, None)
+    assert embedding == angled(25)  # returned so put() can reuse it
+    assert cache.stats("doc")["misses"] == 1
+
+
+def test_answers_are_per_collection():
+    cache = AnswerCache()
+    cache.put("a", "q", "answer a", embedding=angled(0))
+    assert cache.lookup("b", "q", embed=lambda text: angled(0))[1] is None
+
+
+def test_expired_entries_are_not_returned():
+    cache = AnswerCache(ttl=-1)
+    cache.put("doc", "q", "a", embedding=angled(0))
+    assert cache.lookup("doc", "q")[1] is None
+    assert cache.lookup("doc", "q", embed=lambda text: angled(0))[1] is None
+
+
+def test_least_recently_used_answer_is_evicted():
+    cache = AnswerCache(max_entries=2)
+    cache.put("doc", "q1", "a1")
+    cache.put("doc", "q2", "a2")
+    cache.lookup("doc", "q1")  # q2 is now least recently used
+    cache.put("doc", "q3", "a3")
+    assert cache.lookup("doc", "q2")[1] is None
+    assert cache.lookup("doc", "q1")[1] == "exact"
+    assert cache.stats()["entries"] == 2
+
+
+def test_invalidate_drops_answers_and_rejects_stale_puts():
+    cache = AnswerCache()
+    generation = cache.generation("doc")
+    cache.put("doc", "q", "old")
+    cache.invalidate("doc")
+    assert cache.lookup("doc", "q")[1] is None
+    cache.put("doc", "q", "computed before the refresh", generation=generation)
+    assert cache.lookup("doc", "q")[1] is None
+    cache.put("doc", "q", "fresh", generation=cache.generation("doc"))
+    assert cache.lookup("doc", "q")[0]["answer"] == "fresh"
+
+
+def test_stats_hit_rate():
+    cache = AnswerCache()
+    cache.put("doc", "q", "a")
+    cache.lookup("doc", "q")
+    cache.lookup("doc", "other")
+    stats = cache.stats("doc")
+    assert (stats["exact_hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
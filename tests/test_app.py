@@ -0,0 +1,115 @@
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+import app
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+
+from synthetic_pdf import write_pdf  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def forget_collections():
+    """Collections created by a test don't show up in the next one's snapshots or listings"""
+    before = set(app.in_memory_collections)
+    yield
+    for collection_name in set(app.in_memory_collections) - before:
+        app.in_memory_collections.pop(collection_name)
+
+
+def ingest(tmp_path, collection_name, pages=4, seed=42):
+    path = write_pdf(tmp_path / f"{collection_name}.pdf", pages, seed=seed)
+    app.create_or_refresh_store_from_file(collection_name, str(path), path.name)
+
+
+class CountingEmbeddings(Embeddings):
+    """The app's embedder, recording every text embedded for documents"""
+
+    def __init__(self, base):
+        self.base = base
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return self.base.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.base.embed_query(text)
+
+
+def stored_points(physical):
+    """``{point id: (vector, text)}`` for a physical collection"""
+    records, _ = app.get_qdrant_client().scroll(collection_name=physical, limit=10_000, with_vectors=True)
+    return {str(record.id): (record.vector, record.payload["page_content"]) for record in records}
+
+
+def test_incremental_refresh_only_embeds_changed_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "SUMMARY_PRECOMPUTE", False)
+    monkeypatch.setattr(app, "get_embedding_cache", lambda: None)  # every new chunk reaches the model
+    ingest(tmp_path, "amended", pages=6)
+    old_physical = app.resolve_physical_collection("amended")
+    old_points = stored_points(old_physical)
+
+    # Same filing with two pages appended: the first six pages produce the same chunks
+    embedder = CountingEmbeddings(app.get_embedder())
+    monkeypatch.setattr(app, "get_embedder", lambda: embedder)
+    ingest(tmp_path, "amended", pages=8)
+    entry = app.in_memory_collections["amended"]
+    refresh = entry["refresh"]
+    assert refresh["mode"] == "incremental"
+    assert (refresh["kept"], refresh["removed"]) == (len(old_points), 0)
+    embedded = [text for text in embedder.embedded if text != "dummy_text"]  # the vector store's dimension probe
+    assert refresh["added"] > 0 and len(embedded) == refresh["added"]
+    assert not set(embedded) & {text for _, text in old_points.values()}
+
+    # Unchanged chunks keep their point ids and vectors; the alias moved and the old version is gone
+    new_physical = app.resolve_physical_collection("amended")
+    assert new_physical == entry["physical_collection"] != old_physical
+    assert not app.get_qdrant_client().collection_exists(old_physical)
+    new_points = stored_points(new_physical)
+    assert len(new_points) == refresh["kept"] + refresh["added"]
+    for point_id, (vector, text) in old_points.items():
+        # Copied, not re-embedded (Qdrant re-normalizes cosine vectors on upsert, hence approx)
+        assert new_points[point_id][1] == text
+        assert new_points[point_id][0] == pytest.approx(vector, rel=1e-5)
+
+
+def test_summaries_persisted_mid_build_are_rebuilt_after_a_restore(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    # The build stays queued behind a blocked task, as if the process stopped before running it
+    stopped, release = ThreadPoolExecutor(max_workers=1), threading.Event()
+    stopped.submit(release.wait, 5)
+    monkeypatch.setattr(app, "summary_executor", stopped)
+    ingest(tmp_path, "mid_build")
+    assert app.in_memory_collections["mid_build"]["summaries"]["status"] == "pending"
+    assert app.collection_metadata("mid_build")["summaries"]["status"] == "stale"
+    app.create_snapshot("mid_build")
+    stopped.shutdown(wait=False, cancel_futures=True)
+    release.set()
+
+    # A new process: nothing queued in memory, and the restore has to schedule the build itself
+    restarted = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(app, "summary_executor", restarted)
+    monkeypatch.setattr(app, "_summary_builds", set())
+    assert "mid_build" in app.restore_snapshot("mid_build")["restored"]
+    restarted.shutdown(wait=True)
+    summaries = app.in_memory_collections["mid_build"]["summaries"]
+    assert summaries["status"] == "ready"
+    assert summaries["document"] and summaries["sections"]
+
+    # A rebuild in flight is persisted with the ready sections, so the next build reuses them
+    stopped, release = ThreadPoolExecutor(max_workers=1), threading.Event()
+    monkeypatch.setattr(app, "summary_executor", stopped)
+    stopped.submit(release.wait, 5)
+    ingest(tmp_path, "mid_build")
+    persisted = app.collection_metadata("mid_build")["summaries"]
+    assert persisted["status"] == "stale"
+    assert persisted["sections"] == summaries["sections"]
+    release.set()
+    stopped.shutdown(wait=True)
+    assert app.in_memory_collections["mid_build"]["summaries"]["reused"] == len(summaries["sections"])
@@ -0,0 +1,77 @@
+from langchain_core.documents import Document
+
+from context_packing import (
+    count_tokens, join_overlapping, merge_passages, mmr_order, overlap_length, pack_context, truncate_to_tokens
+)
+
+OVERLAP = "Segment revenue grew on strong cloud demand. "  # longer than MIN_OVERLAP_CHARS
+
+
+def doc(text, page=1, source="report.pdf"):
+    return Document(page_content=text, metadata={"source": source, "page": page})
+
+
+def test_overlap_length_finds_the_repeated_text():
+    assert overlap_length("Intro. " + OVERLAP, OVERLAP + "Outlook.") == len(OVERLAP)
+    assert overlap_length("no shared text here", "something else entirely") == 0
+    assert overlap_length("ends with the", "the start") == 0  # too short to be chunk overlap
+
+
+def test_join_overlapping_drops_repeated_text():
+    assert join_overlapping(["Intro. " + OVERLAP, OVERLAP + "Outlook."]) == "Intro. " + OVERLAP + "Outlook."
+    assert join_overlapping(["First section.", "Second section."]) == "First section.\n\nSecond section."
+
+
+def test_merge_passages_joins_overlapping_chunks_of_the_same_page():
+    left, right = doc("Intro. " + OVERLAP), doc(OVERLAP + "Outlook.")
+    passages = merge_passages([right, left])
+    assert [text for text, _, _ in passages] == ["Intro. " + OVERLAP + "Outlook."]
+    assert passages[0][2] == 0  # keeps the best rank
+
+
+def test_merge_passages_keeps_other_pages_apart():
+    passages = merge_passages([doc("Intro. " + OVERLAP, page=1), doc(OVERLAP + "Outlook.", page=2)])
+    assert len(passages) == 2
+
+
+def test_mmr_drops_near_duplicates_and_keeps_relevance_order():
+    texts = ["cloud revenue grew twelve percent", "cloud revenue grew twelve percent", "dividend was raised"]
+    assert mmr_order(texts) == [0, 2]
+
+
+def test_mmr_prefers_a_diverse_passage_over_a_redundant_one():
+    texts = ["cloud revenue grew in fiscal 2024",
+             "cloud revenue grew in fiscal 2024 on demand",
+             "the board raised the quarterly dividend"]
+    assert mmr_order(texts, lambda_mult=0.5, duplicate_similarity=0.95) == [0, 2, 1]
+
+
+def test_truncate_cuts_at_a_sentence_boundary():
+    text = "First sentence is here. Second sentence is a bit longer than the first one."
+    assert truncate_to_tokens(text, 8) == "First sentence is here."
+    assert truncate_to_tokens(text, 100) == text
+
+
+def test_pack_context_fits_the_token_budget():
+    docs = [doc(f"Passage {i} " + "about revenue and margins. " * 40, page=i) for i in range(10)]
+    packed, stats = pack_context(docs, token_budget=600)
+    assert stats["tokens_after"] <= 600
+    assert sum(count_tokens(d.page_content) for d in packed) == stats["tokens_after"]
+    assert stats["tokens_before"] > stats["tokens_after"]
+    assert packed[0].page_content.startswith("Passage 0")  # best-ranked passage first
+    assert stats["truncated"] + stats["over_budget"] >= 1
+
+
+def test_pack_context_reports_merges_and_duplicates():
+    docs = [doc("Intro. " + OVERLAP), doc(OVERLAP + "Outlook."), doc("Dividend raised.", page=2),
+            doc("Dividend raised.", page=3)]
+    packed, stats = pack_context(docs)
+    assert (stats["chunks"], stats["merged"], stats["duplicates"], stats["passages"]) == (4, 1, 1, 2)
+    assert [d.metadata["page"] for d in packed] == [1, 2]
+
+
+def test_pack_context_always_includes_part_of_the_best_passage():
+    packed, stats = pack_context([doc("word " * 400)], token_budget=10)
+    assert len(packed) == 1
+    assert stats["truncated"] == 1
+    assert count_tokens(packed[0].page_content) <= 10
@@ -0,0 +1,78 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from embedding_backends import MicroBatchingEmbeddings
+
+
+class StubEmbeddings(Embeddings):
+    """Vector ``[len(text), ord(text[-1])]``; each model call is recorded and can be held open"""
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        self.release.wait(5)
+        if "boom" in texts:
+            raise RuntimeError("model failed")
+        return [[float(len(text)), float(ord(text[-1]))] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def test_concurrent_queries_share_model_calls_and_get_their_own_vectors():
+    base = StubEmbeddings()
+    embedder = MicroBatchingEmbeddings(base)
+    base.release.clear()  # the first call blocks, so the other queries pile up behind it
+    texts = [f"question {i:02d}" + chr(ord("a") + i) for i in range(16)]
+    with ThreadPoolExecutor(max_workers=len(texts)) as pool:
+        futures = [pool.submit(embedder.embed_query, text) for text in texts]
+        wait_for(lambda: embedder.stats()["queries"] == len(texts))
+        base.release.set()
+        vectors = [future.result(5) for future in futures]
+
+    assert vectors == [[float(len(text)), float(ord(text[-1]))] for text in texts]
+    assert len(base.calls) < len(texts)
+    assert sorted(text for call in base.calls for text in call) == sorted(texts)
+    assert embedder.stats()["batches"] == len(base.calls)
+
+
+def test_duplicates_are_embedded_once_and_recent_queries_skip_the_model():
+    base = StubEmbeddings()
+    embedder = MicroBatchingEmbeddings(base)
+    base.release.clear()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        first = pool.submit(embedder.embed_query, "warm")
+        wait_for(lambda: base.calls)
+        repeats = [pool.submit(embedder.embed_query, "revenue?") for _ in range(3)]
+        wait_for(lambda: embedder.stats()["queued"] == 3)
+        base.release.set()
+        assert first.result(5) == [4.0, float(ord("m"))]
+        assert {tuple(future.result(5)) for future in repeats} == {(8.0, float(ord("?")))}
+    assert base.calls == [["warm"], ["revenue?"]]
+
+    assert embedder.embed_query("revenue?") == [8.0, float(ord("?"))]
+    assert len(base.calls) == 2
+    assert embedder.stats()["recent_hits"] == 1
+
+
+def test_a_failed_batch_fails_its_callers_only():
+    base = StubEmbeddings()
+    embedder = MicroBatchingEmbeddings(base)
+    with pytest.raises(RuntimeError, match="model failed"):
+        embedder.embed_query("boom")
+    assert embedder.embed_query("fine") == [4.0, float(ord("e"))]
@@ -0,0 +1,74 @@
+from langchain_core.embeddings import Embeddings
+
+from embedding_cache import CachedEmbeddings, EmbeddingCache, cache_key
+
+DIM = 4
+
+
+class CountingEmbeddings(Embeddings):
+    """Deterministic vectors; records every batch sent to the model"""
+
+    def __init__(self):
+        self.batches = []
+
+    def embed_documents(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(text)), 1.0, 2.0, 3.0] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def test_cache_key_depends_on_model_and_text():
+    assert cache_key("m", "a") == cache_key("m", "a")
+    assert cache_key("m", "a") != cache_key("other", "a")
+    assert cache_key("m", "a") != cache_key("m", "b")
+
+
+def test_get_many_reports_hits_and_misses(tmp_path):
+    cache = EmbeddingCache(tmp_path, DIM, max_entries=8)
+    cache.put_many([cache_key("m", "a")], [[1, 2, 3, 4]])
+    found = cache.get_many([cache_key("m", "a"), cache_key("m", "b")])
+    assert found[0].tolist() == [1, 2, 3, 4]
+    assert found[1] is None
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = EmbeddingCache(tmp_path, DIM, max_entries=2)
+    a, b, c = (cache_key("m", text) for text in "abc")
+    cache.put_many([a, b], [[1] * DIM, [2] * DIM])
+    cache.get_many([a])  # b is now least recently used
+    cache.put_many([c], [[3] * DIM])
+    assert cache.get_many([b]) == [None]
+    assert cache.get_many([a])[0] is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_survive_reopening_after_flush(tmp_path):
+    cache = EmbeddingCache(tmp_path, DIM, max_entries=4)
+    cache.put_many([cache_key("m", "a")], [[5, 6, 7, 8]])
+    cache.flush()
+    reopened = EmbeddingCache(tmp_path, DIM, max_entries=4)
+    assert reopened.get_many([cache_key("m", "a")])[0].tolist() == [5, 6, 7, 8]
+
+
+def test_changed_capacity_starts_a_new_cache(tmp_path):
+    cache = EmbeddingCache(tmp_path, DIM, max_entries=4)
+    cache.put_many([cache_key("m", "a")], [[5, 6, 7, 8]])
+    cache.flush()
+    assert EmbeddingCache(tmp_path, DIM, max_entries=8).stats()["entries"] == 0
+
+
+def test_cached_embeddings_only_embed_misses_once(tmp_path):
+    base = CountingEmbeddings()
+    embedder = CachedEmbeddings(base, EmbeddingCache(tmp_path, DIM, max_entries=16), "m", batch_size=2)
+    first = embedder.embed_documents(["a", "bb", "a", "ccc"])
+    assert base.batches == [["a", "bb"], ["ccc"]]  # duplicates embedded once, in batches of 2
+    assert embedder.stats() == {"hits": 0, "misses": 3}
+
+    embedder.reset_stats()
+    second = embedder.embed_documents(["ccc", "a", "dddd"])
+    assert base.batches[-1] == ["dddd"]
+    assert embedder.stats() == {"hits": 2, "misses": 1}
+    assert second[:2] == [first[3], first[0]]
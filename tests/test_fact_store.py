@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from fact_store import FactStore, extract_facts, normalize_period, parse_value
+
+PAGE = """Consolidated Statements of Operations
+(in millions, except per share data)
+FY2023 FY2024
+Revenue $ 1,200 $ 1,500
+Operating income (loss) (50) 120
+Net income per share 1.10 1.45
+Gross margin 40.0% 42.5%
+Notes to the financial statements follow.
+"""
+
+
+def test_parse_value():
+    assert parse_value("$1,234") == 1234.0
+    assert parse_value("(56)") == -56.0
+    assert parse_value("12.5%") == 12.5
+    assert parse_value("—") is None
+
+
+def test_normalize_period():
+    assert normalize_period("FY 24") == "FY2024"
+    assert normalize_period("Q1 FY26") == "Q1FY2026"
+
+
+def test_extract_facts_reads_a_period_headed_table():
+    facts = extract_facts(PAGE, page=3)
+    by_key = {(fact["metric"], fact["period"]): fact for fact in facts}
+    assert len(facts) == 8
+    assert by_key[("Revenue", "FY2024")]["value"] == 1500.0
+    assert by_key[("Revenue", "FY2024")]["unit"] == "millions"
+    assert by_key[("Operating income (loss)", "FY2023")]["value"] == -50.0
+    assert by_key[("Net income per share", "FY2024")]["unit"] == "per share"
+    assert by_key[("Gross margin", "FY2023")]["unit"] == "%"
+    assert by_key[("Revenue", "FY2023")]["page"] == 3
+
+
+def test_query_filters_and_aggregates():
+    store = FactStore(extract_facts(PAGE, page=0))
+    assert store.query(metric="revenue", period="FY 2024")["facts"][0]["value"] == 1500.0
+    assert store.query(metric="revenue", op="sum")["value"] == 2700.0
+    assert store.query(metric="revenue", op="count")["value"] == 2.0
+    groups = store.query(unit="millions", op="max", group_by="period")["groups"]
+    assert [(group["period"], group["value"]) for group in groups] == [("FY2023", 1200.0), ("FY2024", 1500.0)]
+
+
+def test_exact_metric_match():
+    store = FactStore(extract_facts(PAGE))
+    assert store.query(metric="income", exact=True)["count"] == 0
+    assert store.query(metric="income")["count"] == 4
+
+
+def test_change_is_period_over_period():
+    store = FactStore(extract_facts(PAGE))
+    points = store.query(metric="revenue", op="change")["series"][0]["points"]
+    assert points[1] == {"period": "FY2024", "value": 1500.0, "change": 300.0, "pct_change": 25.0}
+
+
+def test_unknown_operation_is_rejected():
+    with pytest.raises(ValueError):
+        FactStore().query(op="median")
+
+
+def test_round_trips_through_json():
+    store = FactStore(extract_facts(PAGE, page=1))
+    restored = FactStore.from_dict(json.loads(json.dumps(store.to_dict())))
+    assert restored.query(metric="revenue") == store.query(metric="revenue")
+    assert restored.metrics() == store.metrics()
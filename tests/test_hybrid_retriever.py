@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+
+from langchain_core.documents import Document
+
+from hybrid_retriever import HybridRetriever
+from sparse_index import BM25Index
+
+
+class FakeClient:
+    def __init__(self, points):
+        self.points = points
+        self.retrieved = []
+
+    def retrieve(self, collection_name, ids, with_payload):
+        self.retrieved.extend(ids)
+        return [self.points[point_id] for point_id in ids if point_id in self.points]
+
+
+def make_store(points=None):
+    return SimpleNamespace(client=FakeClient(points or {}), collection_name="doc",
+                           content_payload_key="page_content", metadata_payload_key="metadata")
+
+
+def dense_doc(doc_id, text):
+    return Document(page_content=text, metadata={"_id": doc_id})
+
+
+def test_fuse_puts_documents_found_by_both_searches_first():
+    index = BM25Index([("1", "revenue by segment"), ("2", "dividend policy"), ("3", "cloud revenue FY2024")])
+    retriever = HybridRetriever(store=make_store(), sparse_index=lambda: index, k=3)
+    dense = [dense_doc("2", "dividend policy"), dense_doc("3", "cloud revenue FY2024")]
+    fused = retriever.fuse("cloud revenue FY2024", dense)
+    assert [doc.metadata["_id"] for doc in fused][0] == "3"
+
+
+def test_fuse_fetches_keyword_only_hits_from_the_store():
+    point = SimpleNamespace(id="9", payload={"page_content": "Ticker ACME 10-K", "metadata": {"page": 4}})
+    store = make_store({"9": point})
+    index = BM25Index([("9", "Ticker ACME 10-K")])
+    retriever = HybridRetriever(store=store, sparse_index=lambda: index, k=2)
+    fused = retriever.fuse("ACME", [dense_doc("1", "unrelated text")])
+    assert store.client.retrieved == ["9"]
+    assert {doc.page_content for doc in fused} == {"Ticker ACME 10-K", "unrelated text"}
+    assert next(doc for doc in fused if doc.page_content.startswith("Ticker")).metadata == {"page": 4, "_id": "9"}
+
+
+def test_fuse_skips_ids_removed_by_a_refresh():
+    index = BM25Index([("gone", "cloud revenue")])
+    retriever = HybridRetriever(store=make_store(), sparse_index=lambda: index, k=3)
+    fused = retriever.fuse("cloud revenue", [dense_doc("1", "other")])
+    assert [doc.metadata["_id"] for doc in fused] == ["1"]
+
+
+def test_fuse_without_index_is_dense_only():
+    retriever = HybridRetriever(store=make_store(), sparse_index=lambda: None, k=2)
+    dense = [dense_doc(str(i), f"text {i}") for i in range(4)]
+    assert retriever.fuse("text", dense) == dense[:2]
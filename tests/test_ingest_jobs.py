@@ -0,0 +1,100 @@
+import threading
+
+import pytest
+
+from ingest_jobs import CANCELLED, COMPLETED, FAILED, QUEUED, RUNNING, JobManager, QueueFullError
+
+
+@pytest.fixture
+def manager():
+    manager = JobManager(max_workers=1, max_pending=2)
+    yield manager
+    manager.shutdown(wait=True)
+
+
+def blocking(started, release):
+    def work(job):
+        started.set()
+        release.wait(5)
+        return {"doc_count": 1}
+    return work
+
+
+def test_job_runs_queued_running_completed(manager):
+    seen = []
+    manager.listener = lambda job: seen.append(job.status)
+    started, release = threading.Event(), threading.Event()
+    job = manager.submit("doc", "doc.pdf", blocking(started, release))
+    started.wait(5)
+    assert job.status == RUNNING
+    assert manager.active_job("doc") is job
+    release.set()
+    job.future.result(5)
+    assert job.status == COMPLETED
+    assert job.result == {"doc_count": 1}
+    assert seen == [QUEUED, RUNNING, COMPLETED]
+    assert manager.active_job("doc") is None
+
+
+def test_failed_job_records_the_error(manager):
+    def work(job):
+        raise RuntimeError("bad pdf")
+
+    job = manager.submit("doc", "doc.pdf", work)
+    job.future.result(5)
+    assert job.status == FAILED
+    assert job.error == "bad pdf"
+
+
+def test_running_job_stops_at_its_next_checkpoint(manager):
+    started, release = threading.Event(), threading.Event()
+
+    def work(job):
+        started.set()
+        release.wait(5)
+        job.raise_if_cancelled()
+
+    job = manager.submit("doc", "doc.pdf", work)
+    started.wait(5)
+    manager.cancel(job.job_id)
+    release.set()
+    job.future.result(5)
+    assert job.status == CANCELLED
+
+
+def test_queued_job_cancelled_before_it_starts_runs_cleanup_once(manager):
+    started, release = threading.Event(), threading.Event()
+    manager.submit("first", "first.pdf", blocking(started, release))
+    started.wait(5)
+    cleanups = []
+    queued = manager.submit("second", "second.pdf", lambda job: None, cleanup=lambda: cleanups.append(1))
+    assert queued.status == QUEUED
+    manager.cancel(queued.job_id)
+    release.set()
+    manager.shutdown(wait=True)
+    assert queued.status == CANCELLED
+    assert queued.started_at is None
+    assert cleanups == [1]
+
+
+def test_queue_full_rejects_and_cleans_up(manager):
+    started, release = threading.Event(), threading.Event()
+    manager.submit("a", "a.pdf", blocking(started, release))
+    manager.submit("b", "b.pdf", lambda job: None)
+    cleanups = []
+    with pytest.raises(QueueFullError):
+        manager.submit("c", "c.pdf", lambda job: None, cleanup=lambda: cleanups.append(1))
+    assert cleanups == [1]
+    release.set()
+
+
+def test_progress_is_reported_in_to_dict(manager):
+    def work(job):
+        job.update(stage="embedding", chunks_total=10)
+        job.advance("chunks_embedded", 4)
+
+    job = manager.submit("doc", "doc.pdf", work)
+    job.future.result(5)
+    progress = job.to_dict()["progress"]
+    assert (progress["chunks_total"], progress["chunks_embedded"]) == (10, 4)
+    assert job.to_dict()["stage"] == COMPLETED
@@ -0,0 +1,186 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from llm_scheduler import LLMRateLimitError, LLMScheduler, TokenBucket, is_rate_limit_error, retry_after_seconds
+
+
+class RateLimitError(Exception):
+    """Shaped like the provider SDK errors: a response with a status code and headers"""
+
+    def __init__(self, retry_after=None):
+        super().__init__("429 Too Many Requests")
+        headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+        self.response = SimpleNamespace(status_code=429, headers=headers)
+
+
+def scheduler(**kwargs):
+    return LLMScheduler("test", base_backoff=0.0, **kwargs)
+
+
+def test_rate_limit_errors_are_recognised():
+    assert is_rate_limit_error(RateLimitError())
+    assert is_rate_limit_error(SimpleNamespace(status_code=429))
+    assert not is_rate_limit_error(ValueError("bad prompt"))
+    assert retry_after_seconds(RateLimitError(retry_after=7)) == 7.0
+    assert retry_after_seconds(RateLimitError()) is None
+
+
+def test_identical_concurrent_calls_share_one_provider_call():
+    sched = scheduler()
+    release = threading.Event()
+    sends = []
+
+    def send():
+        sends.append(1)
+        release.wait(5)
+        return "answer"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(sched.call("same prompt", send, tokens=10)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while sched.stats()["coalesced"] < 4:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == ["answer"] * 5
+    assert len(sends) == 1
+    assert sched.stats()["calls"] == 1
+    assert sched.stats()["in_flight_prompts"] == 0
+
+
+def test_different_prompts_are_not_coalesced():
+    sched = scheduler()
+    assert sched.call("a", lambda: "A", tokens=1) == "A"
+    assert sched.call("b", lambda: "B", tokens=1) == "B"
+    assert sched.stats()["calls"] == 2
+    assert sched.stats()["coalesced"] == 0
+
+
+def test_rate_limited_call_is_retried_until_it_succeeds():
+    sched = scheduler(max_retries=3)
+    attempts = []
+
+    def send():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RateLimitError()
+        return "ok"
+
+    assert sched.call("key", send, tokens=1) == "ok"
+    stats = sched.stats()
+    assert (stats["calls"], stats["retries"], stats["rate_limited"], stats["failed"]) == (3, 2, 2, 0)
+
+
+def test_retries_give_up_with_rate_limit_error():
+    sched = scheduler(max_retries=2, max_backoff=0.0)  # don't actually sleep for the hint
+
+    def send():
+        raise RateLimitError(retry_after=3)
+
+    with pytest.raises(LLMRateLimitError) as raised:
+        sched.call("key", send, tokens=1)
+    assert raised.value.retry_after == 3.0
+    stats = sched.stats()
+    assert stats["calls"] == 3
+    assert stats["failed"] == 1
+
+
+def test_backoff_honours_retry_after_capped_at_max_backoff():
+    sched = LLMScheduler("test", base_backoff=1.0, max_backoff=5.0)
+    assert sched._backoff(0, RateLimitError(retry_after=2)) == 2.0
+    assert sched._backoff(0, RateLimitError(retry_after=60)) == 5.0
+    assert 2.0 <= sched._backoff(2, RateLimitError()) <= 4.0  # 1s * 2**2, jittered down to half
+
+
+def test_other_errors_are_not_retried():
+    sched = scheduler()
+    attempts = []
+
+    def send():
+        attempts.append(1)
+        raise ValueError("bad prompt")
+
+    with pytest.raises(ValueError):
+        sched.call("key", send, tokens=1)
+    assert len(attempts) == 1
+    assert sched.stats()["failed"] == 1
+
+
+def test_waiting_callers_get_the_shared_error():
+    sched = scheduler()
+    release = threading.Event()
+
+    def send():
+        release.wait(5)
+        raise ValueError("boom")
+
+    errors = []
+
+    def call():
+        try:
+            sched.call("key", send, tokens=1)
+        except ValueError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    while sched.stats()["coalesced"] < 2:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert errors == ["boom"] * 3
+
+
+def test_stream_retries_only_before_the_first_chunk():
+    sched = scheduler(max_retries=2)
+    opened = []
+
+    def open_stream():
+        opened.append(1)
+        if len(opened) == 1:
+            raise RateLimitError()
+        yield "a"
+        yield "b"
+
+    assert list(sched.stream(open_stream, tokens=1)) == ["a", "b"]
+    assert len(opened) == 2
+
+    def broken_stream():
+        yield "a"
+        raise RateLimitError()
+
+    with pytest.raises(RateLimitError):
+        list(sched.stream(broken_stream, tokens=1))
+
+
+def test_token_bucket_admits_a_burst_then_makes_callers_wait():
+    bucket = TokenBucket(per_minute=60)  # one unit per second
+    now = bucket.updated
+    assert bucket.reserve(60, now) == 0.0
+    assert bucket.reserve(2, now) == pytest.approx(2.0)
+    assert bucket.reserve(1, now + 3) == pytest.approx(0.0)
+
+
+def test_token_bucket_adjust_refunds_overestimates():
+    bucket = TokenBucket(per_minute=600)
+    now = bucket.updated
+    bucket.reserve(500, now)
+    bucket.adjust(-400, now)  # used 100 of the 500 estimated
+    assert bucket.available(now) == pytest.approx(500)
+
+
+def test_request_budget_delays_calls_over_the_limit():
+    sched = LLMScheduler("test", requests_per_minute=600)  # 10 per second, burst of 600
+    sched.requests.level = 0  # burst used up
+    started = time.monotonic()
+    sched.call("key", lambda: "ok", tokens=1)
+    assert time.monotonic() - started >= 0.09
+    assert sched.stats()["wait_ms"]["max"] >= 90
@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+from metrics import MetricsRegistry, annotate, timed, timed_iter, track_request
+
+
+def test_histogram_renders_cumulative_buckets_sum_and_count():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency", ["route"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 5.0):
+        histogram.observe(value, route="rag")
+    assert registry.render().splitlines() == [
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="rag",le="0.1"} 2',  # bounds are inclusive
+        'latency_seconds_bucket{route="rag",le="1"} 3',
+        'latency_seconds_bucket{route="rag",le="+Inf"} 4',
+        'latency_seconds_sum{route="rag"} 5.65',
+        'latency_seconds_count{route="rag"} 4',
+    ]
+    assert histogram.snapshot(route="rag") == {"count": 4, "sum": pytest.approx(5.65)}
+    assert histogram.snapshot(route="other") == {"count": 0, "sum": 0.0}
+
+
+def test_counter_and_gauge_samples_escape_label_values():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests", ["endpoint"])
+    requests.inc(endpoint='say "hi"\\\n')
+    requests.inc(2, endpoint='say "hi"\\\n')
+    registry.gauge("queue_depth", "Queued jobs").set(3)
+    assert requests.value(endpoint='say "hi"\\\n') == 3
+    lines = registry.render().splitlines()
+    assert 'requests_total{endpoint="say \\"hi\\"\\\\\\n"} 3' in lines
+    assert "# TYPE queue_depth gauge" in lines and "queue_depth 3" in lines
+
+
+def test_labels_and_names_are_checked():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests", ["endpoint"])
+    with pytest.raises(ValueError):
+        requests.inc(route="rag")
+    with pytest.raises(ValueError):
+        registry.histogram("requests_total", "Duplicate")
+
+
+def test_timed_stages_accumulate_in_the_current_request_only():
+    histogram = MetricsRegistry().histogram("stage_seconds", "Stages", ["stage"])
+    with timed(histogram, "outside"):
+        pass  # no request being tracked: observed, not collected
+
+    seen = {}
+
+    def request(name):
+        with track_request() as timings:
+            annotate(route=name)
+            for _ in range(2):
+                with timed(histogram, "retrieve"):
+                    pass
+            seen[name] = timings
+
+    threads = [threading.Thread(target=request, args=(name,)) for name in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert {name: timings["route"] for name, timings in seen.items()} == {"a": "a", "b": "b"}
+    assert all(set(timings) == {"route", "retrieve_ms"} for timings in seen.values())
+    assert histogram.snapshot(stage="retrieve")["count"] == 4
+    assert histogram.snapshot(stage="outside")["count"] == 1
+
+
+def test_timed_iter_observes_each_item():
+    histogram = MetricsRegistry().histogram("stage_seconds", "Stages", ["stage"])
+    assert list(timed_iter(histogram, "parse", range(3))) == [0, 1, 2]
+    assert histogram.snapshot(stage="parse")["count"] == 3
@@ -0,0 +1,60 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from pdf_parsing import load_pdf_pages
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO / "benchmarks"))
+
+from synthetic_pdf import write_pdf  # noqa: E402
+
+
+def test_parallel_parsing_matches_the_serial_loader(tmp_path):
+    path = write_pdf(tmp_path / "report.pdf", 20)
+    serial = list(load_pdf_pages(str(path), workers=1))
+    parallel = list(load_pdf_pages(str(path), workers=2, min_pages=2))
+    assert [(page.page_content, page.metadata) for page in parallel] == \
+        [(page.page_content, page.metadata) for page in serial]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_large_upload_under_python_app_py_with_on_disk_storage(tmp_path):
+    """Spawned parsing workers re-import app as __main__; they must not reopen QDRANT_PATH"""
+    port = free_port()
+    env = {**os.environ, "PORT": str(port), "QDRANT_PATH": str(tmp_path / "qdrant"),
+           "COLLECTION_METADATA_DIR": str(tmp_path / "collections"), "EMBED_CACHE_DIR": str(tmp_path / "cache"),
+           "EMBED_PROVIDER": "fake", "LLM_PROVIDER": "fake", "WARMUP_ON_STARTUP": "false",
+           "PDF_PARSE_WORKERS": "2", "PDF_PARALLEL_MIN_PAGES": "32", "SUMMARY_PRECOMPUTE": "false"}
+    server = subprocess.Popen([sys.executable, "app.py"], cwd=REPO, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                httpx.get(f"{base}/", timeout=1)
+                break
+            except httpx.TransportError:
+                assert server.poll() is None and time.monotonic() < deadline, "server did not start"
+                time.sleep(0.2)
+        path = write_pdf(tmp_path / "Annual Report.pdf", 40)
+        with open(path, "rb") as pdf:
+            response = httpx.post(f"{base}/upload_pdf", params={"wait": True}, timeout=300,
+                                  files={"file": (path.name, pdf, "application/pdf")})
+        assert response.status_code == 200, response.text
+        info = httpx.get(f"{base}/collection/annual_report/info", timeout=30).json()
+        assert info["filename"] == "Annual Report.pdf"
+    finally:
+        server.terminate()
+        server.wait(30)
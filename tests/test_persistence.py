@@ -0,0 +1,37 @@
+import pytest
+
+from persistence import CollectionMetadataStore, export_collection_points, iter_snapshot_points, validate_collection_name
+
+
+@pytest.mark.parametrize("name", ["report", "annual_report-2024", "10k.v2"])
+def test_safe_collection_names_are_accepted(name):
+    assert validate_collection_name(name) == name
+
+
+@pytest.mark.parametrize("name", ["", "../../tmp/pwn", ".hidden", "a/b", "a\\b", "-flag", None])
+def test_unsafe_collection_names_are_rejected(name):
+    with pytest.raises(ValueError):
+        validate_collection_name(name)
+
+
+def test_metadata_store_round_trip(tmp_path):
+    store = CollectionMetadataStore(tmp_path)
+    store.save("doc", {"doc_count": 3})
+    assert store.load("doc") == {"doc_count": 3}
+    assert store.load_all() == {"doc": {"doc_count": 3}}
+    store.delete("doc")
+    assert store.load("doc") is None
+
+
+def test_metadata_store_never_writes_outside_its_directory(tmp_path):
+    store = CollectionMetadataStore(tmp_path / "collections")
+    with pytest.raises(ValueError):
+        store.save("../escaped", {})
+    assert not (tmp_path / "escaped.json").exists()
+
+
+def test_export_helpers_reject_unsafe_names(tmp_path):
+    with pytest.raises(ValueError):
+        export_collection_points(None, "doc__1", tmp_path, "../escaped")
+    with pytest.raises(ValueError):
+        next(iter_snapshot_points(tmp_path, "../escaped"))
@@ -0,0 +1,151 @@
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+from shared_state import EXPORTS_KEPT, SharedState
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+
+from synthetic_pdf import write_pdf  # noqa: E402
+
+
+def job(collection_name="doc", status="running"):
+    return {"job_id": uuid.uuid4().hex, "collection_name": collection_name, "status": status,
+            "created_at": time.time()}
+
+
+def test_workers_claim_distinct_slots_and_slot_zero_leads(tmp_path):
+    first, second = SharedState(tmp_path), SharedState(tmp_path)
+    assert (first.claim_slot(), second.claim_slot()) == (0, 1)
+    assert first.is_leader and not second.is_leader
+
+
+def test_publish_bumps_the_generation_seen_by_every_worker(tmp_path):
+    publisher, reader = SharedState(tmp_path), SharedState(tmp_path)
+    assert reader.generation() == 0
+    first = publisher.publish("doc", {"doc_count": 3})
+    second = publisher.publish("other", {"doc_count": 1})
+    assert (first, second) == (1, 2)
+    assert reader.generation() == 2
+    record = reader.collection("doc")
+    assert (record["generation"], record["metadata"]) == (1, {"doc_count": 3})
+    assert set(reader.collections()) == {"doc", "other"}
+    assert reader.collection("missing") is None
+
+
+def test_write_export_moves_a_complete_export_into_place(tmp_path):
+    state = SharedState(tmp_path)
+    target = state.write_export("doc", "doc__1", lambda directory: (directory / "points.jsonl").write_text("{}"))
+    assert target == state.export_path("doc", "doc__1")
+    assert (target / "points.jsonl").exists()
+    assert [path.name for path in target.parent.iterdir()] == ["doc__1"]  # no staging left behind
+
+
+def test_failed_export_leaves_nothing_behind(tmp_path):
+    state = SharedState(tmp_path)
+
+    def fail(directory):
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        state.write_export("doc", "doc__1", fail)
+    assert list((tmp_path / "exports" / "doc").iterdir()) == []
+
+
+def test_old_exports_are_pruned_on_publish(tmp_path):
+    state = SharedState(tmp_path)
+    for version in range(4):
+        state.write_export("doc", f"doc__{version}", lambda directory: None)
+        time.sleep(0.01)  # distinct mtimes
+        state.publish("doc", {}, export=f"doc__{version}")
+    kept = sorted(path.name for path in (tmp_path / "exports" / "doc").iterdir())
+    assert kept == [f"doc__{version}" for version in range(4 - EXPORTS_KEPT, 4)]
+
+
+def test_export_paths_reject_unsafe_names(tmp_path):
+    state = SharedState(tmp_path)
+    with pytest.raises(ValueError):
+        state.export_path("../escape", "doc__1")
+    with pytest.raises(ValueError):
+        state.export_path("doc", "../../escape")
+
+
+def test_active_job_ignores_finished_and_stale_jobs(tmp_path):
+    state = SharedState(tmp_path)
+    running = job()
+    state.save_job(job(status="completed"))
+    state.save_job(running)
+    assert state.active_job("doc", stale_after=30)["job_id"] == running["job_id"]
+    assert state.active_job("doc", stale_after=0) is None
+    assert state.active_job("other", stale_after=30) is None
+
+
+def test_cancel_requests_are_taken_once(tmp_path):
+    owner, other = SharedState(tmp_path), SharedState(tmp_path)
+    running = job()
+    owner.save_job(running)
+    assert other.request_cancel(running["job_id"])
+    assert owner.take_cancel_request(running["job_id"])
+    assert not owner.take_cancel_request(running["job_id"])
+    assert not other.request_cancel(uuid.uuid4().hex)  # unknown job
+
+
+def test_invalid_job_ids_are_not_paths(tmp_path):
+    state = SharedState(tmp_path)
+    assert state.get_job("../../etc/passwd") is None
+    assert not state.request_cancel("../x")
+
+
+def test_prune_jobs_drops_stale_records(tmp_path):
+    state = SharedState(tmp_path)
+    state.save_job(job())
+    state.prune_jobs(stale_after=0)
+    assert state.list_jobs() == []
+
+
+@pytest.fixture
+def published_elsewhere(tmp_path, monkeypatch):
+    """A collection published to shared state that this worker hasn't loaded yet"""
+    monkeypatch.setattr(app, "shared_state", SharedState(tmp_path / "shared"))
+    monkeypatch.setattr(app, "_shared_synced", {"generation": 0, "collections": {}})
+    monkeypatch.setattr(app, "SUMMARY_PRECOMPUTE", False)
+    path = write_pdf(tmp_path / "Elsewhere.pdf", 4)
+    app.create_or_refresh_store_from_file("elsewhere", str(path), path.name)
+    # Forget the local copy, as a worker that didn't take the upload
+    app.in_memory_collections.pop("elsewhere")
+    app.invalidate_collection_caches("elsewhere")
+    app._shared_synced["collections"].pop("elsewhere")
+    yield TestClient(app.app)
+    app.in_memory_collections.pop("elsewhere", None)
+
+
+def test_collection_not_loaded_yet_answers_not_ready(published_elsewhere):
+    assert app.shared_collection_pending("elsewhere")
+    response = published_elsewhere.post("/fin_chat", params={"collection_name": "elsewhere", "message": "Revenue?"})
+    assert response.status_code == 409
+    assert response.headers["Retry-After"] == "1"
+    assert response.json()["status"] == "not_ready"
+
+
+def test_collection_is_served_once_synced(published_elsewhere):
+    app.sync_shared_collections()
+    assert not app.shared_collection_pending("elsewhere")
+    assert app.in_memory_collections["elsewhere"]["filename"] == "Elsewhere.pdf"
+    response = published_elsewhere.post("/fin_chat", params={"collection_name": "elsewhere", "message": "Revenue?"})
+    assert response.status_code == 200, response.text
+    assert response.json()["response"]
+
+
+def test_multi_chat_answers_not_ready_rather_than_not_found(published_elsewhere):
+    response = published_elsewhere.post("/fin_chat/multi", json={"message": "Revenue?",
+                                                                  "collection_names": ["elsewhere"]})
+    assert response.status_code == 409
+    assert response.json()["status"] == "not_ready"
+    response = published_elsewhere.post("/fin_chat/multi", json={"message": "Revenue?",
+                                                                  "collection_names": ["never_published"]})
+    assert response.status_code == 404
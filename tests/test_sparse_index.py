@@ -0,0 +1,55 @@
+from sparse_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+DOCS = [
+    ("a", "Revenue for the Cloud segment was 12,345 million in FY2024."),
+    ("b", "Operating expenses grew in FY2023 as headcount increased."),
+    ("c", "Cloud revenue cloud revenue cloud revenue, a recurring theme."),
+    ("d", "The board declared a quarterly dividend."),
+]
+
+
+def test_tokenize_lowercases_and_drops_thousands_separators():
+    assert tokenize("Revenue was 12,345.6 in FY2024 (Q1)") == ["revenue", "was", "12345.6", "in", "fy2024", "q1"]
+
+
+def test_search_ranks_by_bm25_score():
+    index = BM25Index(DOCS)
+    results = index.search("cloud revenue", k=10)
+    assert [doc_id for doc_id, _ in results] == ["c", "a"]
+    assert results[0][1] > results[1][1] > 0
+
+
+def test_search_matches_exact_figures_and_fiscal_labels():
+    index = BM25Index(DOCS)
+    assert index.search("12345")[0][0] == "a"
+    assert index.search("FY2023")[0][0] == "b"
+
+
+def test_search_without_matching_terms_is_empty():
+    assert BM25Index(DOCS).search("goodwill impairment") == []
+
+
+def test_search_returns_at_most_k_results():
+    index = BM25Index(DOCS)
+    assert len(index.search("cloud revenue fy2023 dividend", k=2)) == 2
+
+
+def test_empty_index():
+    index = BM25Index([])
+    assert len(index) == 0
+    assert index.search("revenue") == []
+
+
+def test_rrf_rewards_documents_ranked_by_both_lists():
+    dense = ["x", "shared", "y"]
+    sparse = ["z", "shared"]
+    assert reciprocal_rank_fusion([dense, sparse])[0] == "shared"
+
+
+def test_rrf_keeps_rank_order_of_a_single_list():
+    assert reciprocal_rank_fusion([["a", "b", "c"]]) == ["a", "b", "c"]
+
+
+def test_rrf_breaks_ties_by_first_appearance():
+    # "a" and "b" are both first in one list and missing from the other
+    assert reciprocal_rank_fusion([["a"], ["b"]]) == ["a", "b"]